@@ -0,0 +1,794 @@
+"""
+Apple-1 -- a software Apple-1 running WozMon and Integer BASIC, in place of
+the serial device of the autoplayer.
+
+The Apple-1 is served over a pseudo-terminal or a TCP socket, for the
+autoplayer to load and play ``hamurabi-6502.bas`` without hardware, and for
+any number of them to run side by side::
+
+    python apple1.py --pty /tmp/apple1
+    python play-hamurabi-vs-apple-1.py --device /tmp/apple1
+
+    python apple1.py --tcp 6502 --baud 2400
+    python play-hamurabi-vs-apple-1.py --device socket://localhost:6502
+
+WozMon follows the monitor ROM, and the memory it stores and examines is kept
+for as long as the emulator runs.  There is no 6502: running $E000 or $E2B3
+starts Integer BASIC, and any other address hangs until reset.  BASIC runs
+the program of its source file, in 16-bit integers, once the bytes of
+its WozMon script, ``--image``, are stored in memory.
+
+Opening the device presses reset, unless ``--no-reset`` is given, to keep
+running from one connection to the next, as for ``--repl``.  Without
+``--baud``, characters are sent and received as fast as possible.
+"""
+import argparse
+import os
+import random
+import re
+import select
+import socket
+import time
+import tty
+
+# local
+import wozmon
+
+BASIC_COLD = 0xe000
+BASIC_WARM = 0xe2b3
+BASIC_LOMEM = 0x4a
+BASIC_HIMEM = 0x4c
+BASIC_PP = 0xca
+CR, ESCAPE, BACKSPACE = 0x0d, 0x1b, ord('_')
+HEX = '0123456789ABCDEF'
+
+# WozMon modes, of the last '.' or ':' of a line
+XAM, BLOCK_XAM, STORE = 0, 1, 2
+
+# The autoplayer clears its input once the device is open, reset is pressed after.
+RESET_DELAY = 0.5
+
+
+class Reset(Exception):
+    """The reset button of the Apple-1 was pressed."""
+
+
+class BasicError(Exception):
+    """An error of Integer BASIC, printed as ``*** <message> ERR``."""
+
+
+TOKEN = re.compile(r'\s*(?:(?P<number>[0-9]+)|"(?P<string>[^"]*)"|(?P<rem>REM.*)'
+                   r'|(?P<keyword>PRINT|INPUT|IF|THEN|GOTO|GOSUB|RETURN|FOR|TO|STEP|NEXT|DIM|END|LET'
+                   r'|RUN|LIST|RND|LEN|ABS|SGN|AND|OR|NOT|MOD)'
+                   r'|(?P<name>[A-Z][A-Z0-9]*\$?)|(?P<op><=|>=|<>|[-+*/^=<>#(),;:]))')
+
+# binary operators, from the lowest precedence to the highest
+LEVELS = [('OR',), ('AND',), ('=', '#', '<>', '<', '>', '<=', '>='), ('+', '-'), ('*', '/', 'MOD'), ('^',)]
+
+
+def _int16(value):
+    if not -32767 <= value <= 32767:
+        raise BasicError('>32767')
+    return value
+
+
+def _divide(a, b):
+    # truncated toward zero
+    if b == 0:
+        raise BasicError('>32767')
+    quotient = abs(a) // abs(b)
+    return -quotient if (a < 0) != (b < 0) else quotient
+
+
+def _power(a, b):
+    if b < 0:
+        raise BasicError('RANGE')
+    return _int16(a ** b)
+
+
+OPERATORS = {
+    '+': lambda a, b: _int16(a + b),
+    '-': lambda a, b: _int16(a - b),
+    '*': lambda a, b: _int16(a * b),
+    '/': _divide,
+    'MOD': lambda a, b: a - b * _divide(a, b),
+    '^': _power,
+    '=': lambda a, b: int(a == b),
+    '#': lambda a, b: int(a != b),
+    '<>': lambda a, b: int(a != b),
+    '<': lambda a, b: int(a < b),
+    '>': lambda a, b: int(a > b),
+    '<=': lambda a, b: int(a <= b),
+    '>=': lambda a, b: int(a >= b),
+    'AND': lambda a, b: int(bool(a and b)),
+    'OR': lambda a, b: int(bool(a or b)),
+}
+
+FUNCTIONS = {
+    'RND': lambda basic, n: basic.rng.randrange(n) if n > 0 else -basic.rng.randrange(-n) if n < 0 else 0,
+    'ABS': lambda basic, n: abs(n),
+    'SGN': lambda basic, n: (n > 0) - (n < 0),
+}
+
+
+def _binary(operator, left, right):
+    return lambda basic: operator(left(basic), right(basic))
+
+
+def tokenize(text):
+    """Return the tokens of a line of BASIC, pairs of their kind and text."""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise BasicError('SYNTAX')
+        tokens.extend((kind, value) for kind, value in match.groupdict().items() if value is not None)
+        position = match.end()
+    return tokens
+
+
+class _Compiler:
+    """Compiles a line of BASIC to functions of :class:`IntegerBasic`.
+
+    Each statement is a function returning None to go on to the next
+    statement, or the index of the statement to go to.
+    """
+
+    def __init__(self, text):
+        self.tokens = [token for token in tokenize(text) if token[0] != 'rem']
+        self.position = 0
+
+    def peek(self, offset=0):
+        # the text of an operator or keyword, otherwise the kind of token
+        if self.position + offset >= len(self.tokens):
+            return None
+        kind, text = self.tokens[self.position + offset]
+        return text if kind in ('op', 'keyword') else kind
+
+    def take(self, *expected):
+        if self.position == len(self.tokens) or expected and self.peek() not in expected:
+            raise BasicError('SYNTAX')
+        self.position += 1
+        return self.tokens[self.position - 1]
+
+    def statements(self):
+        statements = []
+        while self.position < len(self.tokens):
+            if self.peek() == ':':
+                self.take()
+                continue
+            statements.append(self.statement())
+            if self.position < len(self.tokens):
+                self.take(':')
+        return statements
+
+    def ended(self):
+        return self.peek() in (None, ':')
+
+    def expression(self, level=0):
+        """Return the function of an expression, and whether it is of a string."""
+        if level == len(LEVELS):
+            return self.unary()
+        left, string = self.expression(level + 1)
+        while self.peek() in LEVELS[level]:
+            operator = self.take()[1]
+            right, right_string = self.expression(level + 1)
+            # strings are only compared equal, or not
+            if string != right_string or string and operator not in ('=', '#', '<>'):
+                raise BasicError('SYNTAX')
+            left, string = _binary(OPERATORS[operator], left, right), False
+        return left, string
+
+    def numeric(self):
+        value, string = self.expression()
+        if string:
+            raise BasicError('SYNTAX')
+        return value
+
+    def unary(self):
+        if self.peek() in ('-', '+', 'NOT'):
+            operator = self.take()[1]
+            value = self.unary()[0]
+            if operator == '-':
+                return (lambda basic: -value(basic)), False
+            if operator == 'NOT':
+                return (lambda basic: int(not value(basic))), False
+            return value, False
+        return self.primary()
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == 'number':
+            value = _int16(int(text))
+            return (lambda basic: value), False
+        if kind == 'string':
+            return (lambda basic: text), True
+        if text == '(':
+            value = self.expression()
+            self.take(')')
+            return value
+        if text in FUNCTIONS:
+            function = FUNCTIONS[text]
+            self.take('(')
+            value = self.numeric()
+            self.take(')')
+            return (lambda basic: function(basic, value(basic))), False
+        if text == 'LEN':
+            self.take('(')
+            value, string = self.expression()
+            self.take(')')
+            if not string:
+                raise BasicError('SYNTAX')
+            return (lambda basic: len(value(basic))), False
+        if kind != 'name':
+            raise BasicError('SYNTAX')
+        if text.endswith('$'):
+            return self.substring(text), True
+        return (lambda basic: basic.variables.get(text, 0)), False
+
+    def substring(self, name):
+        if self.peek() != '(':
+            return lambda basic: basic.strings.get(name, '')
+        self.take('(')
+        first = self.numeric()
+        last = None
+        if self.peek() == ',':
+            self.take()
+            last = self.numeric()
+        self.take(')')
+
+        def substring(basic):
+            value = basic.strings.get(name, '')
+            start = first(basic)
+            end = len(value) if last is None else last(basic)
+            if not 1 <= start <= end <= len(value):
+                raise BasicError('RANGE')
+            return value[start - 1:end]
+        return substring
+
+    def statement(self):
+        kind, text = self.take()
+        if kind == 'name':
+            return self.assignment(text)
+        method = getattr(self, f'statement_{text.lower()}', None)
+        if kind != 'keyword' or method is None:
+            raise BasicError('SYNTAX')
+        return method()
+
+    def statement_let(self):
+        return self.assignment(self.take()[1])
+
+    def assignment(self, name):
+        self.take('=')
+        value, string = self.expression()
+        if string != name.endswith('$'):
+            raise BasicError('SYNTAX')
+        if string:
+            return lambda basic: basic.set_string(name, value(basic))
+        return lambda basic: basic.variables.__setitem__(name, value(basic))
+
+    def statement_print(self):
+        items = []
+        while not self.ended():
+            if self.peek() in (';', ','):
+                items.append(self.take()[1])
+            else:
+                items.append(self.expression()[0])
+
+        def print_(basic):
+            for item in items:
+                if item == ',':
+                    basic.print(' ' * (8 - basic.column % 8))
+                elif item != ';':
+                    basic.print(str(item(basic)))
+            if not items or items[-1] not in (';', ','):
+                basic.print('\r')
+        return print_
+
+    def statement_input(self):
+        names = [self.take()[1]]
+        while self.peek() == ',':
+            self.take()
+            names.append(self.take()[1])
+
+        def input_(basic):
+            for name in names:
+                basic.print('?')
+                value = basic.readline()
+                if name.endswith('$'):
+                    basic.set_string(name, value)
+                elif re.fullmatch(r'\s*-?[0-9]+\s*', value):
+                    basic.variables[name] = _int16(int(value))
+                else:
+                    raise BasicError('SYNTAX')
+        return input_
+
+    def statement_if(self):
+        condition = self.numeric()
+        self.take('THEN')
+        if self.peek() == 'number' and self.peek(1) in (None, ':'):
+            line = int(self.take()[1])
+            return lambda basic: basic.goto(line) if condition(basic) else None
+        # only the one statement after THEN is conditional, any after it always run
+        statement = self.statement()
+        return lambda basic: statement(basic) if condition(basic) else None
+
+    def statement_goto(self):
+        line = self.numeric()
+        return lambda basic: basic.goto(line(basic))
+
+    def statement_gosub(self):
+        line = self.numeric()
+
+        def gosub(basic):
+            if len(basic.gosubs) == 8:
+                raise BasicError('>8 GOSUBS')
+            basic.gosubs.append(basic.pc + 1)
+            return basic.goto(line(basic))
+        return gosub
+
+    def statement_return(self):
+        def return_(basic):
+            if not basic.gosubs:
+                raise BasicError('BAD RETURN')
+            return basic.gosubs.pop()
+        return return_
+
+    def statement_for(self):
+        name = self.take()[1]
+        self.take('=')
+        first = self.numeric()
+        self.take('TO')
+        last = self.numeric()
+        step = lambda basic: 1
+        if self.peek() == 'STEP':
+            self.take()
+            step = self.numeric()
+
+        def for_(basic):
+            basic.variables[name] = first(basic)
+            # the loop of the same variable is left, and any inside of it
+            del basic.fors[next((index for index, loop in enumerate(basic.fors) if loop[0] == name),
+                                len(basic.fors)):]
+            if len(basic.fors) == 8:
+                raise BasicError('>8 FORS')
+            basic.fors.append((name, last(basic), step(basic), basic.pc + 1))
+        return for_
+
+    def statement_next(self):
+        names = [self.take()[1]]
+        while self.peek() == ',':
+            self.take()
+            names.append(self.take()[1])
+
+        def next_(basic):
+            for name in names:
+                index = next((index for index, loop in enumerate(basic.fors) if loop[0] == name), None)
+                if index is None:
+                    raise BasicError('BAD NEXT')
+                del basic.fors[index + 1:]
+                _, last, step, body = basic.fors[index]
+                value = basic.variables[name] = _int16(basic.variables.get(name, 0) + step)
+                if value <= last if step >= 0 else value >= last:
+                    return body
+                basic.fors.pop()
+        return next_
+
+    def statement_dim(self):
+        dims = []
+        while True:
+            name = self.take()[1]
+            if not name.endswith('$'):
+                raise BasicError('SYNTAX')
+            self.take('(')
+            dims.append((name, self.numeric()))
+            self.take(')')
+            if self.peek() != ',':
+                break
+            self.take()
+        return lambda basic: basic.dims.update((name, size(basic)) for name, size in dims)
+
+    def statement_end(self):
+        return lambda basic: len(basic.statements)
+
+    def statement_run(self):
+        def run(basic):
+            basic.clear()
+            return 0
+        return run
+
+    def statement_list(self):
+        def list_(basic):
+            for number, text in sorted(basic.listing.items()):
+                basic.print(f'{number:>4} {text}\r')
+        return list_
+
+
+class IntegerBasic:
+    """Integer BASIC, of the program of *source*, lines of BASIC text.
+
+    :param callable write: Prints text to the display.
+    :param callable readline: Returns a line typed, echoing it.
+    :param rng: Random number generator of ``RND``.
+    """
+
+    def __init__(self, source, write, readline, rng=random):
+        self.write = write
+        self.readline = readline
+        self.rng = rng
+        self.program = {}
+        for text in source:
+            if text.strip():
+                number, text = re.fullmatch(r'\s*([0-9]+) ?(.*)', text.rstrip('\r\n')).groups()
+                self.program[int(number)] = text
+        self.compiled = {number: _Compiler(text).statements() for number, text in self.program.items()}
+        self.column = 0
+        self.new()
+
+    def new(self):
+        """Clear the program."""
+        self._load({}, {})
+
+    def load(self):
+        """Load the program of the source."""
+        self._load(self.program, self.compiled)
+
+    def _load(self, listing, compiled):
+        self.listing = listing
+        self.statements, self.lines, self.line_of = [], {}, []
+        for number in sorted(compiled):
+            self.lines[number] = len(self.statements)
+            self.statements.extend(compiled[number])
+            self.line_of.extend([number] * len(compiled[number]))
+        self.clear()
+
+    def clear(self):
+        self.variables, self.strings, self.dims = {}, {}, {}
+        self.gosubs, self.fors = [], []
+        self.pc = None
+
+    def print(self, text):
+        self.write(text.encode('ascii'))
+        self.column = len(text) - text.rindex('\r') - 1 if '\r' in text else self.column + len(text)
+
+    def set_string(self, name, value):
+        if len(value) > self.dims.get(name, 0):
+            raise BasicError('STR OVFL')
+        self.strings[name] = value
+
+    def goto(self, line):
+        if line not in self.lines:
+            raise BasicError('BAD BRANCH')
+        return self.lines[line]
+
+    def execute(self, text):
+        """Carry out a line typed at the prompt, running the program from any statement it goes to."""
+        # a return to the line typed, or a loop of it, runs off the end of the program
+        self.pc = len(self.statements)
+        for statement in _Compiler(text).statements():
+            jump = statement(self)
+            if jump is not None:
+                self.pc = jump
+                break
+        while self.pc is not None and self.pc < len(self.statements):
+            jump = self.statements[self.pc](self)
+            self.pc = self.pc + 1 if jump is None else jump
+
+    def error(self, error):
+        """Print *error*, and the line of the program it stopped at."""
+        stopped = f' STOPPED AT {self.line_of[self.pc]}' if self.pc is not None and self.pc < len(self.line_of) else ''
+        self.print(f'\r*** {error} ERR{stopped}\r')
+
+
+class Apple1:
+    """An Apple-1 of 64K of memory, running WozMon and Integer BASIC.
+
+    :param source: Lines of the BASIC program run by Integer BASIC.
+    :param dict image: The program as it is stored in memory, by a WozMon
+        script, BASIC runs the program only while it is.
+    :param rng: Random number generator of ``RND``.
+    """
+
+    def __init__(self, source, image, rng=random):
+        self.memory = bytearray(0x10000)
+        self.image = image
+        self.basic = IntegerBasic(source, self.write, self.readline, rng)
+        self.line = None
+        self.xam = self.store = 0
+
+    def write(self, data):
+        self.line.write(data)
+
+    def key(self):
+        return self.line.read()
+
+    def run(self, line):
+        """Run forever, with the keyboard and display of *line*."""
+        self.line = line
+        while True:
+            try:
+                address = self.monitor()
+                if address in (BASIC_COLD, BASIC_WARM):
+                    self.integer_basic(cold=address == BASIC_COLD)
+                # the 6502 runs off into whatever is at the address
+                while True:
+                    self.key()
+            except Reset:
+                pass
+
+    def monitor(self):
+        """Run WozMon, until a run command, returns the address run."""
+        self.write(b'\\')
+        while True:
+            self.write(b'\r')
+            text = self.monitor_getline()
+            if text is None:
+                self.write(b'\\')
+                continue
+            address = self.monitor_line(text)
+            if address is not None:
+                return address
+
+    def monitor_getline(self):
+        """Return a line typed, or None when escape cancels it."""
+        text = bytearray()
+        while True:
+            key = self.key()
+            if key >= 0x20 or key == CR:
+                self.write(bytes([key]))
+            if key == CR:
+                return text.decode('ascii', 'replace')
+            if key == ESCAPE:
+                return None
+            if key == BACKSPACE:
+                if not text:
+                    self.write(b'\r')
+                    continue
+                text.pop()
+                continue
+            text.append(key)
+            if len(text) > wozmon.LINE_LENGTH:
+                return None
+
+    def monitor_line(self, text):
+        """Carry out a line of WozMon, returns the address of a run command, if any."""
+        mode = XAM
+        position = 0
+        while position < len(text):
+            char = text[position]
+            if char < '.':
+                position += 1
+            elif char in '.:':
+                mode = BLOCK_XAM if char == '.' else STORE
+                position += 1
+            elif char == 'R':
+                return self.xam
+            else:
+                end = position
+                while end < len(text) and text[end] in HEX:
+                    end += 1
+                if end == position:
+                    self.write(b'\\')
+                    return None
+                value = int(text[position:end], 16) & 0xffff
+                position = end
+                if mode == STORE:
+                    self.memory[self.store] = value & 0xff
+                    self.store = (self.store + 1) & 0xffff
+                    continue
+                if mode == XAM:
+                    self.xam = self.store = value
+                    self.write(f'\r{self.xam:04X}: {self.memory[self.xam]:02X}'.encode())
+                while self.xam < value:
+                    self.xam += 1
+                    if self.xam % 8 == 0:
+                        self.write(f'\r{self.xam:04X}:'.encode())
+                    self.write(f' {self.memory[self.xam]:02X}'.encode())
+                mode = XAM
+        return None
+
+    def word(self, address):
+        return self.memory[address] | self.memory[address + 1] << 8
+
+    def resident(self):
+        """Return whether the program of :attr:`image` is in memory,
+        its BASIC pointers, and the program from PP to HIMEM."""
+        if not self.image or self.word(BASIC_PP) >= self.word(BASIC_HIMEM):
+            return False
+        program = range(self.word(BASIC_PP), self.word(BASIC_HIMEM))
+        return all(self.memory[address] == value for address, value in self.image.items()
+                   if address in program or BASIC_LOMEM <= address < BASIC_HIMEM + 2
+                   or BASIC_PP <= address < BASIC_PP + 2)
+
+    def integer_basic(self, cold):
+        """Run Integer BASIC, from its cold start, clearing the program, or its warm start."""
+        if cold:
+            # LOMEM $0800, HIMEM $1000, and no program below it
+            self.memory[BASIC_LOMEM:BASIC_LOMEM + 4] = bytes([0x00, 0x08, 0x00, 0x10])
+            self.memory[BASIC_PP:BASIC_PP + 2] = bytes([0x00, 0x10])
+        if self.resident():
+            self.basic.load()
+        else:
+            self.basic.new()
+        while True:
+            self.basic.print('\r>')
+            text = self.readline()
+            if not text.strip():
+                continue
+            try:
+                self.basic.execute(text)
+            except BasicError as error:
+                self.basic.error(error)
+
+    def readline(self):
+        text = bytearray()
+        while True:
+            key = self.key()
+            if key >= 0x20 or key == CR:
+                self.write(bytes([key]))
+            if key == CR:
+                self.basic.column = 0
+                return text.decode('ascii', 'replace')
+            if key == BACKSPACE:
+                if text:
+                    text.pop()
+            elif key >= 0x20:
+                text.append(key)
+
+
+def _pace(due, char_time):
+    # wait for the character before to be sent, returns when this one is
+    now = time.monotonic()
+    if due > now:
+        time.sleep(due - now)
+    return max(due, now) + char_time
+
+
+class Line:
+    """The serial line of the Apple-1, to each connection in turn.
+
+    Characters are paced at *baud*, or sent and received as fast as
+    possible, and each connection presses reset when *reset* is true.
+    Subclasses wait for a connection by :meth:`connect`.
+    """
+
+    def __init__(self, baud=None, reset=True):
+        self.char_time = 10 / baud if baud else 0
+        self.reset = reset
+        self.fd = None
+        self._input = b''
+        self._position = 0
+        self._output = bytearray()
+        self._read_due = self._write_due = 0.0
+
+    def connect(self):
+        """Wait for a connection, returns its file descriptor."""
+        raise NotImplementedError
+
+    def disconnect(self):
+        pass
+
+    def read(self):
+        """Return the next key typed, waiting for a connection when there is none."""
+        while self._position == len(self._input):
+            if self.fd is None:
+                self.fd = self.connect()
+                if self.reset:
+                    time.sleep(RESET_DELAY)
+                    raise Reset
+            self.flush()
+            try:
+                self._input, self._position = os.read(self.fd, 4096), 0
+            except OSError:
+                self._input = b''
+            if not self._input:
+                self.hangup()
+        if self.char_time:
+            self._read_due = _pace(self._read_due, self.char_time)
+        self._position += 1
+        return self._input[self._position - 1]
+
+    def write(self, data):
+        if self.fd is None:
+            return
+        if not self.char_time:
+            self._output += data
+            return
+        for byte in data:
+            self._write_due = _pace(self._write_due, self.char_time)
+            self._output.append(byte)
+            self.flush()
+
+    def flush(self):
+        try:
+            while self._output and self.fd is not None:
+                del self._output[:os.write(self.fd, self._output)]
+        except OSError:
+            self.hangup()
+
+    def hangup(self):
+        self.disconnect()
+        self.fd = None
+        self._input, self._position = b'', 0
+        self._output.clear()
+
+
+class PtyLine(Line):
+    """A pseudo-terminal, its device, or a symbolic link *link* to it, opened as a serial device."""
+
+    def __init__(self, link=None, **kwargs):
+        super().__init__(**kwargs)
+        self.master, slave = os.openpty()
+        tty.setraw(slave)
+        self.name = os.ttyname(slave)
+        os.close(slave)
+        if link:
+            if os.path.islink(link):
+                os.unlink(link)
+            os.symlink(self.name, link)
+            self.name = link
+
+    def connect(self):
+        # the master hangs up for as long as the device is not open
+        poll = select.poll()
+        poll.register(self.master, 0)
+        while poll.poll(0):
+            time.sleep(0.1)
+        return self.master
+
+
+class SocketLine(Line):
+    """A TCP socket, opened as ``socket://host:port`` by pySerial."""
+
+    def __init__(self, port=0, host='localhost', **kwargs):
+        super().__init__(**kwargs)
+        self.server = socket.create_server((host, port))
+        self.name = 'socket://{}:{}'.format(*self.server.getsockname()[:2])
+        self.connection = None
+
+    def connect(self):
+        self.connection, _ = self.server.accept()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self.connection.fileno()
+
+    def disconnect(self):
+        self.connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--program', default='hamurabi-6502.bas',
+                        help='BASIC program run by Integer BASIC')
+    parser.add_argument('--image', default='apple1-HAMMURABI.TXT',
+                        help='WozMon script of the program, that must be stored for BASIC to run it')
+    device = parser.add_mutually_exclusive_group()
+    device.add_argument('--pty', metavar='LINK', nargs='?', const='',
+                        help='serve a pseudo-terminal, with a symbolic link LINK to it, the default')
+    device.add_argument('--tcp', metavar='PORT', type=int,
+                        help='serve a TCP socket at PORT, 0 for any free port')
+    parser.add_argument('--host', default='localhost',
+                        help='address of the TCP socket')
+    parser.add_argument('--baud', type=int,
+                        help='characters per second times ten, default is as fast as possible')
+    parser.add_argument('--no-reset', dest='reset', action='store_false',
+                        help='do not press reset when the device is opened')
+    parser.add_argument('--seed', type=int,
+                        help='random seed of RND')
+    args = parser.parse_args()
+
+    with open(args.program) as f:
+        source = f.read().splitlines()
+    with open(args.image) as f:
+        image, _ = wozmon.read_script(f.read().splitlines())
+    if args.tcp is not None:
+        line = SocketLine(args.tcp, args.host, baud=args.baud, reset=args.reset)
+    else:
+        line = PtyLine(args.pty, baud=args.baud, reset=args.reset)
+    print(f'Apple-1 at {line.name}', flush=True)
+    Apple1(source, image, random.Random(args.seed)).run(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@
    5 DIM O$(5): DIM H$(10):H$="0123456789"
   75 PRINT : PRINT 
   80 PRINT "TRY YOUR HAND AT GOVERNING ANCIENT"
-  82 PRINT "SUMERIA SUCCESSFULLY FORA 10-YEAR TERM"
+  82 PRINT "SUMERIA SUCCESSFULLY FOR A 10-YEAR TERM"
   85 PRINT "OF OFFICE."
   95 D1=1:P1=0
  100 Z=0:P=95:S=2800:H=3000:E=H-S
@@ -72,7 +72,7 @@
  560 PRINT : PRINT "YOU STARVED ";D;" PEOPLE IN ONE YEAR!!!"
  565 PRINT "DUE TO THIS EXTREME MISMANAGEMENT YOU": PRINT "HAVE NOT ONLY BEEN IMPEACHED AND THROWN"
  566 PRINT "OUT OF OFFICE BUT YOU HAVE ALSO BEEN"
- 567 PRINT "DECLARED 'NATIONAL FINK' !!!": GOTO 990
+ 567 PRINT "DECLARED 'NATIONAL FINK'!!!": GOTO 990
  710 PRINT : PRINT "HAMURABI: THINK AGAIN, YOU HAVE ONLY"
  711 PRINT S;" BUSHELS OF GRAIN. NOW THEN"
  712 RETURN 
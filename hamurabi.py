@@ -1,6 +1,7 @@
 """
 Hamurabi.py -- a modern python port of the BASIC game, Hamurabi!
 """
+import dataclasses
 import sys
 import random
 import textwrap
@@ -11,44 +12,223 @@ import textwrap
 # Converted to python 3 by Jeff Quast.
 #
 # 90 REM RANDOMIZE REMOVED
-def main():
-    # 80 PRINT "TRY YOUR HAND AT GOVERNING ANCIENT SUMERIA"
-    # 85 PRINT "SUCCESSFULLY FOR A 10-YR TERM OF OFFICE.":PRINT
+@dataclasses.dataclass(frozen=True, slots=True)
+class GameState:
+    """The city, as reported to the ruler at the beginning of a year."""
+    year: int
+    population: int
+    bushels: int
+    acres: int
+    harv_yield: int
+    eaten: int
+    infants: int
+    dead: int
+    plague: bool
+    land_value: int
+    pct_starve: float = 0
+    total_dead: int = 0
+    impeached: bool = False
+
+    @property
+    def finished(self):
+        return self.impeached or self.year == 10
+
+    @property
+    def wealth(self):
+        # 865 L=A/P
+        return self.acres // self.population
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Decision:
+    """The ruler's answers for one year."""
+    buy: int = 0
+    sell: int = 0
+    feed: int = 0
+    plant: int = 0
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Events:
+    """What became of the city during one year."""
+    harvested: int
+    eaten: int
+    infants: int
+    dead: int
+    plague: bool
+    impeached: bool
+
+
+def initial_state(rng=random):
     # 95 D1=0:P1=0
-    total_dead = 0
-    pct_starve = 0
-
     # 110 Z=0:P=95:S=2800:H=3000:E=H-S
-    population = 95  # population
-    bushels = 2800  # bushels in storage
-    harvested = 3000  #
-    eaten = harvested - bushels  # bushels eaten by rats
-
     # 120 Y=3:A=H/Y:I=5:Q=1
-    harv_yield = 3  # initial Harvested per acre
-    acres = harvested // harv_yield  # How many acres do we have?
-    infants = 5  # How many infants
-    plague_chance = 1
-
+    # 210 D=0
+    # 218 P=P+I
+    # 310 C=INT(10*RND(1)):Y=C+17
+    return GameState(year=1, population=95 + 5, bushels=2800, acres=3000 // 3,
+                     harv_yield=3, eaten=3000 - 2800, infants=5, dead=0,
+                     plague=False, land_value=int(10 * rng.random()) + 17)
+
+
+def check_decision(state, decision):
+    """Raise ValueError for any answer the game would not accept."""
+    if min(decision.buy, decision.sell, decision.feed, decision.plant) < 0:
+        # 850 PRINT:PRINT "HAMURABI:  I CANNOT DO WHAT YOU WISH."
+        raise ValueError(f'Negative amount in {decision}')
+    # 322 IF Y*Q<=S THEN 330
+    if state.land_value * decision.buy > state.bushels:
+        raise ValueError(f'Cannot buy {decision.buy} acres with {state.bushels} bushels')
+    # 330 IF Q=0 THEN 340
+    # 342 IF Q<A THEN 350
+    if decision.sell and (decision.buy or decision.sell >= state.acres):
+        raise ValueError(f'Cannot sell {decision.sell} of {state.acres} acres')
+    acres = state.acres + decision.buy - decision.sell
+    bushels = state.bushels + state.land_value * (decision.sell - decision.buy)
+    # 420 IF Q<=S THEN 430
+    if decision.feed > bushels:
+        raise ValueError(f'Cannot feed {decision.feed} of {bushels} bushels')
+    # 445 IF D<=A THEN 450
+    # 450 IF INT(D/2)<S THEN 455
+    # 455 IF D<10*P THEN 510
+    if (decision.plant > acres
+            or decision.plant // 2 > bushels - decision.feed
+            or decision.plant > 10 * state.population):
+        raise ValueError(f'Cannot plant {decision.plant} acres')
+
+
+def step(state, decision, rng=random):
+    """Play out one year of *decision*, without any input or output.
+
+    Returns the state reported at the beginning of the next year, and the
+    :class:`Events` of the year past.  The random numbers of the year are
+    drawn from *rng*, any object with a ``random()`` method, five of them in
+    every year but the last.
+    """
+    assert not state.finished, state
+    check_decision(state, decision)
+    year = state.year
+    population = state.population
+
+    # 331 A=A+Q:S=S-Y*Q:C=0
+    # 350 A=A-Q:S=S+Y*Q:C=0
+    acres = state.acres + decision.buy - decision.sell
+    bushels = state.bushels + state.land_value * (decision.sell - decision.buy)
+
+    # 430 S=S-Q:C=1:PRINT
+    # 510 S=S-INT(D/2)
+    bushels -= decision.feed
+    bushels -= (decision.plant // 2)
+
+    # 511 GOSUB 800
+    # 512 REM *** A BOUNTIFUL HARVEST!!
+    # 515 Y=C:H=D*Y:E=0
+    harv_yield = rand_gosub_800(rng)
+    harvested = decision.plant * harv_yield
+
+    # 521 GOSUB 800
+    # 522 IF INT(C/2)<>C/2 THEN 530
+    # 523 REM *** THE RATS ARE RUNNING WILD!!
+    # 525 E=INT(S/C)
+    eaten = 0
+    rat_chance = rand_gosub_800(rng)
+    if rat_chance % 2 == 0:
+        eaten = bushels // rat_chance
+    # 530 S=S-E+H
+    bushels = bushels - eaten + harvested
+
+    # 531 GOSUB 800
+    # 532 REM *** LET'S HAVE SOME BABIES
+    # 533 I=INT(C*(20*A+S)/P/100+1)
+    _randc = rand_gosub_800(rng)
+    infants = int(_randc * (20 * acres + bushels) / population / 100 + 1)
+
+    # 539 REM *** HOW MANY PEOPLE HAD FULL TUMMIES?
+    # 540 C=INT(Q/20)
+    full_tummies = decision.feed // 20
+
+    # 541 REM *** HORRORS, A 15% CHANCE OF PLAGUE
+    # 542 Q=INT(10*(2*RND(1)-.3))
+    plague_chance = int(10 * (2 * rng.random() - .3))
+
+    # 550 IF P<C THEN 210
     # 210 D=0
     dead = 0
+    impeached = False
+    pct_starve = state.pct_starve
+    total_dead = state.total_dead
+    if population >= full_tummies:
+        # 551 REM *** STARVE ENOUGH FOR IMPEACHMENT?
+        # 552 D=P-C:IF D>.45*P THEN 560
+        # 553 P1=((Z-1)*P1+D*100/P)/Z
+        # 555 P=C:D1=D1+D:GOTO 215
+        dead = population - full_tummies
+        impeached = dead > .45 * population
+        pct_starve = ((year - 1) * pct_starve + dead * 100 / population) / year
+        population = full_tummies
+        total_dead += dead
+
+    # 215 PRINT:PRINT:PRINT "HAMURABI:  I BEG TO REPORT TO YOU,":Z=Z+1
+    # 218 P=P+I
+    year += 1
+    if not impeached:
+        population = population + infants
 
-    for year in range(1, 11):
+    # 227 IF Q>0 THEN 230
+    # 228 P=INT(P/2)
+    plague = not impeached and plague_chance <= 0
+    if plague:
+        population = population // 2
+
+    # 270 IF Z=11 THEN 860
+    # 310 C=INT(10*RND(1)):Y=C+17
+    land_value = 0
+    if year < 10 and not impeached:
+        land_value = int(10 * rng.random()) + 17
+
+    events = Events(harvested=harvested, eaten=eaten, infants=infants,
+                    dead=dead, plague=plague, impeached=impeached)
+    return GameState(year=year, population=population, bushels=bushels,
+                     acres=acres, harv_yield=harv_yield, eaten=eaten,
+                     infants=infants, dead=dead, plague=plague,
+                     land_value=land_value, pct_starve=pct_starve,
+                     total_dead=total_dead, impeached=impeached), events
+
+
+def final_score(state):
+    """Rate a finished game, 0 (national fink) to 3 (fantastic)."""
+    if state.impeached:
+        return 0
+    # 880 IF P1>33 THEN 565
+    # 885 IF L<7 THEN 565
+    if state.pct_starve > 33 or state.wealth < 7:
+        return 0
+    # 890 IF P1>10 THEN 940
+    # 892 IF L<9 THEN 940
+    if state.pct_starve > 10 or state.wealth < 9:
+        return 1
+    # 895 IF P1>3 THEN 960
+    # 896 IF L<10 THEN 960
+    if state.pct_starve > 3 or state.wealth < 10:
+        return 2
+    return 3
+
+
+def main(rng=random):
+    # 80 PRINT "TRY YOUR HAND AT GOVERNING ANCIENT SUMERIA"
+    # 85 PRINT "SUCCESSFULLY FOR A 10-YR TERM OF OFFICE.":PRINT
+    state = initial_state(rng)
+
+    while True:
         # 215 PRINT:PRINT:PRINT "HAMURABI:  I BEG TO REPORT TO YOU,":Z=Z+1
         # 217 PRINT "IN YEAR"Z","D"PEOPLE STARVED,"I"CAME TO THE CITY."
         echo()
-        echo(f"Hamurabi: I beg to report to you,")
-        echo(f"In year {year}, {dead} people starved, "
-             f"{infants} came to the city.")
-
-        # 218 P=P+I
-        population = population + infants
+        echo("Hamurabi: I beg to report to you,")
+        echo(f"In year {state.year}, {state.dead} people starved, "
+             f"{state.infants} came to the city.")
 
-        # 227 IF Q>0 THEN 230
-        if plague_chance <= 0:
-            # 228 P=INT(P/2)
-            # 229 PRINT "A HORRIBLE PLAGUE STRUCK!  HALF THE PEOPLE DIED."
-            population = population // 2
+        # 229 PRINT "A HORRIBLE PLAGUE STRUCK!  HALF THE PEOPLE DIED."
+        if state.plague:
             echo("A horrible plague struck!! Half the people have perished.")
 
         # 230 PRINT "POPULATION IS NOW"P
@@ -56,126 +236,73 @@ def main():
         # 235 PRINT "YOU HARVESTED"Y"BUSHELS PER ACRE."
         # 250 PRINT "RATS ATE"E"BUSHELS."
         # 260 PRINT "YOU NOW HAVE"S"BUSHELS IN STORE.":PRINT
-        echo(f"Population is now {population}")
-        echo(f"The city now owns {acres} acres.")
-        echo(f"You harvested {harv_yield} bushels per acre.")
-        if eaten:
-            echo(f"Rats have eaten {eaten} bushels from storage!")
-        echo(f"You now have {bushels} bushels.\n")
+        echo(f"Population is now {state.population}")
+        echo(f"The city now owns {state.acres} acres.")
+        echo(f"You harvested {state.harv_yield} bushels per acre.")
+        if state.eaten:
+            echo(f"Rats have eaten {state.eaten} bushels from storage!")
+        echo(f"You now have {state.bushels} bushels.\n")
 
         # 270 IF Z=11 THEN 860
-        if year == 10:
+        if state.year == 10:
             break
 
-        # 310 C=INT(10*RND(1)):Y=C+17
-        land_value = int(10 * random.random()) + 17
-
         # 312 PRINT "LAND IS TRADING AT"Y"BUSHELS PER ACRE."
-        echo(f"Land is trading at {land_value} bushels per acre.")
+        echo(f"Land is trading at {state.land_value} bushels per acre.")
         echo()
 
+        acres, bushels = state.acres, state.bushels
         # 320 PRINT "HOW MANY ACRES DO YOU WISH TO BUY";
-        buy_land = buy_acres_320(land_value, bushels)
+        buy_land = buy_acres_320(state.land_value, bushels)
+        sell_land = 0
 
         # 330 IF Q=0 THEN 340
         if buy_land == 0:
             # 340 PRINT "HOW MANY ACRES DO YOU WISH TO SELL";
             sell_land = sell_acres_340(acres)
-            if sell_land > 0:
-                # 350 A=A-Q:S=S+Y*Q:C=0
-                acres = acres - sell_land
-                bushels += land_value * sell_land
-        else:
-            # 331 A=A+Q:S=S-Y*Q:C=0
-            acres = acres + buy_land
-            bushels -= land_value * buy_land
+        acres = acres + buy_land - sell_land
+        bushels += state.land_value * (sell_land - buy_land)
 
         # 410 PRINT "HOW MANY BUSHELS DO YOU WISH TO FEED YOUR PEOPLE";
-        # 430 S=S-Q:C=1:PRINT
         people_food = feed_people_400(bushels)
         bushels -= people_food
 
         # 440 PRINT "HOW MANY ACRES DO YOU WISH TO PLANT WITH SEED";
-        # 510 S=S-INT(D/2)
-        planted = plant_seeds_440(acres, population, bushels)
-        bushels -= (planted // 2)
-
-        # 511 GOSUB 800
-        # 512 REM *** A BOUNTIFUL HARVEST!!
-        # 515 Y=C:H=D*Y:E=0
-        harv_yield = rand_gosub_800()
-        harvested = planted * harv_yield
-
-        # 521 GOSUB 800
-        # 522 IF INT(C/2)<>C/2 THEN 530
-        # 523 REM *** THE RATS ARE RUNNING WILD!!
-        # 525 E=INT(S/C)
-        eaten = 0
-        rat_chance = rand_gosub_800()
-        if rat_chance % 2 == 0:
-            eaten = bushels // rat_chance
-        # 530 S=S-E+H
-        bushels = bushels - eaten + harvested
-
-        # 531 GOSUB 800
-        # 532 REM *** LET'S HAVE SOME BABIES
-        # 533 I=INT(C*(20*A+S)/P/100+1)
-        _randc = rand_gosub_800()
-        infants = int(_randc * (20 * acres + bushels) / population / 100 + 1)
-
-        # 539 REM *** HOW MANY PEOPLE HAD FULL TUMMIES?
-        # 540 C=INT(Q/20)
-        full_tummies = people_food // 20
-
-        # 541 REM *** HORRORS, A 15% CHANCE OF PLAGUE
-        # 542 Q=INT(10*(2*RND(1)-.3))
-        plague_chance = int(10 * (2 * random.random() - .3))
-
-        # 550 IF P<C THEN 210
-        if population < full_tummies:
-            continue
+        planted = plant_seeds_440(acres, state.population, bushels)
 
-        # 551 REM *** STARVE ENOUGH FOR IMPEACHMENT?
-        # 552 D=P-C:IF D>.45*P THEN 560
-        # 553 P1=((Z-1)*P1+D*100/P)/Z
-        # 555 P=C:D1=D1+D:GOTO 215
-        dead = population - full_tummies
-        if dead > .45 * population:
+        state, events = step(state, Decision(buy=buy_land, sell=sell_land,
+                                             feed=people_food, plant=planted), rng)
+        if events.impeached:
             # 560 PRINT:PRINT "YOU STARVED"D"PEOPLE IN ONE YEAR!!!"
             echo()
-            echo(f"You starved {dead} people in one year!!!")
+            echo(f"You starved {events.dead} people in one year!!!")
             declare_national_fink_565()
-        pct_starve = ((year - 1) * pct_starve + dead * 100 / population) / year
-        population = full_tummies
-        total_dead += dead
 
     # 860 PRINT "IN YOUR 10-YEAR TERM OF OFFICE,"P1"PERCENT OF THE"
     # 862 PRINT "POPULATION STARVED PER YEAR ON AVERAGE, I.E., A TOTAL OF"
     # 865 PRINT D1"PEOPLE DIED!!":L=A/P
     maybe_died = "and nobody died of starvation!!"
-    if total_dead:
-        maybe_died = f"{total_dead} people DIED of starvation!!"
-    echo(f"In your 10-year term of office, {pct_starve:2.2f}% of the "
+    if state.total_dead:
+        maybe_died = f"{state.total_dead} people DIED of starvation!!"
+    echo(f"In your 10-year term of office, {state.pct_starve:2.2f}% of the "
          f"population starved, in other words, {maybe_died}")
-    wealth = acres // population
+    wealth = state.wealth
+    population = state.population
     # 870 PRINT "YOU STARTED WITH 10 ACRES PER PERSON AND ENDED WITH"
     # 875 PRINT L"ACRES PER PERSON.":PRINT
-    echo("You started with 10 acres per person, and ended with {wealth}.")
+    echo(f"You started with 10 acres per person, and ended with {wealth} acres per person.")
 
-    # 880 IF P1>33 THEN 565
-    # 885 IF L<7 THEN 565
-    if pct_starve > 33 or wealth < 7:
+    score = final_score(state)
+    if score == 0:
         declare_national_fink_565()
-    # 890 IF P1>10 THEN 940
-    # 892 IF L<9 THEN 940
-    elif pct_starve > 10 or wealth < 9:
+    elif score == 1:
         # 940 PRINT "YOUR HEAVY-HANDED PERFORMANCE SMACKS OF NERO AND IVAN IV."
         # 945 PRINT "THE PEOPLE (REMAINING) FIND YOU AN UNPLEASANT RULER, AND,"
         # 950 PRINT "FRANKLY, HATE YOUR GUTS!":GOTO 990
         echo("Your heavy-handed performance smacks of Nero and Ivan IV. "
              "The people (remaining) find you an unpleasant ruler, and, "
              "frankly, hate your guts!")
-    elif pct_starve > 3 or wealth < 10:
+    elif score == 2:
         # 960 PRINT "YOUR PERFORMANCE COULD HAVE BEEN SOMEWHAT BETTER, BUT"
         # 965 PRINT "REALLY WASN'T TOO BAD AT ALL. ";
         # 966 PRINT INT(P*.8*RND(1));"PEOPLE WOULD"
@@ -183,7 +310,7 @@ def main():
         # 975 PRINT "TRIVIAL PROBLEMS."
         echo("Your performance could have been somewhat better, "
              "but really wasn't too bad at all. "
-             "{int(population * .8 * random.random())} people "
+             f"{int(population * .8 * rng.random())} people "
              "would dearly like to see you assassinated, but we "
              "all have our trivial problems.")
     else:
@@ -295,10 +422,119 @@ def think_again_only_acres_720(acres):
     echo(f'Hamurabi: Think again. You only have {acres} Acres. Now then,')
 
 
-def rand_gosub_800():
+# Random numbers
+#
+# Every RND(1) of the game is a call to the ``random()`` method of an *rng*
+# object, by default the :mod:`random` module itself.  Any other source with
+# that method may be passed to main(), initial_state() and step(), such as a
+# :class:`random.Random` for each game, or one of the classes below.
+
+class RecordingRng:
+    """Record every number drawn from *rng*, so that a game may be replayed."""
+
+    def __init__(self, rng=random):
+        self.rng = rng
+        self.tape = []
+
+    def random(self):
+        value = self.rng.random()
+        self.tape.append(value)
+        return value
+
+
+class ReplayRng:
+    """Draw numbers from a *tape* recorded earlier, in order."""
+
+    def __init__(self, tape):
+        self.tape = tape
+        self.position = 0
+
+    def random(self):
+        if self.position >= len(self.tape):
+            raise IndexError(f'Random tape exhausted after {self.position} numbers')
+        value = float(self.tape[self.position])
+        self.position += 1
+        return value
+
+
+class BasicRnd:
+    """RND(1) of the 6502 Microsoft BASIC this game was written for.
+
+    With RANDOMIZE removed (line 90), every run of the original draws the
+    same sequence from the power-on seed: it is multiplied by 11879546,
+    3.927677739E-8 is added, and the four bytes of the mantissa are then
+    reversed.  Arithmetic is carried out as the interpreter does, in five
+    byte floating point, a 32-bit mantissa with one extension byte.
+    """
+    SEED = bytes((0x80, 0x4F, 0xC7, 0x52, 0x58))
+    CONRND1 = bytes((0x98, 0x35, 0x44, 0x7A, 0x00))
+    CONRND2 = bytes((0x68, 0x28, 0xB1, 0x46, 0x00))
+
+    def __init__(self, seed=SEED):
+        self.seed = bytes(seed)
+
+    @staticmethod
+    def _unpack(packed):
+        # exponent, and mantissa with its implied high bit and extension byte
+        return packed[0], (int.from_bytes(packed[1:5], 'big') | 0x80000000) << 8
+
+    @staticmethod
+    def _normalize(exponent, mantissa):
+        if mantissa == 0:
+            return 0, 0
+        while not mantissa & (1 << 39):
+            mantissa <<= 1
+            exponent -= 1
+        return exponent, mantissa
+
+    @classmethod
+    def _fmult(cls, fac, arg):
+        # shift-and-add, one bit of the multiplier at a time, into 40 bits,
+        # bits shifted out of the extension byte are lost.
+        (fac_exponent, multiplier), (arg_exponent, multiplicand) = fac, arg
+        multiplicand >>= 8
+        result = 0
+        for bit in range(40):
+            carry = 0
+            if (multiplier >> bit) & 1:
+                total = (result >> 8) + multiplicand
+                carry = total >> 32
+                result = ((total & 0xFFFFFFFF) << 8) | (result & 0xFF)
+            result = (carry << 39) | (result >> 1)
+        return cls._normalize(fac_exponent + arg_exponent - 128, result)
+
+    @staticmethod
+    def _fadd(fac, arg):
+        (exponent, mantissa), (arg_exponent, arg_mantissa) = sorted((fac, arg), reverse=True)
+        total = mantissa + (arg_mantissa >> (exponent - arg_exponent))
+        if total >> 40:
+            total >>= 1
+            exponent += 1
+        return exponent, total
+
+    def random(self):
+        exponent, mantissa = self._fadd(self._fmult(self._unpack(self.seed),
+                                                    self._unpack(self.CONRND1)),
+                                        self._unpack(self.CONRND2))
+        # reverse the mantissa bytes, the old exponent is the new extension
+        reversed_bytes = (mantissa >> 8).to_bytes(4, 'big')[::-1]
+        exponent, mantissa = self._normalize(
+            0x80, (int.from_bytes(reversed_bytes, 'big') << 8) | exponent)
+        # round by the extension byte, as the seed is stored
+        if mantissa & 0x80:
+            mantissa += 0x100
+            if mantissa >> 40:
+                mantissa >>= 1
+                exponent += 1
+        mantissa >>= 8
+        self.seed = bytes((exponent, (mantissa >> 24) & 0x7F)) + (mantissa & 0xFFFFFF).to_bytes(3, 'big')
+        return mantissa / 2 ** 32 * 2.0 ** (exponent - 128)
+
+
+def rand_gosub_800(rng=random):
     # 800 C=INT(RND(1)*5)+1
     # 801 RETURN
-    return int(random.random() * 5) + 1
+    return int(rng.random() * 5) + 1
 
 
 def input_numeric(message, default=0):
@@ -335,4 +571,4 @@ def echo(text='', **kwargs):
 
 
 if __name__ == '__main__':
-    main()
+    main(BasicRnd() if '--basic-rnd' in sys.argv else random)
@@ -0,0 +1,249 @@
+"""
+Hamurabi batch -- a headless, vectorized simulator of the hamurabi.py rules.
+
+Every game is one row of a set of numpy arrays, and every year of every game
+is played at once.  A *policy* decides each year's buy, sell, feed and plant
+amounts for all games together, so that a strategy may be scored over a
+million seeds in seconds::
+
+    result = simulate(steady_policy, games=1_000_000, seed=1)
+    print(result.score_counts())
+"""
+import dataclasses
+import sys
+
+# 3rd
+import numpy
+
+
+@dataclasses.dataclass
+class BatchState:
+    """Report shown to the ruler at the beginning of a year, one row per game."""
+    year: int
+    population: numpy.ndarray
+    bushels: numpy.ndarray
+    acres: numpy.ndarray
+    harv_yield: numpy.ndarray
+    eaten: numpy.ndarray
+    infants: numpy.ndarray
+    dead: numpy.ndarray
+    land_value: numpy.ndarray
+    active: numpy.ndarray
+
+
+@dataclasses.dataclass
+class BatchResult:
+    """Outcome of every game, one row per game, as it was in the year of
+    its loss for a game lost by starvation."""
+    score: numpy.ndarray
+    last_year: numpy.ndarray
+    population: numpy.ndarray
+    bushels: numpy.ndarray
+    acres: numpy.ndarray
+    pct_starve: numpy.ndarray
+    total_dead: numpy.ndarray
+
+    def score_counts(self):
+        """Return the number of games ending with each score, 0 (fink) to 3."""
+        return numpy.bincount(self.score, minlength=4)
+
+
+def steady_policy(state):
+    """Feed everyone, plant every acre that can be tended, never trade land."""
+    zero = numpy.zeros_like(state.population)
+    feed = numpy.minimum(state.population * 20, state.bushels)
+    plant = numpy.minimum(state.acres, state.population * 10)
+    plant = numpy.minimum(plant, (state.bushels - feed) * 2)
+    return zero, zero, feed, plant
+
+
+def legal_decision(state, buy, sell, feed, plant):
+    """Clip a policy's decision to amounts the game would accept.
+
+    The interactive game asks again when an answer cannot be carried out,
+    there is no one to ask here, so each amount is reduced to the nearest one
+    the checks of lines 322, 342, 420 and 445-455 accept.  As with line 330,
+    land is only sold when none is bought.
+    """
+    buy = numpy.clip(buy, 0, state.bushels // state.land_value)
+    sell = numpy.where(buy == 0, numpy.clip(sell, 0, numpy.maximum(state.acres - 1, 0)), 0)
+    acres = state.acres + buy - sell
+    bushels = state.bushels - state.land_value * buy + state.land_value * sell
+    feed = numpy.clip(feed, 0, bushels)
+    plant = numpy.clip(plant, 0, numpy.minimum(acres, state.population * 10))
+    plant = numpy.minimum(plant, (bushels - feed) * 2 + 1)
+    return buy, sell, feed, plant
+
+
+# RND(1) is called five times in each of the nine years with a decision.
+YEAR_DRAWS = 5
+TAPE_LENGTH = 9 * YEAR_DRAWS
+
+
+def draw_tapes(rng, games):
+    """Draw the random tape of each of *games* games at once, one per row.
+
+    Any row may be replayed by :func:`hamurabi.step` through a
+    :class:`hamurabi.ReplayRng`, to reproduce that game exactly.
+    """
+    return rng.random((games, TAPE_LENGTH))
+
+
+def game_tape(seed, game):
+    """Return the tape of game number *game* of ``simulate(seed=seed)``."""
+    bit_generator = numpy.random.PCG64(seed)
+    bit_generator.advance(game * TAPE_LENGTH)
+    return numpy.random.Generator(bit_generator).random(TAPE_LENGTH)
+
+
+def simulate(policy, games, seed=None, rng=None, tapes=None, chunk_size=100_000):
+    """Play *games* games of Hamurabi, each year decided by *policy*.
+
+    :param policy: Callable receiving a :class:`BatchState` and returning four
+        integer arrays of acres to buy, acres to sell, bushels to feed, and
+        acres to plant, for every game.  Rows of games already lost are
+        ignored.
+    :param int games: Number of games to play.
+    :param seed: Seed of :func:`numpy.random.default_rng`, when neither *rng*
+        nor *tapes* is given.
+    :param rng: A :class:`numpy.random.Generator` to draw tapes from.
+    :param tapes: Array of random tapes recorded earlier, one row of
+        ``TAPE_LENGTH`` numbers for each game.
+    :param int chunk_size: Number of games played at once, tapes are drawn
+        for one chunk at a time to bound memory.
+    :rtype: BatchResult
+    """
+    if tapes is None and rng is None:
+        rng = numpy.random.default_rng(seed)
+    results = []
+    for start in range(0, games, chunk_size):
+        size = min(chunk_size, games - start)
+        chunk = draw_tapes(rng, size) if tapes is None else tapes[start:start + size]
+        results.append(_simulate_tapes(policy, chunk))
+    return BatchResult(*(numpy.concatenate(values) for values in zip(
+        *(dataclasses.astuple(result) for result in results))))
+
+
+def _simulate_tapes(policy, tapes):
+    games = len(tapes)
+    dtype = numpy.int64
+
+    def full(value):
+        return numpy.full(games, value, dtype=dtype)
+
+    # 110 Z=0:P=95:S=2800:H=3000:E=H-S
+    # 120 Y=3:A=H/Y:I=5:Q=1
+    population = full(95)
+    bushels = full(2800)
+    eaten = full(3000 - 2800)
+    harv_yield = full(3)
+    acres = full(3000 // 3)
+    infants = full(5)
+    plague_chance = full(1)
+    dead = full(0)
+    total_dead = full(0)
+    pct_starve = numpy.zeros(games)
+    active = numpy.ones(games, dtype=bool)
+    last_year = full(10)
+
+    for year in range(1, 11):
+        # games lost keep the state of the year of their loss, as reported by
+        # 560 PRINT:PRINT "YOU STARVED"D"PEOPLE IN ONE YEAR!!!"
+        # 218 P=P+I
+        population = numpy.where(active, population + infants, population)
+
+        # 227 IF Q>0 THEN 230
+        # 228 P=INT(P/2)
+        population = numpy.where(active & (plague_chance <= 0), population // 2, population)
+
+        # 270 IF Z=11 THEN 860
+        if year == 10:
+            break
+
+        # one column for each call of RND(1) made during the year
+        draws = tapes[:, (year - 1) * YEAR_DRAWS:year * YEAR_DRAWS]
+
+        # 310 C=INT(10*RND(1)):Y=C+17
+        land_value = (10 * draws[:, 0]).astype(dtype) + 17
+
+        state = BatchState(year=year, population=population, bushels=bushels,
+                           acres=acres, harv_yield=harv_yield, eaten=eaten,
+                           infants=infants, dead=dead, land_value=land_value,
+                           active=active)
+        buy, sell, feed, plant = (numpy.where(active, value, 0) for value in legal_decision(
+            state, *(numpy.asarray(value, dtype=dtype) for value in policy(state))))
+
+        # 331 A=A+Q:S=S-Y*Q:C=0
+        # 350 A=A-Q:S=S+Y*Q:C=0
+        acres = acres + buy - sell
+        bushels = bushels - land_value * buy + land_value * sell
+
+        # 430 S=S-Q:C=1:PRINT
+        # 510 S=S-INT(D/2)
+        bushels = bushels - feed - plant // 2
+
+        # 800 C=INT(RND(1)*5)+1
+        harv_c, rat_c, baby_c = ((draws[:, 1:4] * 5).astype(dtype) + 1).T
+
+        # 515 Y=C:H=D*Y:E=0
+        harv_yield = harv_c
+        harvested = plant * harv_yield
+
+        # 522 IF INT(C/2)<>C/2 THEN 530
+        # 525 E=INT(S/C)
+        eaten = numpy.where(active & (rat_c % 2 == 0), bushels // rat_c, 0)
+
+        # 530 S=S-E+H
+        bushels = bushels - eaten + harvested
+
+        # 533 I=INT(C*(20*A+S)/P/100+1)
+        infants = (baby_c * (20 * acres + bushels)
+                   / numpy.maximum(population, 1) / 100 + 1).astype(dtype)
+
+        # 540 C=INT(Q/20)
+        full_tummies = feed // 20
+
+        # 542 Q=INT(10*(2*RND(1)-.3))
+        plague_chance = (10 * (2 * draws[:, 4] - .3)).astype(dtype)
+
+        # 550 IF P<C THEN 210
+        # 552 D=P-C:IF D>.45*P THEN 560
+        # 553 P1=((Z-1)*P1+D*100/P)/Z
+        # 555 P=C:D1=D1+D:GOTO 215
+        starving = active & (population >= full_tummies)
+        dead = numpy.where(starving, population - full_tummies, 0)
+        impeached = dead > .45 * population
+        last_year = numpy.where(impeached, year, last_year)
+        active = active & ~impeached
+        pct_starve = numpy.where(
+            starving,
+            ((year - 1) * pct_starve + dead * 100 / numpy.maximum(population, 1)) / year,
+            pct_starve)
+        population = numpy.where(starving, full_tummies, population)
+        total_dead = total_dead + dead
+
+    # 865 L=A/P
+    # 880 IF P1>33 THEN 565
+    # 885 IF L<7 THEN 565
+    # 890 IF P1>10 THEN 940
+    # 892 IF L<9 THEN 940
+    # 895 IF P1>3 THEN 960
+    # 896 IF L<10 THEN 960
+    wealth = acres // numpy.maximum(population, 1)
+    score = numpy.select(
+        [pct_starve > 33, wealth < 7, pct_starve > 10, wealth < 9, pct_starve > 3, wealth < 10],
+        [0, 0, 1, 1, 2, 2], default=3)
+    score = numpy.where(active, score, 0)
+    return BatchResult(score=score, last_year=last_year, population=population,
+                       bushels=bushels, acres=acres, pct_starve=pct_starve,
+                       total_dead=total_dead)
+
+
+def main(games=1_000_000, seed=None):
+    result = simulate(steady_policy, games=games, seed=seed)
+    for score, count in zip(('fink', 'nero', 'not too bad', 'fantastic'), result.score_counts()):
+        print(f'{score:>12}: {count:,} ({count / games * 100:2.1f}%)')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
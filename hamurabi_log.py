@@ -0,0 +1,280 @@
+"""
+Hamurabi log -- an append-only binary store of game records.
+
+Each game written by ``save_game_log`` is one fixed-width record of numpy
+dtype :data:`DTYPE`, following a small header naming the fields and their
+types, so that millions of games are read by memory map without parsing::
+
+    log = GameLog('tournament_log.hamlog')
+    log.import_csv('game_log.csv')
+    print(log.counts(by='final_score', since='2024-03-01'))
+    print(log.means('total_starved', by='last_turn', final_score=0))
+
+Every turn of the games played by ``play_game`` is streamed to a trace log
+of :data:`TRACE_DTYPE` by a :class:`TraceWriter`, read by the same class.
+"""
+import csv
+import json
+import os
+import struct
+import sys
+import time
+
+# 3rd
+import numpy
+
+MAGIC = b'HAMLOG\x00\x01'
+SUFFIX = '.hamlog'
+
+# fields of save_game_log, in its order
+DTYPE = numpy.dtype([
+    ('datetime', '<M8[us]'),
+    ('final_score', 'i1'),
+    ('wealth', '<f8'),
+    ('pct_starved', '<i2'),
+    ('population', '<i4'),
+    ('bushels', '<i4'),
+    ('acres', '<i4'),
+    ('last_turn', 'i1'),
+    ('total_deaths', '<i4'),
+    ('total_harvested', '<i4'),
+    ('total_rats_eaten', '<i4'),
+    ('total_starved', '<i4'),
+    ('total_infants', '<i4'),
+    ('total_lost_to_plague', '<i4'),
+    ('total_land_purchases', '<i4'),
+    ('total_land_sales', '<i4'),
+])
+
+# events of a trace, reports of the Apple-1, and the decisions answering them
+REPORT, DECISION, STARVED_OUT = 0, 1, 2
+TRACE_DTYPE = numpy.dtype([
+    ('game', '<M8[us]'),
+    ('event', 'i1'),
+    ('year', 'i1'),
+    ('starved', '<i4'),
+    ('infants', '<i4'),
+    ('plague', 'i1'),
+    ('population', '<i4'),
+    ('acres', '<i4'),
+    ('harvested', 'i1'),
+    ('rats_eaten', '<i4'),
+    ('bushels', '<i4'),
+    ('land_value', 'i1'),
+    ('buy', '<i4'),
+    ('sell', '<i4'),
+    ('feed', '<i4'),
+    ('plant', '<i4'),
+])
+
+
+def missing(field):
+    """Return the value stored for a *field* missing from a game record."""
+    if field.kind == 'f':
+        return numpy.nan
+    if field.kind == 'M':
+        return numpy.datetime64('NaT')
+    return -1
+
+
+def to_records(game_records, dtype=DTYPE):
+    """Return an array of *dtype* of *game_records*, dicts as written by
+    ``save_game_log`` or read from its CSV log.
+
+    Fields missing or empty are stored as :func:`missing`.
+    """
+    records = numpy.empty(len(game_records), dtype=dtype)
+    for name, (field, _) in dtype.fields.items():
+        column = [game_record.get(name) for game_record in game_records]
+        column = [missing(field) if value in (None, '') else value for value in column]
+        if field.kind == 'M':
+            records[name] = numpy.array(column, dtype=field)
+        else:
+            # numbers, or their CSV text
+            records[name] = numpy.array(column).astype(numpy.float64).astype(field)
+    return records
+
+
+def read_csv(csv_filename, chunk_size=100_000, dtype=DTYPE):
+    """Yield the games of the CSV log *csv_filename*, arrays of *chunk_size*
+    records of *dtype* at a time."""
+    with open(csv_filename, newline='') as f:
+        reader = csv.DictReader(f)
+        while True:
+            chunk = [row for _, row in zip(range(chunk_size), reader)]
+            if not chunk:
+                return
+            yield to_records(chunk, dtype)
+
+
+def read_chunks(filename, chunk_size=100_000):
+    """Yield the games of a CSV or binary game log, *chunk_size* at a time."""
+    if filename.endswith(SUFFIX):
+        return GameLog(filename).chunks(chunk_size)
+    return read_csv(filename, chunk_size)
+
+
+def _header(dtype):
+    schema = json.dumps({'fields': dtype.descr}).encode()
+    # records begin at a multiple of 8 bytes
+    size = -(-(len(MAGIC) + 4 + len(schema)) // 8) * 8
+    return (MAGIC + struct.pack('<I', size) + schema).ljust(size, b' ')
+
+
+def _read_header(f):
+    magic, (size,) = f.read(len(MAGIC)), struct.unpack('<I', f.read(4))
+    if magic != MAGIC:
+        raise ValueError(f'{f.name} is not a hamurabi log')
+    schema = json.loads(f.read(size - len(MAGIC) - 4))
+    return numpy.dtype([tuple(field) for field in schema['fields']]), size
+
+
+def _open_append(filename, dtype, buffering=-1):
+    """Open *filename* to append records of *dtype*, after its header."""
+    f = open(filename, 'ab', buffering=buffering)
+    if f.tell() == 0:
+        f.write(_header(dtype))
+        return f
+    with open(filename, 'rb') as existing:
+        existing_dtype, offset = _read_header(existing)
+    if existing_dtype != dtype:
+        f.close()
+        raise ValueError(f'{filename} has fields {existing_dtype.descr}, not {dtype.descr}')
+    # a record cut short by a crash is overwritten
+    f.truncate(offset + (f.tell() - offset) // dtype.itemsize * dtype.itemsize)
+    f.seek(0, 2)
+    return f
+
+
+class GameLog:
+    """A file of game records, appended to and read by memory map.
+
+    :param str filename: Log file, created on the first :meth:`append`.
+    :param dtype: Fields of the records appended.
+    """
+
+    def __init__(self, filename, dtype=DTYPE):
+        self.filename = filename
+        self.dtype = dtype
+
+    def records(self):
+        """Return all records, a read-only array of :data:`DTYPE`."""
+        try:
+            with open(self.filename, 'rb') as f:
+                dtype, offset = _read_header(f)
+                count = (f.seek(0, 2) - offset) // dtype.itemsize
+        except FileNotFoundError:
+            return numpy.empty(0, dtype=self.dtype)
+        if count == 0:
+            return numpy.empty(0, dtype=dtype)
+        return numpy.memmap(self.filename, dtype=dtype, mode='r', offset=offset, shape=(count,))
+
+    def __len__(self):
+        return len(self.records())
+
+    def append(self, *game_records):
+        """Append *game_records*, dicts as written by ``save_game_log``."""
+        records = to_records(game_records, self.dtype)
+        with _open_append(self.filename, self.dtype) as f:
+            f.write(records.tobytes())
+
+    def import_csv(self, csv_filename, chunk_size=100_000):
+        """Append the games of the CSV log *csv_filename*, returns their number."""
+        count = 0
+        with _open_append(self.filename, self.dtype) as f:
+            for records in read_csv(csv_filename, chunk_size, self.dtype):
+                f.write(records.tobytes())
+                count += len(records)
+        return count
+
+    def chunks(self, chunk_size=100_000):
+        """Yield all records, *chunk_size* at a time."""
+        records = self.records()
+        for start in range(0, len(records), chunk_size):
+            yield records[start:start + chunk_size]
+
+    def query(self, **filters):
+        """Return the records matching every filter given.
+
+        :param final_score: A score, 0 to 3, or a list of scores.
+        :param last_turn: A year, or a list of years.
+        :param since: First date and time of the games, a ``datetime`` or an
+            ISO 8601 string such as ``'2024-03-09'``.
+        :param until: Date and time the games were played before.
+        """
+        records = self.records()
+        return records[_mask(records, **filters)]
+
+    def counts(self, by='final_score', **filters):
+        """Return the number of games of each value of field *by*."""
+        records = self.records()
+        values, counts = numpy.unique(records[by][_mask(records, **filters)], return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+    def means(self, field, by='final_score', **filters):
+        """Return the mean of *field* over the games of each value of field *by*."""
+        records = self.records()
+        mask = _mask(records, **filters)
+        values, groups = numpy.unique(records[by][mask], return_inverse=True)
+        sums = numpy.bincount(groups, weights=records[field][mask].astype(numpy.float64))
+        return dict(zip(values.tolist(), (sums / numpy.bincount(groups)).tolist()))
+
+
+class TraceWriter(GameLog):
+    """Streams the turns of games to a trace log of :data:`TRACE_DTYPE`.
+
+    Records are buffered, and flushed and synced to disk at most every
+    *fsync_interval* seconds, so a crash loses no more than that.
+    """
+
+    def __init__(self, filename, fsync_interval=5.0, buffering=64 * 1024):
+        super().__init__(filename, TRACE_DTYPE)
+        self.fsync_interval = fsync_interval
+        self._file = _open_append(filename, TRACE_DTYPE, buffering)
+        self._synced = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, **event):
+        """Write one event, a report, decision or loss of :data:`TRACE_DTYPE`."""
+        self._file.write(to_records([event], TRACE_DTYPE).tobytes())
+        if time.monotonic() - self._synced >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._synced = time.monotonic()
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+
+def _mask(records, final_score=None, last_turn=None, since=None, until=None):
+    # only the fields filtered are read, the rows are copied once by the caller
+    mask = numpy.ones(len(records), dtype=bool)
+    for name, value in (('final_score', final_score), ('last_turn', last_turn)):
+        if value is not None:
+            mask &= numpy.isin(records[name], value)
+    if since is not None:
+        mask &= records['datetime'] >= numpy.datetime64(since, 'us')
+    if until is not None:
+        mask &= records['datetime'] < numpy.datetime64(until, 'us')
+    return mask
+
+
+def main(csv_filename, filename):
+    log = GameLog(filename)
+    count = log.import_csv(csv_filename)
+    print(f'{count:,} games of {csv_filename} imported into {filename}')
+    for score, count in log.counts().items():
+        print(f'{score:>5}: {count:,}')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
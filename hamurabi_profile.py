@@ -0,0 +1,281 @@
+"""
+Hamurabi profile -- throughput and latency of the serial link to the Apple-1.
+
+A :class:`Profiler` wraps the serial device and the :mod:`streamexpect`
+expecter of ``play-hamurabi-vs-apple-1.py``, timing every read, write and
+wait for a match, every answer typed after a prompt, every ``print_window``
+and the loading of the code::
+
+    python play-hamurabi-vs-apple-1.py --device socket://localhost:6502 --profile profile.json
+
+The profile is written in the JSON trace event format, opened as a timeline
+or flame graph by https://ui.perfetto.dev or https://www.speedscope.app,
+along with a histogram of each phase, printed by::
+
+    python hamurabi_profile.py profile.json
+"""
+import argparse
+import array
+import collections
+import contextlib
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+# 3rd
+import numpy
+import tabulate
+
+# upper edges of the duration bins of every histogram, in seconds, the last holding any more
+DURATION_BINS = (1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1, 10, math.inf)
+PERCENTILES = (50, 90, 99)
+# about 30MB of JSON, as much as the trace viewers open readily
+MAX_EVENTS = 200_000
+
+
+class Profiler:
+    """Timings of the serial link, as trace events and a histogram of each phase.
+
+    Only the last *max_events* trace events are kept, the histograms count every
+    event of the session.
+
+    :param int max_events: Number of trace events kept.
+    """
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self.events = collections.deque(maxlen=max_events)
+        # durations of each phase, in seconds, and bytes per second of each throughput
+        self.durations = collections.defaultdict(lambda: array.array('d'))
+        self.rates = collections.defaultdict(lambda: array.array('d'))
+        self._origin = time.perf_counter()
+        # name and time of the last match, until the answer to it is written
+        self._prompt = None
+        # bytes written in each second of every throughput measured
+        self._throughput = {}
+
+    def record(self, name, category, start, end, **args):
+        """Record the phase *name* of *category* from *start* to *end*, of :func:`time.perf_counter`."""
+        self.durations[name].append(end - start)
+        self.events.append((name, category, start, end - start, threading.get_ident(), args))
+
+    @contextlib.contextmanager
+    def span(self, name, category='span'):
+        """Record the phase *name* over the body of a ``with`` statement."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, time.perf_counter())
+
+    def timed(self, name, fn):
+        """Return *fn*, recording each call as the phase *name*."""
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.span(name, 'call'):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    @contextlib.contextmanager
+    def throughput(self, name):
+        """Record the phase *name* over the body of a ``with`` statement,
+        and the bytes written in each second of it, as the rates of *name*."""
+        start = time.perf_counter()
+        seconds = collections.Counter()
+        self._prompt = None
+        self._throughput[name] = start, seconds
+        try:
+            with self.span(name):
+                yield
+        finally:
+            del self._throughput[name]
+            elapsed = time.perf_counter() - start
+            if elapsed >= 1:
+                # whole seconds only, the bytes of the last one partly elapsed are not counted
+                self.rates[name].extend(seconds[second] for second in range(int(elapsed)))
+            elif elapsed:
+                self.rates[name].append(seconds[0] / elapsed)
+
+    def serial(self, ser):
+        """Return *ser*, timing each read and write."""
+        return ProfiledSerial(ser, self)
+
+    def expecter(self, stream, names=None):
+        """Return the expecter *stream*, timing each wait for a match.
+
+        :param dict names: Names of the patterns and searchers waited for, by
+            their :func:`id`, such as ``MATCH_TURN_SELL``, any other is named
+            by its repr.
+        """
+        return ProfiledExpecter(stream, self, names or {})
+
+    def _wrote(self, start, end, length):
+        self.record('write', 'serial', start, end, bytes=length)
+        for started, seconds in self._throughput.values():
+            seconds[int(end - started)] += length
+        if self._prompt is not None:
+            name, matched = self._prompt
+            self._prompt = None
+            self.record(f'answer {name}', 'answer', matched, start)
+
+    def histograms(self):
+        """Return the count, total, percentiles and binned counts of every phase,
+        and of every throughput, by name."""
+        def histogram(values, bins, total=True):
+            values = numpy.frombuffer(values, dtype=numpy.float64)
+            result = {'count': len(values)}
+            if total:
+                result['total'] = float(values.sum())
+            for percent in PERCENTILES:
+                result[f'p{percent}'] = float(numpy.percentile(values, percent)) if len(values) else None
+            result['max'] = float(values.max()) if len(values) else None
+            if bins is not None:
+                result['bins'] = numpy.histogram(values, bins=(0, *bins))[0].tolist()
+            return result
+
+        return {'durations': {name: histogram(values, DURATION_BINS) for name, values in self.durations.items()},
+                'rates': {name: histogram(values, None, total=False) for name, values in self.rates.items()}}
+
+    def save(self, filename):
+        """Write the trace events and :meth:`histograms` to the JSON file *filename*."""
+        pid = os.getpid()
+        trace_events = [{'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                         'ts': round((start - self._origin) * 1e6, 3), 'dur': round(duration * 1e6, 3),
+                         'args': args}
+                        for name, category, start, duration, tid, args in self.events]
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms',
+                       'durationBins': [bin_ if math.isfinite(bin_) else None for bin_ in DURATION_BINS],
+                       'histograms': self.histograms()}, f, separators=(',', ':'))
+
+
+class ProfiledSerial:
+    """A serial device timing each read and write to its :class:`Profiler`.
+
+    Any other attribute, such as *fileno* waited on by selectors, is that of
+    the device.
+    """
+
+    def __init__(self, ser, profiler):
+        self._ser = ser
+        self._profiler = profiler
+
+    def __getattr__(self, attr):
+        return getattr(self._ser, attr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self._ser.close()
+
+    def read(self, size=1):
+        start = time.perf_counter()
+        data = self._ser.read(size)
+        self._profiler.record('read', 'serial', start, time.perf_counter(), bytes=len(data))
+        return data
+
+    def write(self, data):
+        start = time.perf_counter()
+        written = self._ser.write(data)
+        self._profiler._wrote(start, time.perf_counter(), len(data))
+        return written
+
+
+class ProfiledExpecter:
+    """A :mod:`streamexpect` expecter timing each wait for a match to its :class:`Profiler`."""
+
+    def __init__(self, stream, profiler, names):
+        self._stream = stream
+        self._profiler = profiler
+        self._names = names
+
+    def __getattr__(self, attr):
+        return getattr(self._stream, attr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        return self._stream.__exit__(type_, value, traceback)
+
+    def _wait(self, pattern, expect, *args, **kwargs):
+        name = self._names.get(id(pattern)) or repr(pattern)
+        profiler = self._profiler
+        profiler._prompt = None
+        start = time.perf_counter()
+        try:
+            match = expect(pattern, *args, **kwargs)
+        except Exception as err:
+            profiler.record(f'wait {name}', 'wait', start, time.perf_counter(), error=type(err).__name__)
+            raise
+        end = time.perf_counter()
+        profiler.record(f'wait {name}', 'wait', start, end)
+        # the next write is the answer to it, if any is written before the next wait
+        profiler._prompt = name, end
+        return match
+
+    def expect(self, searcher, *args, **kwargs):
+        return self._wait(searcher, self._stream.expect, *args, **kwargs)
+
+    def expect_bytes(self, b, *args, **kwargs):
+        return self._wait(b, self._stream.expect_bytes, *args, **kwargs)
+
+    def expect_regex(self, pattern, *args, **kwargs):
+        return self._wait(pattern, self._stream.expect_regex, *args, **kwargs)
+
+
+def _seconds(value):
+    if value is None:
+        return '-'
+    if value < 1e-3:
+        return f'{value * 1e6:.0f}us'
+    if value < 1:
+        return f'{value * 1e3:.1f}ms'
+    return f'{value:.2f}s'
+
+
+def _bin_label(upper, lower):
+    if math.isinf(upper):
+        return f'>={_seconds(lower)}'
+    return f'<{_seconds(upper)}'
+
+
+def report(profile):
+    """Print the histograms of the JSON *profile* written by :meth:`Profiler.save`."""
+    def table(title, rows, headers):
+        print(title)
+        print(tabulate.tabulate(rows, headers=['', *headers], tablefmt='rounded_outline',
+                                stralign='right', disable_numparse=True))
+
+    histograms = profile['histograms']
+    bins = [math.inf if bin_ is None else bin_ for bin_ in profile['durationBins']]
+    labels = [_bin_label(upper, lower) for upper, lower in zip(bins, (0, *bins))]
+    durations = sorted(histograms['durations'].items(), key=lambda item: -item[1]['total'])
+    table('time of each phase', [
+        [name, f"{each['count']:,}", _seconds(each['total']),
+         *(_seconds(each[f'p{percent}']) for percent in PERCENTILES), _seconds(each['max'])]
+        for name, each in durations], ['count', 'total', *(f'p{percent}' for percent in PERCENTILES), 'max'])
+    table('count of each phase, by time', [
+        [name, *(f'{count:,}' if count else '' for count in each['bins'])]
+        for name, each in durations], labels)
+    if histograms['rates']:
+        table('bytes written per second', [
+            [name, f"{each['count']:,}", *(f"{each[f'p{percent}']:,.0f}" for percent in PERCENTILES),
+             f"{each['max']:,.0f}"]
+            for name, each in histograms['rates'].items() if each['count']],
+            ['seconds', *(f'p{percent}' for percent in PERCENTILES), 'max'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('profile', help='JSON profile written by --profile of play-hamurabi-vs-apple-1.py')
+    args = parser.parse_args()
+    with open(args.profile) as f:
+        report(json.load(f))
+
+
+if __name__ == '__main__':
+    main()
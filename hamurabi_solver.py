@@ -0,0 +1,441 @@
+"""
+Hamurabi solver -- an approximate dynamic programming policy for the hamurabi.py rules.
+
+The game is solved by dynamic programming, backwards from its last year:
+each of a menu of decisions is played against every outcome of the dice, by
+the rules of :func:`hamurabi.step` on numpy arrays, and the decision of
+highest expected final score (0, national fink, to 3, fantastic) is kept.
+States are solved at the points of a grid of population, bushels, acres and
+percent starved, the value of a state between them interpolated from the
+corners of its cell.  Only the points reachable from the first year are
+visited, the value of each is computed once and remembered in the value
+table of its year, and the points of each year are shared among worker
+processes.
+
+The decision chosen for every point is written to a compact policy table,
+which answers any later state in O(1).  It is not an optimal policy: only the
+decisions of a small menu are weighed, and the values of the grid, but for
+those of the last year, are those of its interpolation, with no bound on
+their error.  The policy is scored instead by playing it, on the same dice
+as ``decide_turn`` of the autoplayer::
+
+    python hamurabi_solver.py hamurabi.policy
+"""
+import dataclasses
+import functools
+import importlib.util
+import itertools
+import multiprocessing
+import os
+import random
+import struct
+import sys
+
+# 3rd
+import numpy
+
+import hamurabi
+import hamurabi_batch
+
+
+@dataclasses.dataclass(frozen=True)
+class Grid:
+    """Spacing of the points of the grid, any state between them is valued by
+    interpolation, and decided as the nearest of them."""
+    population: int = 20
+    bushels: int = 1000
+    acres: int = 200
+    pct_starve: int = 10
+
+    def key(self, state):
+        """Return the key of the point nearest *state* in the policy table."""
+        return (state.year,
+                round(state.population / self.population),
+                round(state.bushels / self.bushels),
+                round(state.acres / self.acres),
+                state.land_value,
+                round(state.pct_starve / self.pct_starve))
+
+    def state(self, key):
+        """Return the state at the point of *key*."""
+        year, population, bushels, acres, land_value, pct_starve = key
+        return hamurabi.GameState(
+            year=year, population=population * self.population,
+            bushels=bushels * self.bushels, acres=acres * self.acres,
+            harv_yield=0, eaten=0, infants=0, dead=0, plague=False,
+            land_value=land_value, pct_starve=pct_starve * self.pct_starve)
+
+    def pack(self, population, bushels, acres, pct_starve):
+        """Return the point nearest each state, but for its year and land value,
+        packed in one integer of 16 bits to each measure."""
+        packed = numpy.rint(population / self.population).astype(numpy.int64)
+        for measure, step in ((bushels, self.bushels), (acres, self.acres),
+                              (pct_starve, self.pct_starve)):
+            packed = packed << 16 | numpy.rint(measure / step).astype(numpy.int64)
+        return packed
+
+    def unpack(self, packed):
+        """Return the four measures of each point of :meth:`pack`, in steps."""
+        return (packed >> 48 & 0xffff, packed >> 32 & 0xffff,
+                packed >> 16 & 0xffff, packed & 0xffff)
+
+    def cell(self, population, bushels, acres, pct_starve):
+        """Return the cell of the grid holding each state, packed as by
+        :meth:`pack` at its lowest corner, and the fraction of the way
+        across the cell of each of the four measures."""
+        packed, fractions = 0, []
+        for measure, step in ((population, self.population), (bushels, self.bushels),
+                              (acres, self.acres), (pct_starve, self.pct_starve)):
+            position = numpy.asarray(measure) / step
+            low = numpy.floor(position)
+            packed = packed << 16 | low.astype(numpy.int64)
+            fractions.append(position - low)
+        return packed, fractions
+
+
+# The 16 corners of a cell, added to the packed lowest corner of Grid.cell,
+# in the order of itertools.product: across each measure where its bit is set.
+CORNERS = numpy.array([sum(upper << shift for upper, shift in zip(corner, (48, 32, 16, 0)))
+                       for corner in itertools.product((0, 1), repeat=4)], dtype=numpy.int64)
+
+
+def interpolate(values, fractions):
+    """Return the multilinear interpolation of each state, from the *values*
+    of the :data:`CORNERS` of its cell, on a last axis of 16, and the
+    *fractions* of :meth:`Grid.cell`."""
+    axis = values.ndim - 1
+    values = values.reshape(*values.shape[:-1], 2, 2, 2, 2)
+    for fraction in fractions:
+        # across one measure at a time, halving the corners left
+        lower, upper = numpy.moveaxis(values, axis, 0)
+        values = lower + (upper - lower) * fraction.reshape(fraction.shape + (1,) * (lower.ndim - axis))
+    return values
+
+
+# Every outcome of the dice of one year, drawn by 800 C=INT(RND(1)*5)+1 for
+# the harvest, the rats and the babies, and by line 542 for the plague, with
+# its probability.  Rats only differ by whether C is odd, 2 or 4, plague by
+# whether it strikes, and next year's land value is averaged over separately.
+_OUTCOMES = [
+    (harvest, rats, babies, plague, 1 / 5 * rat_chance * 1 / 5 * plague_chance)
+    for harvest in range(1, 6)
+    for rats, rat_chance in ((1, 3 / 5), (2, 1 / 5), (4, 1 / 5))
+    for babies in range(1, 6)
+    # 542 Q=INT(10*(2*RND(1)-.3)), Q<=0 for RND(1)<.2
+    for plague, plague_chance in ((True, .2), (False, .8))]
+HARVEST, RATS, BABIES, PLAGUE, PROBABILITY = (numpy.array(column) for column in zip(*_OUTCOMES))
+
+# 310 C=INT(10*RND(1)):Y=C+17
+LAND_VALUES = numpy.arange(17, 27)
+
+TRADES = numpy.array([0, .25, .5, -.1, -.25])
+STARVED = numpy.array([0, .1, .25, .4])
+
+# rows of states played by a worker at once, each of them by every decision
+# and outcome, some 24MB of each array of play() at most
+MAX_CHUNK_SIZE = 1000
+
+
+def menu(population, bushels, acres, land_value):
+    """Return the decisions considered in each state.
+
+    Land is bought with a part of the grain in store, or a part of the land
+    is sold.  Then everybody is fed, or a part of the people starved short
+    of impeachment, and as many acres are planted as are left seed and
+    people to tend them.  Returns arrays of acres to buy, acres to sell,
+    bushels to feed and acres to plant, one row for each state and one
+    column for each decision.
+    """
+    population, bushels, acres, land_value = (
+        numpy.asarray(column)[:, None, None] for column in (population, bushels, acres, land_value))
+    trade = TRADES[:, None]
+    buy = numpy.where(trade > 0, (bushels * trade).astype(int) // land_value, 0)
+    sell = numpy.where(trade < 0, numpy.maximum(0, numpy.minimum((acres * -trade).astype(int), acres - 1)), 0)
+    acres = acres + buy - sell
+    bushels = bushels + land_value * (sell - buy)
+    feed = numpy.minimum(bushels, (population - (population * STARVED).astype(int)) * 20)
+    plant = numpy.minimum(numpy.minimum(acres, 10 * population), (bushels - feed) * 2 + 1)
+    return tuple(numpy.broadcast_to(column, feed.shape).reshape(len(feed), -1)
+                 for column in (buy, sell, feed, plant))
+
+
+def decision_menu(state):
+    """Return the decisions of :func:`menu` considered in *state*."""
+    return [hamurabi.Decision(*decision) for decision in zip(*(
+        column[0].tolist() for column in menu(
+            [state.population], [state.bushels], [state.acres], [state.land_value])))]
+
+
+def play(year, population, bushels, acres, land_value, pct_starve):
+    """Play every decision of :func:`menu` against every outcome of the dice.
+
+    Each argument but *year* holds one row for each state.  Returns the
+    population, bushels, acres and percent starved of the next year, and
+    whether the ruler is still in office, one row for each state, one column
+    for each decision and one plane for each outcome.
+    """
+    buy, sell, feed, plant = (column[:, :, None] for column in menu(population, bushels, acres, land_value))
+    population, bushels, acres, land_value, pct_starve = (
+        numpy.asarray(column)[:, None, None] for column in (population, bushels, acres, land_value, pct_starve))
+
+    # 331 A=A+Q:S=S-Y*Q:C=0
+    # 350 A=A-Q:S=S+Y*Q:C=0
+    # 430 S=S-Q:C=1:PRINT
+    # 510 S=S-INT(D/2)
+    acres = acres + buy - sell
+    bushels = bushels + land_value * (sell - buy) - feed - plant // 2
+
+    # 515 Y=C:H=D*Y:E=0
+    # 525 E=INT(S/C)
+    # 530 S=S-E+H
+    eaten = numpy.where(RATS % 2 == 0, bushels // RATS, 0)
+    bushels = bushels - eaten + plant * HARVEST
+
+    # 533 I=INT(C*(20*A+S)/P/100+1)
+    infants = (BABIES * (20 * acres + bushels) / population / 100 + 1).astype(int)
+
+    # 540 C=INT(Q/20)
+    # 550 IF P<C THEN 210
+    # 552 D=P-C:IF D>.45*P THEN 560
+    # 553 P1=((Z-1)*P1+D*100/P)/Z
+    # 555 P=C:D1=D1+D:GOTO 215
+    full_tummies = feed // 20
+    starving = population >= full_tummies
+    dead = numpy.where(starving, population - full_tummies, 0)
+    impeached = dead > .45 * population
+    pct_starve = numpy.where(starving, ((year - 1) * pct_starve + dead * 100 / population) / year, pct_starve)
+    population = numpy.where(starving, full_tummies, population)
+
+    # 218 P=P+I
+    # 228 P=INT(P/2)
+    population = population + infants
+    population = numpy.where(PLAGUE, population // 2, population)
+
+    return population, bushels, acres, pct_starve, ~impeached & (population > 0)
+
+
+def final_scores(population, acres, pct_starve, in_office):
+    """Return the final score of each state of the tenth year."""
+    # 865 L=A/P
+    # 880 IF P1>33 THEN 565 ...
+    wealth = acres // numpy.maximum(population, 1)
+    return numpy.select(
+        [~in_office, pct_starve > 33, wealth < 7, pct_starve > 10, wealth < 9, pct_starve > 3, wealth < 10],
+        [0, 0, 0, 1, 1, 2, 2], default=3)
+
+
+@dataclasses.dataclass
+class Layer:
+    """Points of the grid reached in one year, packed by :meth:`Grid.pack`,
+    each with the expected final score of the best decisions from it,
+    averaged over the land values."""
+    year: int
+    packed: numpy.ndarray
+    value: numpy.ndarray = None
+
+    def states(self, grid):
+        """Return the arguments of :func:`play` for each point and land value."""
+        population, bushels, acres, pct_starve = grid.unpack(numpy.repeat(self.packed, len(LAND_VALUES)))
+        return (self.year, population * grid.population, bushels * grid.bushels, acres * grid.acres,
+                numpy.tile(LAND_VALUES, len(self.packed)), pct_starve * grid.pct_starve)
+
+
+def _reached(grid, year, *states):
+    """Return the cells reached from *states*, as by :meth:`Grid.cell`, and
+    whether each state is still played."""
+    population, bushels, acres, pct_starve, in_office = play(year, *states)
+    packed, fractions = grid.cell(population, bushels, acres, pct_starve)
+    return packed, fractions, in_office & (population > 0)
+
+
+def _successors(grid, year, *states):
+    """Return the points of the grid at the corners of the cells reached
+    from *states*, but for those of no population, which are lost games."""
+    packed, _, playing = _reached(grid, year, *states)
+    corners = (numpy.unique(packed[playing])[:, None] + CORNERS).ravel()
+    return numpy.unique(corners[corners >> 48 > 0])
+
+
+def _decide(grid, following, year, *states):
+    """Return the expected final score of the best decision of each state,
+    and its index in :func:`menu`, given the :class:`Layer` *following* of
+    the next year, or None for the ninth year."""
+    if following is None:
+        population, _, acres, pct_starve, in_office = play(year, *states)
+        scores = final_scores(population, acres, pct_starve, in_office)
+    else:
+        packed, fractions, playing = _reached(grid, year, *states)
+        # the value of each corner of every cell reached, looked up once for each cell
+        cells, inverse = numpy.unique(packed, return_inverse=True)
+        corners = cells[:, None] + CORNERS
+        index = numpy.searchsorted(following.packed, corners).clip(max=len(following.packed) - 1)
+        values = numpy.where(following.packed[index] == corners, following.value[index], 0)
+        scores = numpy.where(playing, interpolate(values[inverse.reshape(packed.shape)], fractions), 0)
+    expected = scores @ PROBABILITY
+    choice = expected.argmax(axis=1)
+    return expected[numpy.arange(len(expected)), choice], choice
+
+
+def _chunks(states, processes, chunk_size=None):
+    year, *columns = states
+    if chunk_size is None:
+        # a few chunks for each worker, for the pool to even out their work
+        workers = processes or os.cpu_count() or 1
+        chunk_size = min(MAX_CHUNK_SIZE, max(1, -(-len(columns[0]) // (4 * workers))))
+    for start in range(0, len(columns[0]), chunk_size):
+        yield (year, *(column[start:start + chunk_size] for column in columns))
+
+
+def solve(grid=Grid(), processes=None, chunk_size=None, initial=None):
+    """Solve the game from the state *initial*, by default that of its first
+    year, approximately.
+
+    The points reached in each year, the corners of the cells of every state
+    reached, are found forwards from *initial*, then their values
+    backwards from the last, the points of each year shared out among
+    *processes* worker processes, *chunk_size* at a time, or by default a
+    few chunks for each of them, of at most :data:`MAX_CHUNK_SIZE` states.
+
+    Returns the approximate policy table, a dict mapping each
+    :meth:`Grid.key` to an index of :func:`menu`.  The values of the grid
+    are only those of its interpolation, the score of the policy is that
+    played by :func:`play_policy`.
+    """
+    initial = initial or hamurabi.initial_state()
+    cell, _ = grid.cell(initial.population, initial.bushels, initial.acres, initial.pct_starve)
+    corners = cell + CORNERS
+    layers = [Layer(year=initial.year, packed=corners[corners >> 48 > 0])]
+    policy = {}
+    with multiprocessing.Pool(processes) as pool:
+        while layers[-1].year < 9:
+            layer = layers[-1]
+            successors = pool.starmap(functools.partial(_successors, grid),
+                                      _chunks(layer.states(grid), processes, chunk_size))
+            layers.append(Layer(year=layer.year + 1, packed=numpy.unique(numpy.concatenate(successors))))
+
+        following = None
+        for layer in reversed(layers):
+            results = pool.starmap(functools.partial(_decide, grid, following),
+                                   _chunks(layer.states(grid), processes, chunk_size))
+            value, choice = (numpy.concatenate(column) for column in zip(*results))
+            layer.value = value.reshape(-1, len(LAND_VALUES)).mean(axis=1)
+            keys = numpy.stack([
+                numpy.repeat(column, len(LAND_VALUES)) for column in grid.unpack(layer.packed)], axis=1)
+            keys = numpy.insert(keys, 3, numpy.tile(LAND_VALUES, len(layer.packed)), axis=1)
+            keys = numpy.insert(keys, 0, layer.year, axis=1)
+            policy.update(zip(map(tuple, keys.tolist()), choice.tolist()))
+            following = layer
+    return policy
+
+
+# policy table file: a header of the grid, then one record for each state.
+_HEADER = struct.Struct('<4sHHHH')
+_RECORD = struct.Struct('<BHHHBBB')
+_MAGIC = b'HPT1'
+
+
+def save_policy(filename, grid, policy):
+    with open(filename, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, grid.population, grid.bushels, grid.acres, grid.pct_starve))
+        for key, choice in sorted(policy.items()):
+            f.write(_RECORD.pack(*key, choice))
+
+
+class PolicyTable:
+    """A policy table written by :func:`save_policy`."""
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            data = f.read()
+        magic, *steps = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError(f'{filename} is not a policy table')
+        self.grid = Grid(*steps)
+        self.policy = {record[:-1]: record[-1] for record in
+                       _RECORD.iter_unpack(data[_HEADER.size:])}
+
+    def decision(self, state):
+        """Return the decision of *state*, or None if it was never solved."""
+        choice = self.policy.get(self.grid.key(state))
+        if choice is None:
+            return None
+        return decision_menu(state)[choice]
+
+
+def play_scores(decide, games=1000, seed=None):
+    """Play *games* games by :func:`hamurabi.step`, deciding each year by
+    *decide*, a callable receiving the state and returning its decision.
+
+    Every game draws from a random stream of its own, seeded by *seed* and
+    its number, so that any two strategies are played on the same dice.
+    Returns the final score of each game, 0 (fink) to 3.
+    """
+    scores = numpy.zeros(games, dtype=numpy.int64)
+    for game in range(games):
+        rng = random.Random(f'{seed}:{game}')
+        state = hamurabi.initial_state(rng)
+        while not state.finished:
+            state, _ = hamurabi.step(state, decide(state), rng)
+        scores[game] = hamurabi.final_score(state)
+    return scores
+
+
+def play_policy(table, games=1000, seed=None):
+    """Play *games* games as :func:`play_scores`, deciding each year by
+    *table*, or by the first decision of the menu where it has none.
+
+    Returns the number of games ending with each score, 0 (fink) to 3.
+    """
+    scores = play_scores(lambda state: table.decision(state) or decision_menu(state)[0], games, seed)
+    return numpy.bincount(scores, minlength=4).tolist()
+
+
+AUTOPLAYER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'play-hamurabi-vs-apple-1.py')
+
+
+@functools.cache
+def _autoplayer():
+    # not importable by name, for the dashes of its file name
+    spec = importlib.util.spec_from_file_location('autoplayer', AUTOPLAYER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def heuristic_decision(state):
+    """Return the decision of ``decide_turn`` of the autoplayer in *state*.
+
+    It is written for the rules of ``hamurabi-6502.bas``, which differ from
+    those of :mod:`hamurabi` in the number of years and in starvation.
+    """
+    return hamurabi.Decision(*_autoplayer().decide_turn(
+        state.population, state.bushels, state.acres, state.land_value, state.year))
+
+
+def _summary(name, scores):
+    # mean with a 95% confidence interval, and the share of each score
+    error = 1.96 * scores.std(ddof=1) / len(scores) ** .5
+    shares = ', '.join(f'{count / len(scores) * 100:.1f}%' for count in numpy.bincount(scores, minlength=4))
+    return f'{name:>29}: {scores.mean():.3f} +/- {error:.3f}, lost/ok/good/best {shares}'
+
+
+def main(filename='hamurabi.policy', games=1000):
+    grid = Grid()
+    policy = solve(grid)
+    save_policy(filename, grid, policy)
+    print(f'{len(policy):,} states written to {filename}')
+    table = PolicyTable(filename)
+    scores = play_scores(lambda state: table.decision(state) or decision_menu(state)[0], games, seed=1)
+    heuristic = play_scores(heuristic_decision, games, seed=1)
+    steady = hamurabi_batch.simulate(hamurabi_batch.steady_policy, games=games, seed=1)
+    print(f'Mean final score of {games:,} games, with its 95% interval, '
+          f'the policy table and decide_turn played on the same dice:')
+    print(_summary('policy table', scores))
+    print(_summary('decide_turn', heuristic))
+    print(_summary('hamurabi_batch.steady_policy', steady.score))
+    print(f'The policy table scores higher than decide_turn in {(scores > heuristic).sum():,} games, '
+          f'lower in {(scores < heuristic).sum():,} and the same in {(scores == heuristic).sum():,}')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
@@ -0,0 +1,177 @@
+"""
+Hamurabi stats -- analytics of a game log, or a comparison of two.
+
+Reads the CSV log of ``save_game_log``, or a binary log of
+:mod:`hamurabi_log`, a chunk of games at a time into running totals, so
+that logs of millions of games are read in flat memory::
+
+    python hamurabi_stats.py game_log.csv
+    python hamurabi_stats.py tournament_log.hamlog other_strategy.hamlog
+"""
+import argparse
+
+# 3rd
+import numpy
+import tabulate
+
+# local
+import hamurabi_log
+
+SCORES = ('lost', 'ok', 'good', 'best')
+STARVATION_BINS = 5
+WEALTH_BINS_PER_ACRE = 10
+WEALTH_MAX = 100
+
+
+class Stats:
+    """Running totals of a game log, updated by :meth:`update` a chunk at a time.
+
+    :param int window: Number of games of each win rate of
+        :attr:`rolling_win_rate`.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.games = 0
+        self.scores = numpy.zeros(4, dtype=numpy.int64)
+        # starvation percentages in bins of 5%, of games reaching the last turn
+        self.starvation = numpy.zeros(100 // STARVATION_BINS + 1, dtype=numpy.int64)
+        # wealth in bins of a tenth of an acre per person, the last holding any more
+        self.wealth = numpy.zeros(WEALTH_MAX * WEALTH_BINS_PER_ACRE + 1, dtype=numpy.int64)
+        self.losses_by_turn = numpy.zeros(12, dtype=numpy.int64)
+        # games, by score, with and without any plague
+        self.plague_scores = numpy.zeros((2, 4), dtype=numpy.int64)
+        self.lost_to_plague = numpy.zeros(4, dtype=numpy.int64)
+        self.rats_eaten = numpy.zeros(4, dtype=numpy.int64)
+        self.rolling_win_rate = []
+        self._window_games = self._window_wins = 0
+
+    def update(self, records):
+        """Add a chunk of *records* of :data:`hamurabi_log.DTYPE`, in the order played."""
+        score = records['final_score'].astype(numpy.intp)
+        self.games += len(records)
+        self.scores += numpy.bincount(score, minlength=4)
+
+        pct_starved = records['pct_starved']
+        pct_starved = pct_starved[pct_starved >= 0]
+        self.starvation += numpy.bincount(numpy.minimum(pct_starved, 100) // STARVATION_BINS,
+                                          minlength=len(self.starvation))
+
+        wealth = records['wealth']
+        wealth = wealth[~numpy.isnan(wealth)]
+        self.wealth += numpy.bincount(
+            numpy.clip(wealth * WEALTH_BINS_PER_ACRE, 0, len(self.wealth) - 1).astype(numpy.intp),
+            minlength=len(self.wealth))
+
+        self.losses_by_turn += numpy.bincount(
+            numpy.clip(records['last_turn'][score == 0], 0, 11).astype(numpy.intp), minlength=12)
+
+        plagued = (records['total_lost_to_plague'] > 0).astype(numpy.intp)
+        self.plague_scores += numpy.bincount(plagued * 4 + score, minlength=8).reshape(2, 4)
+        self.lost_to_plague += numpy.bincount(
+            score, weights=numpy.maximum(records['total_lost_to_plague'], 0), minlength=4).astype(numpy.int64)
+        self.rats_eaten += numpy.bincount(
+            score, weights=numpy.maximum(records['total_rats_eaten'], 0), minlength=4).astype(numpy.int64)
+
+        # win rate of every window of games, the last one carried into the next chunk
+        wins = numpy.concatenate(([0], numpy.cumsum(score == 3)))
+        start, needed = 0, self.window - self._window_games
+        while len(records) - start >= needed:
+            end = start + needed
+            self.rolling_win_rate.append((self._window_wins + wins[end] - wins[start]) / self.window)
+            self._window_games = self._window_wins = 0
+            start, needed = end, self.window
+        self._window_games += len(records) - start
+        self._window_wins += int(wins[-1] - wins[start])
+
+    def wealth_percentile(self, percent):
+        """Return the wealth, in acres per person, at *percent* of the games,
+        to the nearest tenth of an acre below it."""
+        counts = numpy.cumsum(self.wealth)
+        if not counts[-1]:
+            return numpy.nan
+        return numpy.searchsorted(counts, counts[-1] * percent / 100) / WEALTH_BINS_PER_ACRE
+
+
+def read_stats(filename, window=1000, chunk_size=100_000):
+    """Return the :class:`Stats` of the CSV or binary game log *filename*."""
+    stats = Stats(window)
+    for records in hamurabi_log.read_chunks(filename, chunk_size):
+        stats.update(records)
+    return stats
+
+
+def _pct(count, total):
+    return f'{count / total * 100:2.1f}%' if total else '-'
+
+
+def report(stats, names):
+    """Print the tables of one or more :class:`Stats`, side by side, in columns named *names*."""
+    def table(title, rows, headers=()):
+        print(title)
+        print(tabulate.tabulate(rows, headers=['', *headers], tablefmt='rounded_outline',
+                                stralign='right', disable_numparse=True))
+
+    def delta(values):
+        # the second log against the first, when comparing two
+        change = [f'{values[1] - values[0]:+.1f}'] if len(values) == 2 else []
+        return [f'{value:.1f}' for value in values] + change
+
+    headers = [*names, 'change'] if len(names) == 2 else names
+    table('games', [['games', *(f'{each.games:,}' for each in stats)]], names)
+
+    table('score distribution, %', [
+        [name, *delta([each.scores[score] / max(each.games, 1) * 100 for each in stats])]
+        for score, name in enumerate(SCORES)], headers)
+
+    table('starvation, % of games reaching the last turn', [
+        [f'{low}-{low + STARVATION_BINS - 1}%' if low < 100 else '100%',
+         *(_pct(each.starvation[bin_], each.starvation.sum()) for each in stats)]
+        for bin_, low in enumerate(range(0, 101, STARVATION_BINS))
+        if any(each.starvation[bin_] for each in stats)], names)
+
+    table('wealth, acres per person', [
+        [f'p{percent}', *delta([each.wealth_percentile(percent) for each in stats])]
+        for percent in (1, 5, 10, 25, 50, 75, 90, 95, 99)], headers)
+
+    table('losses by last turn', [
+        [turn, *(f'{each.losses_by_turn[turn]:,}' for each in stats)]
+        for turn in range(12) if any(each.losses_by_turn[turn] for each in stats)], names)
+
+    rows = []
+    for plagued, label in ((0, 'no plague'), (1, 'plague')):
+        rows.append([f'{label}, games', *(f'{each.plague_scores[plagued].sum():,}' for each in stats)])
+        rows.append([f'{label}, best', *(_pct(each.plague_scores[plagued][3], each.plague_scores[plagued].sum())
+                                         for each in stats)])
+    for score, name in enumerate(SCORES):
+        rows.append([f'{name}, lost to plague', *(
+            f'{each.lost_to_plague[score] / max(each.scores[score], 1):.1f}' for each in stats)])
+        rows.append([f'{name}, rats ate', *(
+            f'{each.rats_eaten[score] / max(each.scores[score], 1):.1f}' for each in stats)])
+    table('plague and rats, mean of games', rows, names)
+
+    windows = max(len(each.rolling_win_rate) for each in stats)
+    step = max(1, windows // 20)
+    table(f'win rate of every {stats[0].window:,} games', [
+        [f'{index * stats[0].window:,}', *(
+            _pct(each.rolling_win_rate[index], 1) if index < len(each.rolling_win_rate) else ''
+            for each in stats)]
+        for index in range(0, windows, step)], names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('logs', nargs='+', metavar='LOG',
+                        help='CSV or .hamlog game log, give two to compare them')
+    parser.add_argument('--window', type=int, default=1000,
+                        help='games of each win rate over time')
+    parser.add_argument('--chunk-size', type=int, default=100_000,
+                        help='games read at a time')
+    args = parser.parse_args()
+    if len(args.logs) > 2:
+        parser.error('at most two logs may be compared')
+    report([read_stats(log, args.window, args.chunk_size) for log in args.logs], args.logs)
+
+
+if __name__ == '__main__':
+    main()
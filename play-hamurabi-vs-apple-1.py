@@ -1,21 +1,34 @@
 #!/usr/bin/env python3
 # std
+import argparse
+import bisect
+import contextlib
+import multiprocessing
 import functools
 import dataclasses
 import datetime
 import glob
+import hashlib
+import json
+import queue
 import sys
+import threading
 import time
 import math
 import csv
+import random
 import re
 
 # 3rd
 import simple_term_menu
 import streamexpect
+import wozmon
+import hamurabi_log
+import hamurabi_profile
 import tabulate
 import blessed
 import serial
+import numpy
 import tqdm
 import pyte
 
@@ -31,6 +44,23 @@ def cr_to_lf(s): return s.replace('\r', '\n')
 WINDOW_Y_TOP = 8
 WINDOW_X_LEFT = 25
 
+# WozMon takes one keystroke at a time from the PIA and the serial link has
+# no flow control, so only a few bytes may be typed ahead of their echo.
+LOAD_WINDOW = 4
+LOAD_RETRIES = 5
+WOZMON_ESCAPE = b'\x1b'
+BASIC_BACKSPACE = b'_'
+MATCH_EXAMINE = rb'\r([0-9A-F]{4}):((?: [0-9A-F]{2})+)(?=\r)'
+
+# Integer BASIC keeps LOMEM at $4A, HIMEM at $4C and the start of the program
+# at $CA, the program runs from there up to HIMEM.  The digest of the program
+# last loaded is cached, to skip loading it again while it is resident.
+BASIC_HIMEM = 0x4c
+BASIC_PP = 0xca
+BASIC_POINTERS = [range(0x4a, 0x4e), range(BASIC_PP, BASIC_PP + 2)]
+SIGNATURE_BLOCKS = 8
+RESIDENT_CACHE = 'apple1-resident.sha256'
+
 @dataclasses.dataclass
 class DataTableItem:
     turn: int
@@ -46,7 +76,137 @@ class DataTableItem:
     rats: int
     planted: int
 
-def main(repl=False):
+
+class WindowRenderer:
+    """Makes the frames of a pyte screen, drawn onto the terminal by :class:`RenderThread`.
+
+    Only the cells changed since the last frame are drawn, in runs moved to
+    once each, and the color sequence of every pyte color is made once.
+    """
+
+    def __init__(self, term, screen, x, y=WINDOW_Y_TOP):
+        self.term = term
+        self.screen = screen
+        self.x = x
+        self.y = y
+        self._drawn = {}
+        self._colors = {}
+
+    def color(self, fg):
+        if fg not in self._colors:
+            if fg == 'default':
+                sequence = self.term.normal
+            elif re.fullmatch('[0-9a-fA-F]{6}', fg):
+                sequence = self.term.color_rgb(int(fg[0:2], 16), int(fg[2:4], 16), int(fg[4:6], 16))
+            else:
+                # pyte names the bright colors 'brightred', blessed 'bright_red'
+                sequence = getattr(self.term, fg.replace('bright', 'bright_'), self.term.normal)
+            self._colors[fg] = str(sequence)
+        return self._colors[fg]
+
+    def frame(self) -> str:
+        """Return the sequence drawing the cells changed since the last frame."""
+        parts = []
+        color = cursor = None
+        for y in sorted(self.screen.dirty):
+            row = self.screen.buffer[y]
+            for x in range(self.screen.columns):
+                char = row[x]
+                cell = char.data, char.fg
+                if self._drawn.get((y, x)) == cell:
+                    continue
+                self._drawn[y, x] = cell
+                if cursor != (y, x):
+                    parts.append(self.term.move_yx(y + self.y, x + self.x))
+                if char.fg != color:
+                    parts.append(self.color(char.fg))
+                    color = char.fg
+                parts.append(char.data or ' ')
+                cursor = y, x + 1
+        self.screen.dirty.clear()
+        if parts:
+            parts.append(self.term.normal)
+        return ''.join(parts)
+
+
+class RenderThread(threading.Thread):
+    """Draws the terminal off the thread reading the Apple-1.
+
+    Text for the game windows, and drawings such as the tables, are handed
+    over without waiting.  A bounded queue of one wakes the thread, so that
+    wakes made while it draws are coalesced: all text handed over since is
+    fed in order, then each window and drawing is drawn once, in one write.
+    Under load frames in between are dropped, never text, and frames are
+    drawn at most *max_fps* times a second.
+    """
+
+    def __init__(self, max_fps=30, file=sys.stdout):
+        super().__init__(name='render', daemon=True)
+        self.min_interval = 1 / max_fps
+        self.file = file
+        self._lock = threading.Lock()
+        self._text = []
+        self._drawings = {}
+        self._wake = queue.Queue(maxsize=1)
+        self._closing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def feed(self, stream, renderer, text):
+        """Feed *text* to the pyte *stream* of the window drawn by *renderer*."""
+        with self._lock:
+            self._text.append((stream, renderer, text))
+        self._notify()
+
+    def draw(self, key, make_sequence):
+        """Replace drawing *key* by the sequence returned by *make_sequence*.
+
+        *make_sequence* is called on the render thread, only for the last
+        drawing of each key handed over before a frame.
+        """
+        with self._lock:
+            self._drawings[key] = make_sequence
+        self._notify()
+
+    def close(self):
+        """Draw the last frame, and stop the thread."""
+        self._closing = True
+        self._notify()
+        self.join()
+
+    def _notify(self):
+        try:
+            self._wake.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def run(self):
+        while True:
+            self._wake.get()
+            with self._lock:
+                text, self._text = self._text, []
+                drawings, self._drawings = self._drawings, {}
+            renderers = {}
+            for stream, renderer, data in text:
+                stream.feed(data)
+                renderers[id(renderer)] = renderer
+            frame = ''.join(make_sequence() for make_sequence in drawings.values())
+            frame += ''.join(renderer.frame() for renderer in renderers.values())
+            if frame:
+                self.file.write(frame)
+                self.file.flush()
+            if self._closing and self._wake.empty():
+                break
+            time.sleep(self.min_interval)
+
+
+def main(repl=False, load_window=LOAD_WINDOW, script='apple1-HAMMURABI.TXT', trace='game_trace.hamlog',
+         device=None, profile=None):
     term = blessed.Terminal()
     window_calc = pyte.Screen(40, 24)
     stream_calc = pyte.Stream(window_calc)
@@ -55,24 +215,25 @@ def main(repl=False):
     assert term.width >= 134
     assert term.height >= 49
 
-    def print_window(text, window, stream, x, color='bright_red'):
+    render = RenderThread()
+
+    def print_window(text, stream, renderer, color='bright_red'):
         term_attr = getattr(term, color)
         if isinstance(text, bytes):
             text = text.decode()
-        stream.feed(term_attr(text.replace('\r', '\r\n')))
-        for y in window.dirty:
-            for inner_x in range(window.columns):
-                char = window.buffer[y][inner_x]
-                if char.fg == 'default':
-                    term_attr = str
-                else:
-                    term_attr = term.color_rgb(int(char.fg[0:2], 16), int(char.fg[2:4], 16), int(char.fg[4:6], 16))
-                print(term.move_yx(y + WINDOW_Y_TOP, x + inner_x) + term_attr(char.data) or ' ', end='', flush=True)
-                
-    print_calc = functools.partial(print_window, window=window_calc, stream=stream_calc, x=2 + WINDOW_X_LEFT, color='darkolivegreen3')
-    print_game = functools.partial(print_window, window=window_game, stream=stream_game, x=45 + WINDOW_X_LEFT)
+        render.feed(stream, renderer, term_attr(text.replace('\r', '\r\n')))
+
+    # every read, write, wait for a match and print_window is timed to the --profile, if any
+    profiler = hamurabi_profile.Profiler() if profile else None
+    if profiler is not None:
+        print_window = profiler.timed('print_window', print_window)
+
+    print_calc = functools.partial(print_window, stream=stream_calc, color='darkolivegreen3',
+                                   renderer=WindowRenderer(term, window_calc, x=2 + WINDOW_X_LEFT))
+    print_game = functools.partial(print_window, stream=stream_game,
+                                   renderer=WindowRenderer(term, window_game, x=45 + WINDOW_X_LEFT))
     output = ''
-    devices = glob.glob('/dev/cu.*')
+    devices = [device] if device else glob.glob('/dev/cu.*')
     if len(devices) < 1:
         print("No serial devices found!")
         exit(1)
@@ -90,7 +251,11 @@ def main(repl=False):
 #        term_attr = getattr(term, color)
 #        print(term_attr(text.decode().replace('\r', '\n')), end='', flush=True)
 
-    with serial.Serial(serial_device, baudrate=2400, rtscts=0, timeout=2) as ser, term.cbreak():
+    with serial.serial_for_url(serial_device, baudrate=2400, rtscts=0, timeout=2) as ser, term.cbreak(), render, \
+            hamurabi_log.TraceWriter(trace) as tracer, contextlib.ExitStack() as on_exit:
+        if profiler is not None:
+            ser = profiler.serial(ser)
+            on_exit.callback(profiler.save, profile)
         # any time opening the serial device, the computer does a soft reset, it won't accept
         # keyboard or serial input or provide video output until 2 seconds have elapsed.
         print(term.move(0, 0) + term.clear())
@@ -103,14 +268,15 @@ def main(repl=False):
                 if result.endswith('\\\r'):
                     break
             recv_char = ser.read(1).decode()
-            print('Reset detected, sending HAMURABI.BAS ...')
-            send_code(ser)
+            print('Reset detected, checking for HAMURABI.BAS ...')
+            with profiler.throughput('load_code') if profiler is not None else contextlib.nullcontext():
+                load_code(ser, window=load_window, script=script)
             print('Code loaded successfully!')
         else:
             ser.write(b'\r\r')
             time.sleep(1)
             send_echo(ser, print_game, 'RUN\r')
-        play_game(ser, term, print_calc, print_game)
+        play_game(ser, term, print_calc, print_game, render.draw, ScoreTally.load(), tracer, profiler)
 
 def send_echo_byte(ser, send_byte: bytes):
     assert len(send_byte) == 1, send_byte
@@ -127,45 +293,225 @@ def send_echo_byte(ser, send_byte: bytes):
 
 
 def send_echo(ser, printer: callable, send_string: str):
-    for send_byte in send_string.encode('ascii'):
+    """Type *send_string*, a line ending in a carriage return, checking its echo.
+
+    The line is written at once, and its echo read back as one block before
+    the carriage return is sent.  When any echo is missing or different, as
+    by an overrun, the characters echoed are rubbed out with backspaces and
+    the line is typed again one byte at a time.
+    """
+    line = send_string.encode('ascii')
+    text = line.rstrip(b'\r')
+    ser.write(text)
+    echo = read_exactly(ser, len(text))
+    if echo == text:
+        line = line[len(text):]
+    else:
+        # let the bytes in flight arrive, each echoed character is rubbed out
+        time.sleep(0.5)
+        echo += ser.read(ser.in_waiting)
+        for _ in range(min(len(echo), len(text))):
+            send_echo_byte(ser, BASIC_BACKSPACE)
+    for send_byte in line:
         send_echo_byte(ser, bytes([send_byte]))
-        # transpose for local tty output
-#        if send_byte == '\r':
-#            send_byte = '\r'
-        printer(bytes([send_byte]).decode(), color='gold')
-
-def send_code(ser):
-   code_data = open('apple1-HAMMURABI.TXT').read()
-   in_basic = False
-   # this is a wozmon insert sequence, send one byte at a time, awaiting echo back from the apple-1
-   # serial port, to ensure not to overrun the max232 chip, which has no flow control
-   with tqdm.tqdm(total=len(code_data), unit='B', unit_scale=True, unit_divisor=1024) as pbar:
-       bytes_sent = 0
-       for code_line in code_data.splitlines():
-           for send_byte in (code_line + '\r').encode('ascii'):
-               bytes_sent += 1
-               pbar.update(1)
-               send_echo_byte(ser, bytes([send_byte]))
-
-           # did we perform a jump address? we must be in basic, now
-           if re.match(r'[0-9A-F]{4}R', code_line):
-               in_basic = True
-
-           # after any wozmon command, jump address or memory insert, await the echo
-           # back of wozmon's display of first address byte, this causes the transfer
-           # to go really slow, though ! experiments in variant without echo back
-           if re.match(r'([0-9A-F]{4}R|[0-9A-F]{4}: [0-9A-F]{2})', code_line):
-               result = ''
-               maybe_prompt = '>' if in_basic else ''
-               while True:
-                   result += ser.read(1).decode()
-                   if re.match(rf'\r([0-9A-F]{{4}}: [0-9A-F]{{2}})\r{maybe_prompt}$', result):
-                       break
-
-           # if we are in basic and a newline is sent, expect newline + prompt in return
-           if in_basic and code_line == '':
-               assert ser.read(2) == b'\r>'
-       print('Code load completed successfully!')
+    printer(send_string, color='gold')
+
+def send_ahead(ser, line: bytes, window: int) -> bool:
+    """Send *line*, up to *window* bytes ahead of their echo.
+
+    Every echo is checked against the bytes sent, returns False at the first
+    one missing or different.
+    """
+    confirmed = sent = 0
+    while confirmed < len(line):
+        if sent < min(len(line), confirmed + window):
+            ser.write(line[sent:confirmed + window])
+            sent = min(len(line), confirmed + window)
+        echo = ser.read(min(max(ser.in_waiting, 1), sent - confirmed))
+        if not echo or echo != line[confirmed:confirmed + len(echo)]:
+            return False
+        confirmed += len(echo)
+    return True
+
+
+def send_wozmon_line(ser, code_line: str, window: int) -> bool:
+    """Type a WozMon store or run command, returns whether it was carried out.
+
+    The carriage return ending the line is only sent once every byte before
+    it was echoed as sent, otherwise the line is cancelled with escape, so
+    that a mistyped line is never stored.  WozMon then prints the address of
+    the line with its previous value, nothing for a line continuing a store,
+    and a run command of BASIC prompts.
+    """
+    store = wozmon.parse_store(code_line)
+    if store is None:
+        address, prompt = int(wozmon.RUN.fullmatch(code_line).group(1), 16), b'>'
+    else:
+        address, prompt = store[0], b''
+    if send_ahead(ser, code_line.encode('ascii'), window):
+        ser.write(b'\r')
+        if address is None:
+            expected, length = rb'\r\r', 2
+        else:
+            expected = rb'\r\r' + f'{address:04X}'.encode() + rb': [0-9A-F]{2}\r' + prompt
+            length = len(b'\r\r0000: 00\r' + prompt)
+        if re.fullmatch(expected, ser.read(length)):
+            return True
+        if store is None:
+            raise IOError(f'{code_line} did not start BASIC')
+    else:
+        ser.write(WOZMON_ESCAPE)
+    # let the bytes in flight arrive, then throw them away with WozMon's reply
+    time.sleep(0.5)
+    ser.reset_input_buffer()
+    return False
+
+
+def send_wozmon_store(ser, code_line: str, address: int, values: list, window: int):
+    """Type a WozMon store command of *values* at *address*, trying again on failure.
+
+    A line continuing a store is typed again from its own address, as any
+    part of it may have been stored before it failed.
+    """
+    lines = [code_line]
+    for _ in range(LOAD_RETRIES):
+        if all(send_wozmon_line(ser, line, window) for line in lines):
+            return
+        lines = wozmon.store_lines(address, values)
+    raise IOError(f'{code_line} was not echoed after {LOAD_RETRIES} tries')
+
+
+def send_code(ser, window=LOAD_WINDOW, script='apple1-HAMMURABI.TXT'):
+    send_script(ser, open(script).read().splitlines(), window)
+
+
+def send_script(ser, code_lines, window=LOAD_WINDOW):
+    # this is a wozmon insert sequence, typed ahead of its echo back from the apple-1
+    # by at most window bytes, to ensure not to overrun the max232 chip, which has no
+    # flow control.  Each line is verified before it is entered, and typed again
+    # from its address when any echo goes missing.  The script may be one compacted
+    # by wozmon.py, of long lines continued from the previous address.
+    address = 0
+    with tqdm.tqdm(total=sum(len(code_line) + 1 for code_line in code_lines),
+                   unit='B', unit_scale=True, unit_divisor=1024) as pbar:
+        for code_line in code_lines:
+            store = wozmon.parse_store(code_line)
+            if store is not None:
+                start, values = store
+                address = address if start is None else start
+                send_wozmon_store(ser, code_line, address, values, window)
+                address += len(values)
+            elif wozmon.RUN.fullmatch(code_line):
+                for _ in range(LOAD_RETRIES):
+                    if send_wozmon_line(ser, code_line, window):
+                        break
+                else:
+                    raise IOError(f'{code_line} was not echoed after {LOAD_RETRIES} tries')
+            else:
+                # once in basic, send one byte at a time
+                for send_byte in (code_line + '\r').encode('ascii'):
+                    send_echo_byte(ser, bytes([send_byte]))
+
+                # if we are in basic and a newline is sent, expect newline + prompt in return
+                if code_line == '':
+                    assert ser.read(2) == b'\r>'
+            pbar.update(len(code_line) + 1)
+        print('Code load completed successfully!')
+
+
+def read_exactly(ser, length: int) -> bytes:
+    """Read *length* bytes, or fewer when the serial read times out."""
+    data = b''
+    while len(data) < length:
+        incoming = ser.read(length - len(data))
+        if not incoming:
+            break
+        data += incoming
+    return data
+
+
+def examine(ser, ranges, window=LOAD_WINDOW) -> dict:
+    """Return the bytes of the Apple-1 in *ranges* by WozMon examine commands.
+
+    Lines of the reply garbled in transit are left out.
+    """
+    memory = {}
+    for command, length in wozmon.examine_commands(ranges):
+        for _ in range(LOAD_RETRIES):
+            if send_ahead(ser, command.encode('ascii'), window):
+                break
+            ser.write(WOZMON_ESCAPE)
+            time.sleep(0.5)
+            ser.reset_input_buffer()
+        else:
+            raise IOError(f'{command} was not echoed after {LOAD_RETRIES} tries')
+        ser.write(b'\r')
+        for match in re.finditer(MATCH_EXAMINE, read_exactly(ser, length)):
+            address = int(match.group(1), 16)
+            memory.update(enumerate(bytes.fromhex(match.group(2).decode()), address))
+    return memory
+
+
+def resident_ranges(image):
+    """Return the ranges of *image* holding the program and its pointers.
+
+    The variables, from LOMEM, and the rest of the zero page change as
+    the program runs, and are not compared.
+    """
+    program, himem = (image[pointer] | image[pointer + 1] << 8 for pointer in (BASIC_PP, BASIC_HIMEM))
+    return BASIC_POINTERS + [range(program, himem)]
+
+
+def signature_ranges(ranges, blocks=SIGNATURE_BLOCKS):
+    """Return the BASIC pointers and *blocks* evenly spaced blocks of 8 bytes of the program."""
+    program = ranges[-1]
+    starts = sorted({program.start + (len(program) - 8) * block // (blocks - 1) for block in range(blocks)})
+    return ranges[:-1] + [range(start, min(start + 8, program.stop)) for start in starts]
+
+
+def image_digest(image, ranges) -> str:
+    return hashlib.sha256(bytes(image[address] for addresses in ranges for address in addresses)).hexdigest()
+
+
+def load_code(ser, window=LOAD_WINDOW, script='apple1-HAMMURABI.TXT', cache=RESIDENT_CACHE):
+    """Load *script*, or only the bytes of it which are not already resident, then run it.
+
+    The digest of the program last loaded is kept in *cache*.  When it is
+    that of *script*, and a sample of it examined on the Apple-1 matches, the
+    program is run as it is.  Otherwise the program is examined in full, and
+    only the bytes differing are stored.  When the pointers of BASIC differ,
+    no program is resident, and the whole of *script* is loaded.
+    """
+    code_lines = open(script).read().splitlines()
+    image, run_lines = wozmon.read_script(code_lines)
+    ranges = resident_ranges(image)
+    digest = image_digest(image, ranges)
+    try:
+        with open(cache) as f:
+            cached = f.read().strip()
+    except FileNotFoundError:
+        cached = None
+
+    signature = signature_ranges(ranges)
+    memory = examine(ser, signature, window)
+
+    def resident(ranges):
+        return all(memory.get(address) == image[address] for addresses in ranges for address in addresses)
+
+    if not resident(BASIC_POINTERS):
+        print('HAMURABI.BAS is not resident, loading ...')
+        send_script(ser, code_lines, window)
+    elif cached == digest and resident(signature):
+        print('HAMURABI.BAS is resident, running ...')
+        send_script(ser, run_lines, window)
+    else:
+        memory = examine(ser, ranges, window)
+        program = {address: image[address] for addresses in ranges for address in addresses}
+        changed = wozmon.encode(program, baseline=memory)
+        print(f'{len(changed)} lines of HAMURABI.BAS differ, loading them ...')
+        send_script(ser, changed + run_lines, window)
+    with open(cache, 'w') as f:
+        f.write(digest + '\n')
 
 MATCH_GAME_BEGIN = b'\r\rTRY YOUR HAND AT GOVERNING ANCIENT\rSUMERIA SUCCESSFULLY FOR A 10-YEAR TERM\rOF OFFICE.\r'
 MATCH_TURN_BEGIN = (rb'\rHAMURABI: I BEG TO REPORT TO YOU,\r'
@@ -178,7 +524,7 @@ MATCH_TURN_BEGIN = (rb'\rHAMURABI: I BEG TO REPORT TO YOU,\r'
                     rb'RATS ATE (?P<RATS_EATEN>[0-9]{1,5}) BUSHELS,\r'
                     rb'YOU NOW HAVE (?P<BUSHELS>[0-9]{1,8}) BUSHELS IN STORE.\r')
 MATCH_TURN_BUY = (rb'\rLAND IS TRADING AT (?P<LAND_VALUE>[0-9]{1,2}) BUSHELS PER ACRE,\r'
-                  rb'HOW MANY ACRES DO YOU WISH TO BUY?')
+                  rb'HOW MANY ACRES DO YOU WISH TO BUY\?')
 MATCH_TURN_SELL = b'\rHOW MANY ACRES DO YOU WISH TO SELL?'
 MATCH_TURN_FEED = b'\rHOW MANY BUSHELS DO YOU WISH TO FEED YOUR PEOPLE?'
 MATCH_TURN_PLANT = b'\rHOW MANY ACRES DO YOU WISH TO PLANT\rWITH SEED?'
@@ -204,21 +550,43 @@ MATCH_UNPLEASANT = (b'A LOUSY PERFORMANCE!!!\r'
 MATCH_NOT_TOO_BAD = (b'YOUR PERFORMANCE COULD HAVE BEEN BETTER\r'
                      b"BUT WASN'T TOO BAD, [0-9]{1,5} PEOPLE WOULD \r"
                      b'LOVE TO SEE YOU ASSASSINATED.')
-MATCH_END_RATINGS = f'({MATCH_NATIONAL_FINK.decode()}|{MATCH_FANTASTIC.decode()}|{MATCH_UNPLEASANT.decode()}|{MATCH_NOT_TOO_BAD.decode()})'.encode()
+
+# compiled once, a match of a collection has the sub-searcher found, and the
+# final score is the index of its rating, numbers are matched as ints
+SEARCH_TURN_BEGIN = streamexpect.SearcherCollection(
+    streamexpect.RegexSearcher(MATCH_TURN_BEGIN, converters=dict.fromkeys((
+        'YEAR', 'STARVED', 'INFANTS', 'POPULATION', 'ACRES', 'HARVESTED', 'RATS_EATEN', 'BUSHELS'), int)),
+    streamexpect.RegexSearcher(MATCH_PEOPLE_STARVED, converters={'STARVED_TOOMANY': int}),
+)
+SEARCH_TURN_BUY = streamexpect.RegexSearcher(MATCH_TURN_BUY, converters={'LAND_VALUE': int})
+SEARCH_LAST_TURN = streamexpect.RegexSearcher(MATCH_LAST_TURN, converters=dict.fromkeys((
+    'PCT_STARVED', 'TOTAL_DEATHS', 'WEALTH'), int))
+SEARCH_END_RATINGS = streamexpect.SearcherCollection(
+    *(streamexpect.RegexSearcher(pattern) for pattern in (
+        MATCH_NATIONAL_FINK, MATCH_UNPLEASANT, MATCH_NOT_TOO_BAD, MATCH_FANTASTIC)))
+# a report that fails past its first line is not waited on until the timeout
+DIVERGE_TURN_BEGIN = len(b'\rHAMURABI: I BEG TO REPORT TO YOU,\r')
 
 
 MATCH_END_GAME = b"\rSO LONG FOR NOW"
 
 
 
-def play_game(ser, term, print_calc, print_game):
+def play_game(ser, term, print_calc, print_game, draw, tally, trace=None, profiler=None):
     game_log = []
+    # every report of the Apple-1 and every decision is streamed to the trace, if any
+    trace_event = trace.write if trace is not None else lambda **event: None
 
+    # only the lines of the border are drawn, not to overwrite the windows inside of it
     lines = tabulate.tabulate([["x" * 40, "z"*40]]*24, tablefmt='rounded_outline').splitlines()
-    for y, line in enumerate(lines):
-        print(term.move_yx(y=WINDOW_Y_TOP + y - 1, x=WINDOW_X_LEFT) + line)
+    draw('border', lambda: ''.join(term.move_yx(y=WINDOW_Y_TOP + y - 1, x=WINDOW_X_LEFT + match.start()) + match.group()
+                                   for y, line in enumerate(lines) for match in re.finditer(r'[^xz ]+', line)))
 
     with streamexpect.wrap(ser, fn_echo=functools.partial(print_game, color='chocolate')) as stream:
+        if profiler is not None:
+            # each wait is named by the MATCH_* or SEARCH_* pattern it is for
+            stream = profiler.expecter(stream, {id(value): name for name, value in globals().items()
+                                                if name.startswith(('MATCH_', 'SEARCH_'))})
         while True:
             input_acres = 1000
             plant_acres = 1000
@@ -243,45 +611,32 @@ def play_game(ser, term, print_calc, print_game):
 
             print_calc('Ready ...\r')
             stream.expect_bytes(MATCH_GAME_BEGIN)
+            game = datetime.datetime.now()
 
             data_table = []
-            with open('game_log.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                games = [row['final_score'] for row in reader]
-                total_games = len(games)
-                games_3 = games.count('3')
-                games_2 = games.count('2')
-                games_1 = games.count('1')
-                games_0 = games.count('0')
-                headers = ['total games', 'best', 'good', 'ok', 'lost']
-                table_data = [
-                    [f'{total_games:,}', f'{games_3:,}', f'{games_2:,}', f'{games_1:,}', f'{games_0:,}'],
-                    ['pct.',
-                     (f'{(games_3/total_games)*100:2.1f}' if games_3 else '0') + '%',
-                     (f'{(games_2/total_games)*100:2.1f}' if games_2 else '0') + '%',
-                     (f'{(games_1/total_games)*100:2.1f}' if games_1 else '0') + '%',
-                     (f'{(games_0/total_games)*100:2.1f}' if games_0 else '0') + '%',]]
-
-                lines = tabulate.tabulate(table_data, tablefmt='rounded_outline', stralign='right', headers=headers).splitlines()
-                for y, line in enumerate(lines):
-                    print(term.move_yx(y=y, x=WINDOW_X_LEFT + 15) + line)
+            headers, table_data = tally.table()
+            draw('games', lambda table_data=table_data: ''.join(
+                term.move_yx(y=y, x=WINDOW_X_LEFT + 15) + line for y, line in enumerate(tabulate.tabulate(
+                    table_data, tablefmt='rounded_outline', stralign='right', headers=headers).splitlines())))
 
             for turn in range(1, 12):
-                searcher = streamexpect.SearcherCollection(
-                    streamexpect.RegexSearcher(MATCH_TURN_BEGIN),
-                    streamexpect.RegexSearcher(MATCH_PEOPLE_STARVED),
-                )
-                match = stream.expect(searcher, timeout=10)
+                match = stream.expect(SEARCH_TURN_BEGIN, timeout=10, diverge=DIVERGE_TURN_BEGIN)
                 if match is None:
                     raise TimeoutError('Timeout in MATCH_TURN_BEGIN')
-                match_values = {key: int(value.decode()) if value and value.decode().isdigit() else value
-                                for key, value in match.groupdict.items()}
+                match_values = match.groupdict
                 if 'STARVED_TOOMANY' in match_values:
+                    trace_event(game=game, event=hamurabi_log.STARVED_OUT, year=turn,
+                                starved=match_values['STARVED_TOOMANY'])
                     print_calc(f"Game lost: starvation ({match_values['STARVED_TOOMANY']})\r")
                     lost = True
                     break
 
                 turn = match_values['YEAR']
+                trace_event(game=game, event=hamurabi_log.REPORT, year=turn,
+                            starved=match_values['STARVED'], infants=match_values['INFANTS'],
+                            plague=bool(match_values['HORRIBLE_PLAGUE']), population=match_values['POPULATION'],
+                            acres=match_values['ACRES'], harvested=match_values['HARVESTED'],
+                            rats_eaten=match_values['RATS_EATEN'], bushels=match_values['BUSHELS'])
                 starting_population = population
                 infants = match_values['INFANTS']
                 total_infants += infants
@@ -363,27 +718,16 @@ def play_game(ser, term, print_calc, print_game):
                 if turn == 11:
                     break
 
-                match = stream.expect_regex(MATCH_TURN_BUY)
-                acres_cost = int(match.groupdict['LAND_VALUE'])
+                acres_cost = stream.expect(SEARCH_TURN_BUY).groupdict['LAND_VALUE']
                 print_calc(f'Land Value => {acres_cost} (per acre)\r')
 
-                # calculate land sales
-                sell_acres = calc_land_sales(population=population, given_bushels=input_bushels,
-                                             acres=input_acres, acres_cost=acres_cost,
-                                             turn=turn)
-
-                # calculate land purchases
-                buy_acres = 0
-                if sell_acres == 0:
-                    buy_acres = calc_land_purchases(population=population, given_bushels=input_bushels + (sell_acres * acres_cost),
-                                                    acres=input_acres - sell_acres,
-                                                    acres_cost=acres_cost, turn=turn)
+                buy_acres, sell_acres, feed_people, plant_acres = decide_turn(
+                    population, input_bushels, input_acres, acres_cost, turn)
+                trace_event(game=game, event=hamurabi_log.DECISION, year=turn, land_value=acres_cost,
+                            buy=buy_acres, sell=sell_acres, feed=feed_people, plant=plant_acres)
 
                 previous_starting_bushels = input_bushels # final_starting_bushels
                 final_starting_bushels = input_bushels + (sell_acres * acres_cost) - (buy_acres * acres_cost)
-                final_acres = input_acres - sell_acres + buy_acres
-                # TODO: if plant_acres < final_acres, then, we should 0 out our buys and sell acres that we cannot plant!
-                plant_acres, feed_people = determine_food_distribution(final_starting_bushels, population, final_acres, turn)
                 #next_turn_bushels = predict_next_turn_bushels(final_starting_bushels, plant_acres, feed_people)
 
                 # print_calc(f'Will buy {buy_acres} of land, sell {sell_acres}, feed {feed_people}, and plant {plant_acres} acres.\r')
@@ -403,9 +747,8 @@ def play_game(ser, term, print_calc, print_game):
                     rats=f'{rats_eaten*-1:,}',
                     ))
 
-                with term.location(y=WINDOW_Y_TOP + 26, x=0):
-                    print(tabulate.tabulate(data_table, tablefmt='rounded_outline', headers='keys', stralign='right'), end='')
-                    print(term.clear_eos, end='', flush=True)
+                draw('turns', lambda turns=list(data_table): term.move_yx(y=WINDOW_Y_TOP + 26, x=0) + tabulate.tabulate(
+                    turns, tablefmt='rounded_outline', headers='keys', stralign='right') + term.clear_eos)
 
 
                 send_echo(ser, print_game, f'{buy_acres}\r')
@@ -424,8 +767,8 @@ def play_game(ser, term, print_calc, print_game):
             final_score = 0
             if not lost:
                 print_calc('Waiting for game end\r')
-                match = stream.expect_regex(MATCH_LAST_TURN)
-                game_record.update({key.lower(): int(value) for key, value in match.groupdict.items()})
+                match = stream.expect(SEARCH_LAST_TURN)
+                game_record.update({key.lower(): value for key, value in match.groupdict.items()})
                 final_score = determine_final_score(stream)
             lost = lost or (final_score == 0)
             stream.expect_bytes(MATCH_END_GAME)
@@ -445,47 +788,351 @@ def play_game(ser, term, print_calc, print_game):
                 'total_land_sales': total_land_sales,
                 'final_score': final_score
             })
-            save_game_log(game_record)
+            save_game_log(game_record, tally=tally)
             stream.expect_bytes(b'>')
             if lost:
                 print_calc('We Lost :(\r')
 
             send_echo(ser, print_game, 'RUN\r')
 
+def play_local_game(rng, trace=None):
+    """Play one game of hamurabi-6502.bas against the strategy, without hardware.
+
+    The rules of the Apple-1 Integer BASIC version are followed here line by
+    line, drawing ``RND(N)`` from ``rng.randrange(N)``. Returns the same game
+    record that :func:`play_game` passes to :func:`save_game_log`, and writes
+    the same events to the :class:`hamurabi_log.TraceWriter` *trace*, if any.
+    """
+    trace_event = trace.write if trace is not None else lambda **event: None
+    game = datetime.datetime.now()
+    total_rats_eaten = 0
+    total_harvested = 0
+    total_starved = 0
+    total_infants = 0
+    total_lost_to_plague = 0
+    total_land_purchases = 0
+    total_land_sales = 0
+    buy_acres = sell_acres = 0
+    game_record = {}
+    final_score = 0
+    # 95 D1=1:P1=0
+    # 100 Z=0:P=95:S=2800:H=3000:E=H-S
+    # 110 Y=3:A=H/Y:I=5:Q=1
+    # 210 D=0
+    total_deaths, pct_starved = 1, 0
+    population, bushels, rats_eaten = 95, 2800, 3000 - 2800
+    harvested, acres, infants, plague = 3, 3000 // 3, 5, 1
+    starved = 0
+    last_turn = None
+    for turn in range(1, 12):
+        # 216 Z=Z+1: PRINT "IN YEAR ";Z;", ";D;" PEOPLE STARVED,":PRINT I;" CAME TO THE CITY."
+        total_infants += infants
+        total_starved += starved
+        total_land_sales += sell_acres
+        total_land_purchases += buy_acres
+        total_harvested += harvested
+        total_rats_eaten += rats_eaten
+
+        # 218 P=P+I
+        population = population + infants
+        # 227 IF Q>0 THEN 230
+        # 228 P=P/2
+        if plague <= 0:
+            total_lost_to_plague += population - population // 2
+            population = population // 2
+        wealth = acres / population
+        trace_event(game=game, event=hamurabi_log.REPORT, year=turn, starved=starved, infants=infants,
+                    plague=plague <= 0, population=population, acres=acres, harvested=harvested,
+                    rats_eaten=rats_eaten, bushels=bushels)
+
+        # 270 IF Z=11 THEN 860
+        if turn == 11:
+            break
+
+        # 310 C= RND (10)+1:Y=C+17
+        acres_cost = rng.randrange(10) + 1 + 17
+        buy_acres, sell_acres, feed_people, plant_acres = decide_turn(
+            population, bushels, acres, acres_cost, turn)
+        trace_event(game=game, event=hamurabi_log.DECISION, year=turn, land_value=acres_cost,
+                    buy=buy_acres, sell=sell_acres, feed=feed_people, plant=plant_acres)
+
+        # 322 IF Y*Q<=S THEN 330
+        # 330 PRINT : IF Q=0 THEN 340
+        # 342 IF Q<A THEN 350
+        assert acres_cost * buy_acres <= bushels, ('buy', buy_acres, bushels)
+        assert buy_acres == 0 or sell_acres == 0, ('sell', sell_acres)
+        assert sell_acres < acres, ('sell', sell_acres, acres)
+        # 331 A=A+Q:S=S-Y*Q:C=0
+        # 350 A=A-Q:S=S+Y*Q:C=0
+        acres = acres + buy_acres - sell_acres
+        bushels = bushels - acres_cost * buy_acres + acres_cost * sell_acres
+
+        # 420 IF Q<=S THEN 430
+        # 430 S=S-Q:C=1: PRINT
+        assert 0 <= feed_people <= bushels, ('feed', feed_people, bushels)
+        bushels -= feed_people
+
+        # 441 GOSUB 5000:D=O1: IF D=0 THEN 511
+        # 445 IF D<=A THEN 450
+        # 450 IF D/2<S THEN 455
+        # 455 IF D<=10*P THEN 510
+        # 510 S=S-D/2
+        if plant_acres:
+            assert 0 < plant_acres <= acres, ('plant', plant_acres, acres)
+            assert plant_acres // 2 < bushels, ('plant', plant_acres, bushels)
+            assert plant_acres <= 10 * population, ('plant', plant_acres, population)
+            bushels -= plant_acres // 2
+
+        # 511 GOSUB 800
+        # 515 Y=C:H=D*Y:E=0
+        # 800 C= RND (5)+1
+        harvested = rng.randrange(5) + 1
+        rats_eaten = 0
+
+        # 521 GOSUB 800
+        # 522 C9= RND (2): IF C9#1 THEN 530
+        # 525 E=S/C
+        rat_chance = rng.randrange(5) + 1
+        if rng.randrange(2) == 1:
+            rats_eaten = bushels // rat_chance
+        # 530 S=S-E+H
+        bushels = bushels - rats_eaten + plant_acres * harvested
+
+        # 531 GOSUB 800
+        # 533 A9=A/100:S9=S/100:I9=C*(20*A9+S9):I=I9/P
+        infants = (rng.randrange(5) + 1) * (20 * (acres // 100) + bushels // 100) // population
+
+        # 540 C=Q/20
+        full_tummies = feed_people // 20
+        # 542 Q= RND (20)-3
+        plague = rng.randrange(20) - 3
+
+        # 550 IF P<C THEN 210
+        starved = 0
+        if population >= full_tummies:
+            # 552 D=P-C: IF 10*D>4*P THEN 560
+            starved = population - full_tummies
+            if 10 * starved > 4 * population:
+                # recorded as by play_game, in the year of the report that never comes
+                last_turn = turn + 1
+                trace_event(game=game, event=hamurabi_log.STARVED_OUT, year=last_turn, starved=starved)
+                break
+            # 553 P1=((Z-1)*P1+D*100/P)/Z
+            # 555 P=C:D1=D1+D: GOTO 215
+            pct_starved = ((turn - 1) * pct_starved + starved * 100 // population) // turn
+            population = full_tummies
+            total_deaths += starved
+
+    if turn == 11:
+        # 860 PRINT "IN YOUR 10 YEAR TERM OF OFFICE ";P1
+        # 862 PRINT "AVERAGE, I.E., A TOTAL OF ";D1;" PEOPLE"
+        # 865 PRINT "DIED!!!":L=A/P
+        game_record.update({'pct_starved': pct_starved, 'total_deaths': total_deaths})
+        final_score = determine_local_final_score(pct_starved, acres // population)
+
+    game_record.update({
+        'datetime': datetime.datetime.now(),
+        'population': population,
+        'bushels': bushels,
+        'wealth': wealth,
+        'acres': acres,
+        'last_turn': turn if last_turn is None else last_turn,
+        'total_harvested': total_harvested,
+        'total_rats_eaten': total_rats_eaten,
+        'total_starved': total_starved,
+        'total_infants': total_infants,
+        'total_lost_to_plague': total_lost_to_plague,
+        'total_land_purchases': total_land_purchases,
+        'total_land_sales': total_land_sales,
+        'final_score': final_score
+    })
+    return game_record
+
+
+def determine_local_final_score(pct_starved, wealth):
+    # 880 IF P1>33 THEN 565
+    # 885 IF L<7 THEN 565
+    if pct_starved > 33 or wealth < 7:
+        return 0
+    # 890 IF P1>10 THEN 940
+    # 892 IF L<9 THEN 940
+    if pct_starved > 10 or wealth < 9:
+        return 1
+    # 895 IF P1>3 THEN 960
+    # 896 IF L<10 THEN 960
+    if pct_starved > 3 or wealth < 10:
+        return 2
+    return 3
+
+
+TOURNAMENT_CHUNK_SIZE = 1000
+
+
+def play_tournament_chunk(seed, chunk):
+    # every chunk of games has its own random stream, so that results are
+    # the same for any number of worker processes.  *chunk* is its number
+    # and its number of games, fewer than TOURNAMENT_CHUNK_SIZE in the last.
+    chunk, size = chunk
+    rng = random.Random(f'{seed}:{chunk}')
+    return [play_local_game(rng) for _ in range(size)]
+
+
+def tournament(games, seed=0, processes=None, log_filename='tournament_log.csv'):
+    """Play *games* games against the local rules engine, on every core."""
+    chunks = math.ceil(games / TOURNAMENT_CHUNK_SIZE)
+    scores = [0, 0, 0, 0]
+    with multiprocessing.Pool(processes) as pool, \
+            tqdm.tqdm(total=games, unit='games', unit_scale=True) as pbar:
+        results = pool.imap(functools.partial(play_tournament_chunk, seed),
+                            [(chunk, min(TOURNAMENT_CHUNK_SIZE, games - chunk * TOURNAMENT_CHUNK_SIZE))
+                             for chunk in range(chunks)])
+        for game_records in results:
+            save_game_log(*game_records, filename=log_filename)
+            for game_record in game_records:
+                scores[game_record['final_score']] += 1
+            pbar.update(len(game_records))
+    total_games = sum(scores)
+    for name, count in zip(('lost', 'ok', 'good', 'best'), scores):
+        print(f'{name:>5}: {count:,} ({count / total_games * 100:2.2f}%)')
+
+
+def check_report(previous, decision, report):
+    """Return the fields of a traced *report* differing from those accounted
+    for by the *previous* report and its *decision*, as checked by :func:`play_game`."""
+    population, acres = (95, 1000) if previous is None else (int(previous['population']), int(previous['acres']))
+    land_value, buy, sell, feed, plant = (0, 0, 0, 0, 1000) if decision is None else (
+        int(decision[name]) for name in ('land_value', 'buy', 'sell', 'feed', 'plant'))
+    starved, infants, harvested, rats_eaten = (int(report[name]) for name in (
+        'starved', 'infants', 'harvested', 'rats_eaten'))
+    lost_to_plague = int(math.ceil((population + infants - starved) / 2)) if report['plague'] else 0
+    bushels = harvested * plant - rats_eaten
+    if previous is not None:
+        bushels += int(previous['bushels']) + land_value * (sell - buy) - feed - plant // 2
+    expected = {'population': population + infants - lost_to_plague - starved,
+                'acres': acres + buy - sell,
+                'bushels': bushels}
+    return [f'{name} {int(report[name])}, expected {value}'
+            for name, value in expected.items() if int(report[name]) != value]
+
+
+def replay_trace(filename, game=None):
+    """Print the games of a trace written by :func:`play_game`, or only game number *game*.
+
+    Every report is checked against the report and decision of the year
+    before, and every decision against the one :func:`decide_turn` makes
+    now, so that lost games and failed asserts may be studied offline.
+    """
+    records = hamurabi_log.GameLog(filename, hamurabi_log.TRACE_DTYPE).records()
+    starts = numpy.unique(records['game'])
+    if game is not None:
+        starts = starts[[game]]
+    headers = ['year', 'pop', 'starved', 'infants', 'plague', 'acres', 'bushels', 'harvest',
+               'rats', 'value', 'buy', 'sell', 'feed', 'plant', 'problems']
+    for start in starts:
+        rows = []
+        report = decision = None
+        for event in records[records['game'] == start]:
+            year = int(event['year'])
+            if event['event'] == hamurabi_log.REPORT:
+                problems = check_report(report, decision, event)
+                report, decision = event, None
+                rows.append([year] + [int(event[name]) for name in (
+                    'population', 'starved', 'infants', 'plague', 'acres', 'bushels', 'harvested',
+                    'rats_eaten')] + [''] * 5 + ['; '.join(problems)])
+            elif event['event'] == hamurabi_log.DECISION:
+                decision = event
+                recorded = tuple(int(event[name]) for name in ('buy', 'sell', 'feed', 'plant'))
+                rows[-1][9:14] = (int(event['land_value']),) + recorded
+                if report is not None:
+                    expected = decide_turn(int(report['population']), int(report['bushels']),
+                                           int(report['acres']), int(event['land_value']), year)
+                    if expected != recorded:
+                        rows[-1][14] = '; '.join(filter(None, (rows[-1][14], f'decide_turn now {expected}')))
+            else:
+                rows.append([year] + [''] * 13 + [f"starved {int(event['starved'])}, impeached"])
+        print(f'game of {start}')
+        print(tabulate.tabulate(rows, headers=headers, tablefmt='rounded_outline', stralign='right'))
+
+
+def decide_turn(population, input_bushels, input_acres, acres_cost, turn):
+    # calculate land sales
+    sell_acres = calc_land_sales(population=population, given_bushels=input_bushels,
+                                 acres=input_acres, acres_cost=acres_cost,
+                                 turn=turn)
+
+    # calculate land purchases
+    buy_acres = 0
+    if sell_acres == 0:
+        buy_acres = calc_land_purchases(population=population, given_bushels=input_bushels + (sell_acres * acres_cost),
+                                        acres=input_acres - sell_acres,
+                                        acres_cost=acres_cost, turn=turn)
+
+    final_starting_bushels = input_bushels + (sell_acres * acres_cost) - (buy_acres * acres_cost)
+    final_acres = input_acres - sell_acres + buy_acres
+    # TODO: if plant_acres < final_acres, then, we should 0 out our buys and sell acres that we cannot plant!
+    plant_acres, feed_people = determine_food_distribution(final_starting_bushels, population, final_acres, turn)
+    return buy_acres, sell_acres, feed_people, plant_acres
+
 def determine_food_distribution(final_starting_bushels, population, final_acres, turn):
     # we can always starve 3% of our population without reprocussion !
     starve_people = (population * .03).__ceil__()
+    # and never starve more than all but that same 3%
+    most_starved = starve_people + max(0, population - 2 * starve_people)
+
+    # grain needed grows by 20 bushels for every person fed, the remainder
+    # is seed for our fields, needed whether anybody is fed or not.
+    seed_needed = calculate_grain_starved(population, population, final_acres, turn)
+
+    # starvation limit is 45% for the microsoft basic port, but
+    # for the integer basic (Apple 1) version, we calculate against
+    # an upscaled formula:
+    #     D=P-C: IF 10*d>4*P THEN 560
+    limit_starved = max(starve_people, -(-4 * population // 10))
+
+    # fewest people starved for a surplus of grain
+    surplus_starved = max(starve_people, (population * 20 + seed_needed - final_starting_bushels) // 20 + 1)
+
+    if starve_people >= most_starved:
+        # nobody to choose from.
+        pass
+    elif (min(limit_starved, surplus_starved) > starve_people
+            and final_starting_bushels - (population - starve_people) * 10 < 0):
+        # GAME FAILURE PREDICTED!
+        pass
+    elif min(limit_starved, surplus_starved) >= most_starved:
+        starve_people = most_starved
+    elif limit_starved <= surplus_starved:
+        # starvation limit reached.
+        starve_people = limit_starved - 1
+    else:
+        # surplus met.
+        starve_people = surplus_starved
 
-    for _ in range(starve_people, population - starve_people):
-        grain_needed = calculate_grain_starved(population, starve_people, final_acres, turn)
-        
-        # how many people can we starve?
-        feed_people = (population - starve_people) * 20
-        surplus = final_starting_bushels - grain_needed
-        disp_message = (f'surplus<{surplus}> = final_starting_bushels<{final_starting_bushels}> '
-                        f'- grain_needed<{grain_needed}>: ')
-
-        # starvation limit is 45% for the microsoft basic port, but
-        # for the integer basic (Apple 1) version, we calculate against
-        # an upscaled formula:
-        #     D=P-C: IF 10*d>4*P THEN 560
-        if 10 * starve_people >= 4 * population:
-            # print_calc(disp_message + f'starvation limit reached.\r')
-            starve_people -= 1
-            break
-
-        if surplus > 0:
-            # print_calc(disp_message + f'surplus met.\r')
-            break
+    feed_people = (population - starve_people) * 20
+    plant_acres = 0 if turn == 10 else min(population * 10, final_acres, ((final_starting_bushels - feed_people) * 2) - 1)
+    return plant_acres, feed_people
 
-        if final_starting_bushels - (feed_people // 2) < 0:
-            # print_calc(disp_message + f'GAME FAILURE PREDICTED!\r')
-            break
+def determine_food_distribution_batch(final_starting_bushels, population, final_acres, turn):
+    """Same as determine_food_distribution(), for numpy arrays of many games."""
+    final_starting_bushels, population, final_acres, turn = numpy.broadcast_arrays(
+        final_starting_bushels, population, final_acres, turn)
+    starve_people = numpy.ceil(population * .03).astype(population.dtype)
+    most_starved = starve_people + numpy.maximum(0, population - 2 * starve_people)
+    seed_needed = numpy.where(turn == 10, 0, numpy.minimum(final_acres, population * 10) // 2 + 1)
+    limit_starved = numpy.maximum(starve_people, -(-4 * population // 10))
+    surplus_starved = numpy.maximum(starve_people, (population * 20 + seed_needed - final_starting_bushels) // 20 + 1)
+    first_starved = numpy.minimum(limit_starved, surplus_starved)
+    starve_people = numpy.select(
+        [starve_people >= most_starved,
+         (first_starved > starve_people) & (final_starting_bushels - (population - starve_people) * 10 < 0),
+         first_starved >= most_starved,
+         limit_starved <= surplus_starved],
+        [starve_people, starve_people, most_starved, limit_starved - 1],
+        default=surplus_starved)
 
-        starve_people += 1
-    
     feed_people = (population - starve_people) * 20
-    plant_acres = 0 if turn == 10 else min(population * 10, final_acres, ((final_starting_bushels - feed_people) * 2) - 1)
+    plant_acres = numpy.where(turn == 10, 0, numpy.minimum(numpy.minimum(population * 10, final_acres),
+                                                           ((final_starting_bushels - feed_people) * 2) - 1))
     return plant_acres, feed_people
 
 def calculate_grain_target(population, acres, turn):
@@ -523,62 +1170,159 @@ def calculate_grain_starved(population, starve_people, acres, turn):
     return result
 
 def calc_land_sales(population, given_bushels, acres, acres_cost, turn):
-    sell_acres = 0
-    for sell_acres in range(0, acres + 1):
-        #bushels = given_bushels + (acres_cost * sell_acres)
+    def surplus_met(sell_acres):
         grain_needed = calculate_grain_target(population, acres - sell_acres, turn)
-        surplus = given_bushels + (sell_acres * acres_cost) - grain_needed 
-        disp_message = f'sell_acres={sell_acres} ? surplus<{surplus}> = given_bushels<{given_bushels}> + (sell_acres<{sell_acres}> * acres_cost<{acres_cost}>) - grain_needed<{grain_needed}>: '
-        # no need to sell land if there will be a surplus of food,
-        # but, never end up with less land than we can reasonable plant,
-        if surplus > 0:
-            # print_calc(disp_message + f'surplus met.\r')
-            break
-    assert sell_acres < acres + 1, sell_acres
+        surplus = given_bushels + (sell_acres * acres_cost) - grain_needed
+        return surplus > 0
+
+    # no need to sell land if there will be a surplus of food,
+    # but, never end up with less land than we can reasonable plant,
+    #
+    # each acre sold earns acres_cost bushels and saves at most 1 bushel
+    # of seed, so surplus only grows with every acre sold: bisect for the
+    # fewest acres sold that meet it, or sell everything when none does.
+    sell_acres = min(acres, bisect.bisect_left(range(0, acres + 1), True, key=surplus_met))
     return max(0, sell_acres)
 
 def calc_land_purchases(population, given_bushels, acres, acres_cost, turn):
     # we aggressively buy land, because rats cannot eat land!
     MAX_BUY_ACRES = 999
-    for buy_acres in range(0, MAX_BUY_ACRES + 2):
+
+    def surplus_spent(buy_acres):
         grain_needed = calculate_grain_target(population, acres + buy_acres, turn)
         surplus = given_bushels - grain_needed - (buy_acres * acres_cost)
-        disp_message = f'buy_acres={buy_acres} ? surplus<{surplus}> = given_bushels<{given_bushels} - grain_needed<{grain_needed}> - (buy_acres<{buy_acres}> * acres_cost<{acres_cost}>): '
+        return surplus < 0
 
-        # only buy land when there is a surplus of grain.
-        if surplus < 0:
-            # print_calc(disp_message + f'surplus met.\r')
-            buy_acres -= 1
-            break
+    # only buy land when there is a surplus of grain, which only shrinks with
+    # every acre bought: bisect for the first purchase that spends it all.
+    buy_acres = bisect.bisect_left(range(0, MAX_BUY_ACRES + 2), True, key=surplus_spent) - 1
     assert buy_acres <= MAX_BUY_ACRES, buy_acres
     return max(0, buy_acres)
 
 def determine_final_score(stream):
-    match = stream.expect_regex(MATCH_END_RATINGS)
-    for check_score, check_pattern in (
-                        (0, MATCH_NATIONAL_FINK),
-                        (1, MATCH_UNPLEASANT),
-                        (2, MATCH_NOT_TOO_BAD),
-                        (3, MATCH_FANTASTIC)):
-        if check_pattern[:20] in match.match:
-            return check_score
-    assert False, ("Score unmatched", match.match)
-
-
-def save_game_log(game_record):
+    return SEARCH_END_RATINGS.index(stream.expect(SEARCH_END_RATINGS).searcher)
+
+
+@dataclasses.dataclass
+class ScoreTally:
+    """Number of games of a game log ending with each final score, 0 to 3.
+
+    The tally is kept in a summary file beside the log, with the size of the
+    log counted, so that only the games logged since are read on loading.
+    """
+    filename: str = 'game_log.csv'
+    counts: list = dataclasses.field(default_factory=lambda: [0, 0, 0, 0])
+    offset: int = 0
+
+    @property
+    def summary_filename(self):
+        return self.filename + '.tally'
+
+    @classmethod
+    def load(cls, filename='game_log.csv'):
+        tally = cls(filename)
+        try:
+            with open(tally.summary_filename) as f:
+                summary = json.load(f)
+            tally.counts, tally.offset = summary['counts'], summary['offset']
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+        try:
+            with open(filename, newline='') as f:
+                fieldnames = next(csv.reader(f), None)
+                if tally.offset > f.seek(0, 2) or not fieldnames:
+                    # the log was replaced, count it again
+                    tally.counts, tally.offset = [0, 0, 0, 0], 0
+                f.seek(tally.offset)
+                if tally.offset == 0:
+                    f.readline()
+                for row in csv.DictReader(f, fieldnames=fieldnames):
+                    tally.counts[int(row['final_score'])] += 1
+                tally.offset = f.tell()
+        except FileNotFoundError:
+            tally.counts, tally.offset = [0, 0, 0, 0], 0
+        tally.save()
+        return tally
+
+    def save(self):
+        with open(self.summary_filename, 'w') as f:
+            json.dump({'counts': self.counts, 'offset': self.offset}, f)
+
+    def add(self, game_records, offset):
+        """Count *game_records*, logged up to *offset* bytes of the log."""
+        for game_record in game_records:
+            self.counts[int(game_record['final_score'])] += 1
+        self.offset = offset
+        self.save()
+
+    def table(self):
+        """Return the headers and rows of the table of games shown above the windows."""
+        total_games = sum(self.counts)
+        games_0, games_1, games_2, games_3 = self.counts
+        headers = ['total games', 'best', 'good', 'ok', 'lost']
+        table_data = [
+            [f'{total_games:,}', f'{games_3:,}', f'{games_2:,}', f'{games_1:,}', f'{games_0:,}'],
+            ['pct.',
+             (f'{(games_3/total_games)*100:2.1f}' if games_3 else '0') + '%',
+             (f'{(games_2/total_games)*100:2.1f}' if games_2 else '0') + '%',
+             (f'{(games_1/total_games)*100:2.1f}' if games_1 else '0') + '%',
+             (f'{(games_0/total_games)*100:2.1f}' if games_0 else '0') + '%',]]
+        return headers, table_data
+
+
+def save_game_log(*game_records, filename='game_log.csv', tally=None):
     fieldnames = [
             'datetime', 'final_score', 'wealth', 'pct_starved', 'population', 'bushels', 'acres',
             'last_turn', 'total_deaths', 'total_harvested', 'total_rats_eaten', 'total_starved', 'total_infants',
             'total_lost_to_plague', 'total_land_purchases', 'total_land_sales']
 
-    with open('game_log.csv', 'a') as f:
+    if filename.endswith(hamurabi_log.SUFFIX):
+        hamurabi_log.GameLog(filename).append(*game_records)
+        return
+    with open(filename, 'a') as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         if f.tell() == 0:
             writer.writeheader()
-        writer.writerow(game_record)
+        writer.writerows(game_records)
+        offset = f.tell()
+    if tally is not None:
+        tally.add(game_records, offset)
 
 if __name__ == '__main__':
-    main(repl='--repl' in sys.argv)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repl', action='store_true',
+                        help='HAMURABI.BAS is already loaded, just RUN it')
+    parser.add_argument('--device',
+                        help='serial device or pySerial URL, such as of apple1.py, default is to choose from /dev/cu.*')
+    parser.add_argument('--load-window', type=int, default=LOAD_WINDOW, metavar='BYTES',
+                        help='bytes of HAMURABI.BAS sent ahead of their echo while loading')
+    parser.add_argument('--script', default='apple1-HAMMURABI.TXT',
+                        help='WozMon script of HAMURABI.BAS, such as one compacted by wozmon.py')
+    parser.add_argument('--tournament', type=int, metavar='GAMES',
+                        help='play GAMES games against local rules, without hardware')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed of --tournament')
+    parser.add_argument('--processes', type=int,
+                        help='worker processes of --tournament, default is one for every core')
+    parser.add_argument('--trace', default='game_trace.hamlog',
+                        help='trace log of every turn of the games played against the Apple-1')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='JSON trace of the timings of the serial link, written on exit, see hamurabi_profile.py')
+    parser.add_argument('--replay', metavar='TRACE',
+                        help='print the games of a trace log, checking every turn again')
+    parser.add_argument('--game', type=int,
+                        help='number of the game of --replay, counting from 0, or back from -1')
+    parser.add_argument('--log', default='tournament_log.csv',
+                        help='game log written by --tournament, a binary log when ending in .hamlog')
+    args = parser.parse_args()
+    if args.replay:
+        replay_trace(args.replay, game=args.game)
+    elif args.tournament:
+        tournament(args.tournament, seed=args.seed, processes=args.processes,
+                   log_filename=args.log)
+    else:
+        main(repl=args.repl, load_window=args.load_window, script=args.script, trace=args.trace,
+             device=args.device, profile=args.profile)
 
 # todo:
 # - starvation can be increased to account for births, calculate "grand total"
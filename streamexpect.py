@@ -10,7 +10,20 @@ try:
 except ImportError:
     # For backward compatibility with Python2
     from collections import Sequence
+import asyncio
+import codecs
+import functools
+import io
+import os
 import re
+try:
+    from re import _compiler as sre_compile
+    from re import _parser as sre_parse
+except ImportError:
+    # Python < 3.11
+    import sre_compile
+    import sre_parse
+import selectors
 import six
 import socket
 import sys
@@ -24,6 +37,8 @@ __version__ = '0.3.0'
 class SequenceMatch(object):
     """Information about a match that has a concept of ordering."""
 
+    __slots__ = ('searcher', 'match', 'start', 'end')
+
     def __init__(self, searcher, match, start, end):
         """
         :param Searcher searcher: The :class:`Searcher` that found the match
@@ -43,7 +58,15 @@ class SequenceMatch(object):
 
 
 class RegexMatch(SequenceMatch):
-    """Information about a match from a regex."""
+    """Information about a match from a regex.
+
+    A match found by a :class:`RegexSearcher` holds the :class:`re.Match`
+    of the buffer searched, and copies the items and groups matched out of
+    it only when they are first used. Any group may be viewed in the buffer
+    without a copy by :func:`view`.
+    """
+
+    __slots__ = ('_re_match', '_match', '_groups', '_groupdict')
 
     def __init__(self, searcher, match, start, end, groups, groupdict):
         """
@@ -57,8 +80,72 @@ class RegexMatch(SequenceMatch):
                the named subgroups if the regex pattern contained them.
         """
         super(RegexMatch, self).__init__(searcher, match, start, end)
-        self.groups = groups
-        self.groupdict = groupdict
+        self._re_match = None
+        self._groups = groups
+        self._groupdict = groupdict
+
+    @classmethod
+    def of(cls, searcher, re_match):
+        """Return the match of *searcher* held by the :class:`re.Match` *re_match*"""
+        self = cls.__new__(cls)
+        self.searcher = searcher
+        self.start, self.end = re_match.span()
+        self._re_match = re_match
+        self._match = self._groups = self._groupdict = None
+        return self
+
+    @property
+    def match(self):
+        """Portion of sequence that triggered the match"""
+        if self._match is None and self._re_match is not None:
+            self._match = self._re_match.group()
+        return self._match
+
+    @match.setter
+    def match(self, value):
+        self._match = value
+
+    @property
+    def groups(self):
+        """All the subgroups of the match, see :func:`re.Match.groups`, with
+        the converters of the :class:`RegexSearcher` applied"""
+        if self._groups is None and self._re_match is not None:
+            groups = self._re_match.groups()
+            if self.searcher._converters:
+                groups = list(groups)
+                for index, converter in self.searcher._converters.items():
+                    if groups[index - 1] is not None:
+                        groups[index - 1] = converter(groups[index - 1])
+                groups = tuple(groups)
+            self._groups = groups
+        return self._groups
+
+    @property
+    def groupdict(self):
+        """All the named subgroups of the match, see :func:`re.Match.groupdict`,
+        with the converters of the :class:`RegexSearcher` applied"""
+        if self._groupdict is None and self._re_match is not None:
+            groupdict = self._re_match.groupdict()
+            for name, converter in self.searcher._named_converters.items():
+                if groupdict[name] is not None:
+                    groupdict[name] = converter(groupdict[name])
+            self._groupdict = groupdict
+        return self._groupdict
+
+    def view(self, group=0):
+        """Return the items matched by *group* without a copy, or ``None``.
+
+        A match of binary data views the buffer searched by a
+        :class:`memoryview`, which an :class:`Expecter` leaves unchanged
+        for as long as it is held.
+        """
+        start, end = self._re_match.span(group)
+        if start < 0:
+            return None
+        string = self._re_match.string
+        if isinstance(string, six.text_type):
+            return string[start:end]
+        return memoryview(string)[start:end]
 
     def __repr__(self):
         return '{}({!r}, match={!r}, start={}), end={}, groups={!r}, groupdict={!r}'.format(
@@ -70,6 +157,21 @@ class ExpectTimeout(Exception):
     """Exception raised when *expect* call exceeds a timeout."""
 
 
+class ExpectDiverged(ExpectTimeout):
+    """Exception raised when *expect* input diverges from a partial match.
+
+    Raised by :func:`BytesExpecter.expect` as soon as a partial match at
+    least *diverge* items long fails, rather than waiting out the timeout.
+    Its arguments are the history, the index in it of the failed partial
+    match, and the searcher.
+    """
+
+    def __str__(self):
+        history, index, searcher = self.args
+        return 'input diverged at {}: {!r}, from {!r}'.format(
+            index, history[index:], searcher)
+
+
 class Searcher(object):
     """Base class for searching buffers.
 
@@ -100,6 +202,45 @@ class Searcher(object):
         """
         raise NotImplementedError('search function must be provided')
 
+    def search_from(self, buf, pos, resume):
+        """Search the provided buffer from *pos* for a *match*.
+
+        Used by an :class:`Expecter` to search a growing buffer incrementally:
+        ``buf[pos:resume]`` was already searched, without a match. The result
+        is that of ``search(buf[pos:])``, with indices relative to *pos*.
+        Subclasses may skip the part of the buffer that cannot hold a new
+        match, this default implementation searches it all again.
+
+        :param buf: Buffer to search for a match, which may be a `bytearray`
+            when this *Searcher* matches bytes.
+        :param int pos: Index of the first item of *buf* to search.
+        :param int resume: Index of the first item of *buf* not yet searched.
+        """
+        return self.search(_window(buf, pos))
+
+    def partial_from(self, buf, pos):
+        """Return the index, relative to *pos*, from which a match may begin.
+
+        Used by an :class:`Expecter` after :func:`search_from` found no
+        match: whatever is received next, no match can begin at the items of
+        ``buf[pos:]`` before the index returned, so they need not be
+        searched again. This default implementation returns ``0``.
+
+        :param buf: Buffer searched without a match.
+        :param int pos: Index of the first item of *buf* searched.
+        """
+        return 0
+
+    def diverged(self, buf, pos, end, length):
+        """Return the index of a failed partial match at least *length* long.
+
+        The items of ``buf[pos:end]``, which :func:`partial_from` found can
+        not begin a match, are searched for one that began a partial match
+        of at least *length* items, returning its index in *buf*, or ``-1``
+        when there is none, as this default implementation does.
+        """
+        return -1
+
     @property
     def match_type(self):
         """Read-only property that returns type matched by this *Searcher*"""
@@ -162,7 +303,41 @@ class BytesSearcher(Searcher):
         else:
             start = idx
             end = idx + len(self._bytes)
-            return SequenceMatch(self, buf[start:end], start, end)
+            return SequenceMatch(self, self._bytes, start, end)
+
+    def search_from(self, buf, pos, resume):
+        """Search the provided buffer from *pos* for matching bytes.
+
+        Only the items from *resume* are searched, with an overlap of one
+        byte less than the pattern, see :func:`Searcher.search_from`.
+        """
+        if not isinstance(buf, (six.binary_type, bytearray)):
+            self._check_type(buf)
+        idx = buf.find(self._bytes, max(pos, resume - len(self._bytes) + 1))
+        if idx < 0:
+            return None
+        start = idx - pos
+        end = start + len(self._bytes)
+        return SequenceMatch(self, self._bytes, start, end)
+
+    def partial_from(self, buf, pos):
+        """Return the index, relative to *pos*, from which a match may begin.
+
+        That is the first of the last bytes of *buf* that are the beginning
+        of the pattern, see :func:`Searcher.partial_from`.
+        """
+        first = self._bytes[:1]
+        idx = buf.find(first, max(pos, len(buf) - len(self._bytes) + 1))
+        while idx >= 0 and not self._bytes.startswith(buf[idx:]):
+            idx = buf.find(first, idx + 1)
+        return (len(buf) if idx < 0 else idx) - pos
+
+    def diverged(self, buf, pos, end, length):
+        """Return the index of a failed partial match at least *length* long,
+        see :func:`Searcher.diverged`."""
+        if length >= len(self._bytes):
+            return -1
+        return buf.find(self._bytes[:length], pos, end + length - 1)
 
 
 class TextSearcher(Searcher):
@@ -229,14 +404,24 @@ class RegexSearcher(Searcher):
     will raise a `TypeError` on binary data.
     """
 
-    def __init__(self, pattern, regex_options=0):
+    def __init__(self, pattern, regex_options=0, converters=None):
         """
         :param pattern: The regex to search for, as a single compiled regex
             or a string that will be processed as a regex.
         :param regex_options: Options passed to the regex engine.
+        :param dict converters: Functions of group names or numbers, applied
+            to the bytes or text of the group in the *groups* and
+            *groupdict* of a match, such as ``{'YEAR': int}``.
         """
         super(RegexSearcher, self).__init__()
         self._regex = re.compile(pattern, regex_options)
+        self._max_width = _max_width(self._regex)
+        # converters of group numbers, for groups, and names, for groupdict
+        self._converters = {self._regex.groupindex.get(group, group): converter
+                            for group, converter in (converters or {}).items()}
+        self._named_converters = {name: self._converters[index]
+                                  for name, index in self._regex.groupindex.items()
+                                  if index in self._converters}
 
     def __repr__(self):
         return '{}(re.compile({!r}))'.format(self.__class__.__name__,
@@ -258,9 +443,218 @@ class RegexSearcher(Searcher):
         """
         match = self._regex.search(self._check_type(buf))
         if match is not None:
-            start = match.start()
-            end = match.end()
-            return RegexMatch(self, buf[start:end], start, end, match.groups(), match.groupdict())
+            return RegexMatch.of(self, match)
+
+    def search_from(self, buf, pos, resume):
+        """Search the provided buffer from *pos* for a match to the regex.
+
+        When the longest match of the regex is bounded, searching restarts
+        from the earliest index at which a match reaching into the items from
+        *resume* may begin, see :func:`Searcher.search_from`.
+        """
+        if isinstance(buf, bytearray):
+            if self.match_type is not six.binary_type:
+                self._check_type(buf)
+            window = memoryview(buf)[pos:]
+        else:
+            window = self._check_type(buf)[pos:]
+        restart = 0
+        if self._max_width is not None:
+            restart = max(0, resume - pos - self._max_width + 1)
+        match = self._regex.search(window, restart)
+        if match is not None:
+            return RegexMatch.of(self, match)
+
+    def partial_from(self, buf, pos):
+        """Return the index, relative to *pos*, from which a match may begin.
+
+        That is the first item from which the rest of *buf* is the beginning
+        of a match, found by :func:`_partial_regex`, see
+        :func:`Searcher.partial_from`. A regex holding an assertion or a
+        backreference returns ``0``.
+        """
+        partial, _ = _partial_regex(self._regex.pattern, self._regex.flags)
+        if partial is None:
+            return 0
+        return partial.search(buf, pos).start() - pos
+
+    def diverged(self, buf, pos, end, length):
+        """Return the index of a failed partial match at least *length* long,
+        see :func:`Searcher.diverged`.
+
+        Only the items at which the literal prefix of the regex is found are
+        tried, and when it is as long as *length*, none need be.
+        """
+        partial, prefix = _partial_regex(self._regex.pattern, self._regex.flags)
+        if partial is None or end <= pos:
+            return -1
+        if len(prefix) >= length:
+            return buf.find(prefix[:length], pos, end + length - 1)
+        idx = buf.find(prefix, pos, end + len(prefix) - 1)
+        while 0 <= idx <= len(buf) - length:
+            if partial.match(buf, idx, idx + length):
+                return idx
+            idx = buf.find(prefix, idx + 1, end + len(prefix) - 1)
+        return -1
+
+
+def _window(buf, pos):
+    """Return a copy of *buf* from *pos*, as bytes when *buf* is a bytearray"""
+    if isinstance(buf, bytearray):
+        return six.binary_type(buf[pos:])
+    return buf[pos:]
+
+
+def _search_from(searcher, buf, pos, resume):
+    """Call :func:`Searcher.search_from`, or *search* of a searcher without it"""
+    try:
+        search_from = searcher.search_from
+    except AttributeError:
+        return searcher.search(_window(buf, pos))
+    return search_from(buf, pos, resume)
+
+
+def _partial_from(searcher, buf, pos):
+    """Call :func:`Searcher.partial_from`, or return 0 for a searcher without it"""
+    try:
+        partial_from = searcher.partial_from
+    except AttributeError:
+        return 0
+    return partial_from(buf, pos)
+
+
+def _diverged(searcher, buf, pos, end, length):
+    """Call :func:`Searcher.diverged`, or return -1 for a searcher without it"""
+    try:
+        diverged = searcher.diverged
+    except AttributeError:
+        return -1
+    return diverged(buf, pos, end, length)
+
+
+def _opcodes(pattern):
+    """Recursively yield the opcodes of a parsed regex pattern"""
+    for op, av in pattern:
+        yield op
+        for item in (av if isinstance(av, (tuple, list)) else [av]):
+            if isinstance(item, sre_parse.SubPattern):
+                for y in _opcodes(item):
+                    yield y
+            elif isinstance(item, (tuple, list)):
+                for sub in item:
+                    if isinstance(sub, sre_parse.SubPattern):
+                        for y in _opcodes(sub):
+                            yield y
+
+
+def _max_width(regex):
+    """Return the length of the longest match of *regex*, if bounded.
+
+    Returns ``None`` when there is no bound, and also when the pattern holds
+    an assertion (lookaround, ``$`` or ``\\b``), which may depend on items
+    beyond the match and so on items yet to be received.
+    """
+    parsed = sre_parse.parse(regex.pattern, regex.flags)
+    if any(op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT, sre_parse.AT)
+           for op in _opcodes(parsed)):
+        return None
+    _, width = parsed.getwidth()
+    if width >= sre_parse.MAXREPEAT:
+        return None
+    return width
+
+
+@functools.lru_cache(maxsize=256)
+def _partial_regex(pattern, flags):
+    """Return a regex of the beginnings of the matches of a regex, and its literal prefix.
+
+    The regex returned matches from any item at which the rest of a buffer
+    is the beginning of a match of the regex *pattern*, so that no match can
+    begin before the first item it is found at, however the buffer grows.
+    It is built of the parsed pattern, and compiled only once for each
+    pattern. Returns ``None`` for a pattern of very many items, or holding
+    any item but those of :data:`_HANDLED`: an assertion or a backreference,
+    which may depend on items beyond the match, or any item unknown here,
+    so that its matches are never found to have diverged.
+    """
+    parsed = sre_parse.parse(pattern, flags)
+    if any(op not in _HANDLED for op in _opcodes(parsed)):
+        return None, None
+    prefix = []
+    if not parsed.state.flags & re.IGNORECASE:
+        for op, av in parsed:
+            if op is not sre_parse.LITERAL:
+                break
+            prefix.append(av)
+    if isinstance(pattern, six.binary_type):
+        prefix = six.binary_type(bytearray(prefix))
+    else:
+        prefix = ''.join(map(six.unichr, prefix))
+    items = _beginnings(parsed.state, list(parsed))
+    items.append((sre_parse.AT, sre_parse.AT_END_STRING))
+    try:
+        return sre_compile.compile(sre_parse.SubPattern(parsed.state, items)), prefix
+    except RecursionError:
+        # nested once for each item, too deep for so long a pattern
+        return None, None
+
+
+def _beginnings(state, items):
+    """Return parsed regex items matching the beginning of any match of *items*.
+
+    That is the first item, then the beginning of the rest, or else the
+    beginning of the first item, nested so that each item is matched once.
+    A run of literals is taken as one item.
+    """
+    units = []
+    for item in items:
+        if item[0] is sre_parse.LITERAL and units and units[-1][0][0] is sre_parse.LITERAL:
+            units[-1].append(item)
+        else:
+            units.append([item])
+    beginnings = []
+    for unit in reversed(units):
+        beginnings = [(sre_parse.BRANCH, (None, [sre_parse.SubPattern(state, unit + beginnings),
+                                                 sre_parse.SubPattern(state, _beginning(state, unit))]))]
+    return beginnings
+
+
+def _beginning(state, unit):
+    """Return parsed regex items matching the beginning of a match of *unit*,
+    a run of literals or a single item"""
+    op, av = unit[0]
+    if op is sre_parse.LITERAL:
+        return [(sre_parse.BRANCH, (None, [sre_parse.SubPattern(state, unit[:length])
+                                           for length in range(len(unit), -1, -1)]))]
+    if op is sre_parse.SUBPATTERN:
+        _, add_flags, del_flags, p = av
+        return [(sre_parse.SUBPATTERN, (None, add_flags, del_flags,
+                                        sre_parse.SubPattern(state, _beginnings(state, p))))]
+    if op is sre_parse.BRANCH:
+        return [(sre_parse.BRANCH, (None, [sre_parse.SubPattern(state, _beginnings(state, alternative))
+                                           for alternative in av[1]]))]
+    if op in _REPEATS:
+        _, high, p = av
+        if not high:
+            return []
+        more = high if high == sre_parse.MAXREPEAT else high - 1
+        return [(sre_parse.MAX_REPEAT, (0, more, p)),
+                (sre_parse.SUBPATTERN, (None, 0, 0, sre_parse.SubPattern(state, _beginnings(state, p))))]
+    if op is getattr(sre_parse, 'ATOMIC_GROUP', None):
+        return [(sre_parse.SUBPATTERN, (None, 0, 0, sre_parse.SubPattern(state, _beginnings(state, av))))]
+    # a single item, any of a set, or none
+    return [(sre_parse.MAX_REPEAT, (0, 1, sre_parse.SubPattern(state, unit)))]
+
+
+# possessive repeats (Python 3.11) may match fewer beginnings, never more
+_REPEATS = tuple(getattr(sre_parse, name) for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+                 if hasattr(sre_parse, name))
+
+# opcodes of the items of which _beginning() matches the beginnings, those
+# of a single item, of groups and alternations, and of repeats
+_HANDLED = frozenset(getattr(sre_parse, name) for name in (
+    'LITERAL', 'NOT_LITERAL', 'ANY', 'IN', 'RANGE', 'CATEGORY',
+    'SUBPATTERN', 'BRANCH', 'ATOMIC_GROUP') if hasattr(sre_parse, name)).union(_REPEATS)
 
 
 def _flatten(n):
@@ -333,6 +727,10 @@ class SearcherCollection(Searcher, list):
         :return: :class:`RegexMatch` if matched, None if no match was found.
         """
         self._check_type(buf)
+        # Each sub-searcher searches the buffer on its own: re tries every
+        # branch of an alternation at each index, as this loop does, and
+        # loses the scan for the literal prefix of each branch, so that one
+        # combined regex is slower, as is an automaton stepped in Python.
         best_match = None
         best_index = sys.maxsize
         for searcher in self:
@@ -342,6 +740,34 @@ class SearcherCollection(Searcher, list):
                 best_index = match.start
         return best_match
 
+    def search_from(self, buf, pos, resume):
+        """Search the provided buffer from *pos* for a match to any sub-searchers.
+
+        Each sub-searcher searches incrementally, see
+        :func:`Searcher.search_from`, and the match with the smallest index is
+        returned.
+        """
+        best_match = None
+        best_index = sys.maxsize
+        for searcher in self:
+            match = _search_from(searcher, buf, pos, resume)
+            if match and match.start < best_index:
+                best_match = match
+                best_index = match.start
+        return best_match
+
+    def partial_from(self, buf, pos):
+        """Return the index, relative to *pos*, from which a match of any
+        sub-searcher may begin, see :func:`Searcher.partial_from`."""
+        return min(_partial_from(searcher, buf, pos) for searcher in self)
+
+    def diverged(self, buf, pos, end, length):
+        """Return the index of the first failed partial match of any
+        sub-searcher at least *length* long, see :func:`Searcher.diverged`."""
+        found = [idx for idx in (_diverged(searcher, buf, pos, end, length) for searcher in self)
+                 if idx >= 0]
+        return min(found, default=-1)
+
 
 class StreamAdapter(object):
     """Adapter to match varying stream objects to a single interface.
@@ -504,6 +930,69 @@ class PollingSocketStreamAdapter(StreamAdapter, PollingStreamAdapterMixin):
             self.stream.settimeout(prev_timeout)
 
 
+class SelectStreamAdapter(StreamAdapter):
+    """A :class:`StreamAdapter` that waits on the file descriptor of a stream.
+
+    Blocks in :mod:`selectors` (epoll, poll or select, the best available)
+    until the stream is readable or the timeout is exceeded, then reads all
+    data available at once, without polling. Any stream with a file
+    descriptor may be used: serial ports, sockets, pipes and ptys.
+    """
+
+    def __init__(self, stream, max_read=4096):
+        """
+        :param stream: Stream to wait on, it must implement *fileno*.
+        :param int max_read: The maximum number of bytes/characters to read
+            from the stream at one time.
+        :raises ValueError: if *stream* has no file descriptor.
+        :raises OSError: if the file descriptor of *stream* cannot be waited
+            on, such as that of a regular file.
+        """
+        super(SelectStreamAdapter, self).__init__(stream)
+        self.max_read = int(max_read)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(stream, selectors.EVENT_READ)
+
+    def close(self):
+        self._selector.close()
+        self.stream.close()
+
+    def poll(self, timeout):
+        """
+        :param float timeout: Timeout in seconds.
+        """
+        end_time = time.time() + float(timeout)
+        while True:
+            remaining = end_time - time.time()
+            if remaining < 0:
+                raise ExpectTimeout()
+            if not self._selector.select(remaining):
+                continue
+            try:
+                incoming = self._read()
+            except BlockingIOError:
+                # woken without any data to read after all
+                continue
+            except OSError:
+                # a pty raises EIO once its other end is closed
+                incoming = b''
+            if incoming:
+                return incoming
+            # End of stream, nothing more can arrive before the timeout
+            time.sleep(max(0, end_time - time.time()))
+
+    def _read(self):
+        """Read the data available without blocking."""
+        if hasattr(self.stream, 'recv'):
+            return self.stream.recv(self.max_read)
+        if hasattr(self.stream, 'in_waiting'):
+            # pyserial
+            return self.stream.read(min(max(self.stream.in_waiting, 1), self.max_read))
+        if hasattr(self.stream, 'read1'):
+            return self.stream.read1(self.max_read)
+        return os.read(self.stream.fileno(), self.max_read)
+
+
 class ExpectBytesMixin(object):
 
     def expect_bytes(self, b, timeout=3):
@@ -647,10 +1136,10 @@ class BytesExpecter(Expecter, ExpectBytesMixin, ExpectRegexMixin):
         """
         super(BytesExpecter, self).__init__(stream_adapter, input_callback,
                                             window, close_adapter)
-        self._history = six.binary_type()
+        self._history = bytearray()
         self._start = 0
 
-    def expect(self, searcher, timeout=3):
+    def expect(self, searcher, timeout=3, diverge=None):
         """Wait for input matching *searcher*
 
         Waits for input matching *searcher* for up to *timeout* seconds. If
@@ -659,33 +1148,75 @@ class BytesExpecter(Expecter, ExpectBytesMixin, ExpectRegexMixin):
         found within *timeout* seconds, raise an :class:`ExpectTimeout`
         exception.
 
+        Received bytes are appended to the history in place, and each search
+        only covers what *searcher* has not yet searched, see
+        :func:`Searcher.search_from`. Bytes at which no match can begin any
+        more are not searched again, see :func:`Searcher.partial_from`.
+        A failed partial match is found by the time it has grown by half
+        again, or by *diverge* bytes, and before the timeout is raised.
+
         :param Searcher searcher: :class:`Searcher` to apply to underlying
             stream.
         :param float timeout: Timeout in seconds.
+        :param int diverge: When given, a partial match at least this many
+            bytes long which then fails raises :class:`ExpectDiverged` at
+            once, for input that began as expected and went astray.
         """
         timeout = float(timeout)
         end = time.time() + timeout
-        match = searcher.search(self._history[self._start:])
+        pos = self._start
+        match = _search_from(searcher, self._history, pos, pos)
+        stride = 0
         while not match:
+            if stride <= 0:
+                pos, stride = self._skip(searcher, pos, diverge)
             # poll() will raise ExpectTimeout if time is exceeded
             try:
                 incoming = self._stream_adapter.poll(end - time.time())
             except ExpectTimeout:
-                raise ExpectTimeout(self._history)
-            self.input_callback(incoming)
-            self._history += incoming
-            match = searcher.search(self._history[self._start:])
-            trimlength = len(self._history) - self._window
-            if trimlength > 0:
-                self._start -= trimlength
-                self._history = self._history[trimlength:]
-
+                self._skip(searcher, pos, diverge)
+                raise ExpectTimeout(six.binary_type(self._history))
+            stride -= len(incoming)
+            match, pos = self._receive(searcher, incoming, pos)
+
+        # indices of the match are of the history from where it was expected
+        match.start += pos - self._start
+        match.end += pos - self._start
         self._start += match.end
-        if (self._start < 0):
-            self._start = 0
 
         return match
 
+    def _skip(self, searcher, pos, diverge):
+        """Return *pos* past the bytes at which no match can begin, and the
+        number of bytes to receive before looking again"""
+        skip = pos + _partial_from(searcher, self._history, pos)
+        if diverge and skip > pos:
+            idx = _diverged(searcher, self._history, pos, skip, diverge)
+            if idx >= 0:
+                raise ExpectDiverged(six.binary_type(self._history), idx, searcher)
+        # A partial match is looked at again once it has grown by half, or
+        # by *diverge* bytes, so that each byte is matched a few times.
+        return skip, min(max(1, (len(self._history) - skip) // 2), diverge or sys.maxsize)
+
+    def _receive(self, searcher, incoming, pos):
+        """Add *incoming* to the history, and search it from *pos* with *searcher*"""
+        self.input_callback(incoming)
+        resume = len(self._history)
+        try:
+            self._history += incoming
+        except BufferError:
+            # viewed by a match still held, which keeps it as it is
+            self._history = self._history + incoming
+        # The history is only trimmed back to the window once it has
+        # grown to twice its size, so that each byte is copied once.
+        trimlength = len(self._history) - self._window
+        if trimlength > self._window:
+            self._start = max(0, self._start - trimlength)
+            pos = max(0, pos - trimlength)
+            resume = max(pos, resume - trimlength)
+            self._history = self._history[trimlength:]
+        return _search_from(searcher, self._history, pos, resume), pos
+
 
 class TextExpecter(Expecter, ExpectTextMixin, ExpectRegexMixin):
     """:class:`Expecter` interface for searching a text-oriented stream."""
@@ -727,13 +1258,199 @@ class TextExpecter(Expecter, ExpectTextMixin, ExpectRegexMixin):
                 incoming = self._stream_adapter.poll(end - time.time())
             except ExpectTimeout:
                 raise ExpectTimeout(self._history)
-            self.input_callback(incoming)
-            self._history += incoming
-            match = searcher.search(self._history[self._start:])
-            trimlength = len(self._history) - self._window
-            if trimlength > 0:
-                self._start -= trimlength
-                self._history = self._history[trimlength:]
+            match = self._receive(searcher, incoming)
+
+        self._start += match.end
+        if (self._start < 0):
+            self._start = 0
+
+        return match
+
+    def _receive(self, searcher, incoming):
+        """Add *incoming* to the history, and search it with *searcher*"""
+        self.input_callback(incoming)
+        self._history += incoming
+        match = searcher.search(self._history[self._start:])
+        trimlength = len(self._history) - self._window
+        if trimlength > 0:
+            self._start -= trimlength
+            self._history = self._history[trimlength:]
+        return match
+
+
+class AsyncStreamAdapter(StreamAdapter):
+    """A :class:`StreamAdapter` reading an :class:`asyncio.StreamReader`.
+
+    Its :func:`poll` method is a coroutine, for use by an
+    :class:`AsyncBytesExpecter` or :class:`AsyncTextExpecter`. Any attributes
+    not part of this class are delegated to the *writer*, when given, so that
+    the adapter may be written to like the stream.
+    """
+
+    def __init__(self, reader, writer=None, max_read=4096, encoding=None):
+        """
+        :param asyncio.StreamReader reader: Reader to receive data from.
+        :param asyncio.StreamWriter writer: Writer of the same stream, closed
+            with the adapter.
+        :param int max_read: The maximum number of bytes to read at one time.
+        :param str encoding: Encoding to decode the bytes read to text, for
+            an :class:`AsyncTextExpecter`.
+        """
+        super(AsyncStreamAdapter, self).__init__(writer or reader)
+        self.reader = reader
+        self.max_read = int(max_read)
+        self._decoder = None
+        if encoding:
+            self._decoder = codecs.getincrementaldecoder(encoding)()
+
+    def close(self):
+        if self.stream is not self.reader:
+            self.stream.close()
+
+    async def poll(self, timeout):
+        """
+        :param float timeout: Timeout in seconds.
+        """
+        loop = asyncio.get_running_loop()
+        end_time = loop.time() + float(timeout)
+        while True:
+            try:
+                incoming = await asyncio.wait_for(
+                    self.reader.read(self.max_read), max(0, end_time - loop.time()))
+            except asyncio.TimeoutError:
+                raise ExpectTimeout()
+            if not incoming:
+                # End of stream, nothing more can arrive before the timeout
+                await asyncio.sleep(max(0, end_time - loop.time()))
+                raise ExpectTimeout()
+            if self._decoder is None:
+                return incoming
+            incoming = self._decoder.decode(incoming)
+            # an incomplete character waits for the rest of its bytes
+            if incoming:
+                return incoming
+
+
+class AsyncFileDescriptorAdapter(AsyncStreamAdapter):
+    """An :class:`AsyncStreamAdapter` of a stream with a file descriptor.
+
+    The file descriptor is watched by the event loop with
+    :func:`asyncio.loop.add_reader`, and all data available is read into an
+    :class:`asyncio.StreamReader` whenever it is readable. Suits serial
+    ports, pipes and ptys, which asyncio does not otherwise open as streams.
+    Any attributes not part of this class are delegated to the stream.
+    """
+
+    def __init__(self, stream, max_read=4096, encoding=None):
+        """
+        :param stream: Stream to read from, it must implement *fileno*. Must
+            be created from a coroutine, within the running event loop.
+        :param int max_read: The maximum number of bytes to read at one time.
+        :param str encoding: Encoding to decode the bytes read to text, for
+            an :class:`AsyncTextExpecter`.
+        """
+        super(AsyncFileDescriptorAdapter, self).__init__(
+            asyncio.StreamReader(), max_read=max_read, encoding=encoding)
+        self.stream = stream
+        self._fd = stream.fileno()
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._fd, self._on_readable)
+
+    def _on_readable(self):
+        try:
+            incoming = os.read(self._fd, self.max_read)
+        except BlockingIOError:
+            return
+        except OSError:
+            # a pty raises EIO once its other end is closed
+            incoming = b''
+        if incoming:
+            self.reader.feed_data(incoming)
+        else:
+            self._loop.remove_reader(self._fd)
+            self.reader.feed_eof()
+
+    def close(self):
+        self._loop.remove_reader(self._fd)
+        self.stream.close()
+
+
+class AsyncExpecterMixin(object):
+    """Add asynchronous context management to an :class:`Expecter`"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type_, value, traceback):
+        return self.__exit__(type_, value, traceback)
+
+
+class AsyncBytesExpecter(AsyncExpecterMixin, BytesExpecter):
+    """:class:`BytesExpecter` of an :class:`AsyncStreamAdapter`.
+
+    The *expect*, *expect_bytes* and *expect_regex* methods return awaitables
+    of the same match results, so that one event loop may wait on many
+    streams at once::
+
+        match = await expecter.expect_regex(rb'LAND IS TRADING AT (\\d+)')
+    """
+
+    async def expect(self, searcher, timeout=3, diverge=None):
+        """Wait for input matching *searcher*, see :func:`BytesExpecter.expect`
+
+        :param Searcher searcher: :class:`Searcher` to apply to underlying
+            stream.
+        :param float timeout: Timeout in seconds.
+        :param int diverge: Length of a failed partial match raising
+            :class:`ExpectDiverged`.
+        """
+        loop = asyncio.get_running_loop()
+        end = loop.time() + float(timeout)
+        pos = self._start
+        match = _search_from(searcher, self._history, pos, pos)
+        stride = 0
+        while not match:
+            if stride <= 0:
+                pos, stride = self._skip(searcher, pos, diverge)
+            try:
+                incoming = await self._stream_adapter.poll(end - loop.time())
+            except ExpectTimeout:
+                self._skip(searcher, pos, diverge)
+                raise ExpectTimeout(six.binary_type(self._history))
+            stride -= len(incoming)
+            match, pos = self._receive(searcher, incoming, pos)
+
+        # indices of the match are of the history from where it was expected
+        match.start += pos - self._start
+        match.end += pos - self._start
+        self._start += match.end
+
+        return match
+
+
+class AsyncTextExpecter(AsyncExpecterMixin, TextExpecter):
+    """:class:`TextExpecter` of an :class:`AsyncStreamAdapter` decoding text.
+
+    The *expect*, *expect_text* and *expect_regex* methods return awaitables
+    of the same match results.
+    """
+
+    async def expect(self, searcher, timeout=3):
+        """Wait for input matching *searcher*, see :func:`TextExpecter.expect`
+
+        :param Searcher searcher: :class:`Searcher` to apply to underlying
+            stream.
+        :param float timeout: Timeout in seconds.
+        """
+        loop = asyncio.get_running_loop()
+        end = loop.time() + float(timeout)
+        match = searcher.search(self._history[self._start:])
+        while not match:
+            try:
+                incoming = await self._stream_adapter.poll(end - loop.time())
+            except ExpectTimeout:
+                raise ExpectTimeout(self._history)
+            match = self._receive(searcher, incoming)
 
         self._start += match.end
         if (self._start < 0):
@@ -750,6 +1467,28 @@ def _echo_bytes(value):
     sys.stdout.write(value.decode('ascii', errors='backslashreplace'))
 
 
+def _input_callback(unicode, echo, fn_echo):
+    """Return the *input_callback* of an :class:`Expecter` made by wrap"""
+    if fn_echo is not None:
+        return fn_echo
+    if echo:
+        return _echo_text if unicode else _echo_bytes
+    return None
+
+
+def _selectable(stream):
+    """Return whether *stream* is a binary stream that selectors may wait on"""
+    if isinstance(stream, io.TextIOBase):
+        return False
+    try:
+        with selectors.DefaultSelector() as selector:
+            selector.register(stream, selectors.EVENT_READ)
+    except (OSError, ValueError):
+        # no file descriptor, or one of a regular file
+        return False
+    return True
+
+
 def wrap(stream, unicode=False, window=1024, echo=False, close_stream=True,
         fn_echo=None):
     """Wrap a stream to implement expect functionality.
@@ -779,21 +1518,21 @@ def wrap(stream, unicode=False, window=1024, echo=False, close_stream=True,
     :param bool echo: If ``True``, echoes received characters to stdout.
     :param bool close_stream: If ``True``, and the wrapper is used as a context
         manager, closes the stream at the end of the context manager.
+
+    Streams with a file descriptor that may be waited on, such as serial
+    ports, sockets, pipes and ptys, are read by a :class:`SelectStreamAdapter`,
+    any other stream is polled.
     """
-    if hasattr(stream, 'read'):
+    if _selectable(stream):
+        proxy = SelectStreamAdapter(stream)
+    elif hasattr(stream, 'read'):
         proxy = PollingStreamAdapter(stream)
     elif hasattr(stream, 'recv'):
         proxy = PollingSocketStreamAdapter(stream)
     else:
         raise TypeError('stream must have either read or recv method')
 
-    if (echo or fn_echo) and unicode:
-        callback = fn_echo if fn_echo is not None else _echo_text
-    elif (echo or fn_echo) and not unicode:
-        callback = fn_echo if fn_echo is not None else _echo_bytes
-    else:
-        callback = None
-
+    callback = _input_callback(unicode, echo, fn_echo)
     if unicode:
         expecter = TextExpecter(proxy, input_callback=callback, window=window,
                                 close_adapter=close_stream)
@@ -804,14 +1543,75 @@ def wrap(stream, unicode=False, window=1024, echo=False, close_stream=True,
     return expecter
 
 
+def async_wrap(stream, unicode=False, window=1024, echo=False,
+               close_stream=True, fn_echo=None, encoding='utf-8'):
+    """Wrap a stream to implement awaitable expect functionality.
+
+    Like :func:`wrap`, but returns an :class:`AsyncBytesExpecter` or
+    :class:`AsyncTextExpecter`, and must be called from a coroutine. The
+    stream may be an :class:`asyncio.StreamReader`, a pair of reader and
+    writer as returned by :func:`asyncio.open_connection`, or any stream
+    with a file descriptor, such as a serial port, pipe or pty, which is then
+    watched by the running event loop::
+
+        import asyncio
+        import socket
+        import streamexpect
+
+        async def main():
+            source, drain = socket.socketpair()
+            expecter = streamexpect.async_wrap(
+                await asyncio.open_connection(sock=drain))
+            source.sendall(b'this is a test')
+            match = await expecter.expect_bytes(b'test', timeout=5)
+
+            assert match is not None
+
+        asyncio.run(main())
+
+    :param stream: The stream, reader, or reader and writer to wrap.
+    :param bool unicode: If ``True``, the wrapper will be configured for
+        Unicode matching, otherwise matching will be done on binary.
+    :param int window: Historical characters to buffer.
+    :param bool echo: If ``True``, echoes received characters to stdout.
+    :param bool close_stream: If ``True``, and the wrapper is used as a context
+        manager, closes the stream at the end of the context manager.
+    :param str encoding: Encoding of the stream, when *unicode* is ``True``.
+    """
+    encoding = encoding if unicode else None
+    if isinstance(stream, asyncio.StreamReader):
+        proxy = AsyncStreamAdapter(stream, encoding=encoding)
+    elif isinstance(stream, tuple):
+        proxy = AsyncStreamAdapter(*stream, encoding=encoding)
+    elif hasattr(stream, 'fileno'):
+        proxy = AsyncFileDescriptorAdapter(stream, encoding=encoding)
+    else:
+        raise TypeError('stream must be a StreamReader, a pair of reader and '
+                        'writer, or have a fileno method')
+
+    callback = _input_callback(unicode, echo, fn_echo)
+    if unicode:
+        expecter = AsyncTextExpecter(proxy, input_callback=callback,
+                                     window=window, close_adapter=close_stream)
+    else:
+        expecter = AsyncBytesExpecter(proxy, input_callback=callback,
+                                      window=window, close_adapter=close_stream)
+
+    return expecter
+
+
 __all__ = [
     # Functions
     'wrap',
+    'async_wrap',
 
     # Expecter types
     'Expecter',
     'BytesExpecter',
     'TextExpecter',
+    'AsyncBytesExpecter',
+    'AsyncTextExpecter',
+    'AsyncExpecterMixin',
 
     # Searcher types
     'Searcher',
@@ -828,8 +1628,12 @@ __all__ = [
     'StreamAdapter',
     'PollingStreamAdapter',
     'PollingSocketStreamAdapter',
+    'SelectStreamAdapter',
+    'AsyncStreamAdapter',
+    'AsyncFileDescriptorAdapter',
     'PollingStreamAdapterMixin',
 
     # Exceptions
     'ExpectTimeout',
+    'ExpectDiverged',
 ]
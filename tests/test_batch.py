@@ -0,0 +1,54 @@
+"""
+Equivalence of hamurabi_batch.py with the rules of hamurabi.py.
+
+Each game of :func:`hamurabi_batch.simulate` is played again by
+:func:`hamurabi.step`, replaying its random tape, by the same policy.
+"""
+import dataclasses
+
+import numpy
+import pytest
+
+import hamurabi
+import hamurabi_batch
+
+GAMES = 500
+
+
+def trading_policy(state):
+    """Buy land cheap and sell it dear, and starve most of the city when land
+    is cheapest, for games lost in every year."""
+    buy = numpy.where(state.land_value < 20, state.bushels // 4 // state.land_value, 0)
+    sell = numpy.where(state.land_value > 24, state.acres // 10, 0)
+    bushels = state.bushels + state.land_value * (sell - buy)
+    feed = numpy.minimum(bushels, numpy.where(state.land_value == 17, state.population * 8, state.population * 20))
+    plant = numpy.minimum(numpy.minimum(state.acres + buy - sell, state.population * 10), (bushels - feed) * 2)
+    return buy, sell, feed, plant
+
+
+def step_decision(policy, state):
+    """Return the decision of the batch *policy* in the :class:`hamurabi.GameState` *state*."""
+    row = hamurabi_batch.BatchState(
+        year=state.year, active=numpy.array([True]),
+        **{field.name: numpy.array([getattr(state, field.name)])
+           for field in dataclasses.fields(hamurabi_batch.BatchState) if field.name not in ('year', 'active')})
+    amounts = hamurabi_batch.legal_decision(row, *(numpy.asarray(value, dtype=numpy.int64) for value in policy(row)))
+    return hamurabi.Decision(*(int(amount[0]) for amount in amounts))
+
+
+@pytest.mark.parametrize('policy', [hamurabi_batch.steady_policy, trading_policy])
+def test_simulate_step(policy):
+    result = hamurabi_batch.simulate(policy, games=GAMES, seed=1, chunk_size=128)
+    for game in range(GAMES):
+        rng = hamurabi.ReplayRng(hamurabi_batch.game_tape(1, game))
+        state = hamurabi.initial_state(rng)
+        while not state.finished:
+            state, _ = hamurabi.step(state, step_decision(policy, state), rng)
+        assert (result.score[game], result.last_year[game], result.population[game], result.bushels[game],
+                result.acres[game], result.pct_starve[game], result.total_dead[game]) == (
+            hamurabi.final_score(state), state.year - state.impeached, state.population, state.bushels,
+            state.acres, state.pct_starve, state.total_dead), game
+        # every number of the tape is drawn by a game played to its end
+        assert state.impeached or rng.position == hamurabi_batch.TAPE_LENGTH
+    if policy is trading_policy:
+        assert 0 < (result.last_year < 10).sum() < GAMES
@@ -0,0 +1,160 @@
+"""
+Tests of hamurabi_log.py: the game log, written as CSV or binary by
+``save_game_log`` of play-hamurabi-vs-apple-1.py, and read back, and the
+trace of every turn, replayed by ``replay_trace``.
+"""
+import datetime
+import importlib.util
+import os
+import random
+import time
+
+import numpy
+import pytest
+
+import hamurabi_log
+
+AUTOPLAYER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'play-hamurabi-vs-apple-1.py')
+
+
+@pytest.fixture(scope='module')
+def player():
+    # not importable by name, for the dashes of its file name
+    spec = importlib.util.spec_from_file_location('autoplayer', AUTOPLAYER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='module')
+def game_records(player):
+    rng = random.Random(0)
+    game_records = [player.play_local_game(rng) for _ in range(200)]
+    # as recorded of a game lost to starvation, without the totals of line 860
+    del game_records[7]['pct_starved'], game_records[7]['total_deaths']
+    # and of a game ending on the second, its datetime written without a fraction
+    game_records[8]['datetime'] = game_records[8]['datetime'].replace(microsecond=0)
+    return game_records
+
+
+def expected(game_record, name):
+    value = game_record.get(name)
+    if value is None:
+        return hamurabi_log.missing(hamurabi_log.DTYPE.fields[name][0])
+    if isinstance(value, datetime.datetime):
+        return numpy.datetime64(value, 'us')
+    return value
+
+
+def check_records(records, game_records):
+    assert len(records) == len(game_records)
+    for record, game_record in zip(records, game_records):
+        for name in hamurabi_log.DTYPE.names:
+            assert record[name] == expected(game_record, name), name
+
+
+def test_csv_round_trip(player, game_records, tmp_path):
+    csv_filename, filename = str(tmp_path / 'game_log.csv'), str(tmp_path / 'game_log.hamlog')
+    # in two writes, as save_game_log appends
+    player.save_game_log(*game_records[:50], filename=csv_filename)
+    player.save_game_log(*game_records[50:], filename=csv_filename)
+    log = hamurabi_log.GameLog(filename)
+    assert log.import_csv(csv_filename, chunk_size=64) == len(game_records)
+    check_records(log.records(), game_records)
+    assert numpy.array_equal(numpy.concatenate(list(hamurabi_log.read_chunks(csv_filename, 64))), log.records())
+    assert numpy.array_equal(numpy.concatenate(list(hamurabi_log.read_chunks(filename, 64))), log.records())
+
+    # as written by save_game_log itself
+    direct = str(tmp_path / 'direct.hamlog')
+    player.save_game_log(*game_records[:50], filename=direct)
+    player.save_game_log(*game_records[50:], filename=direct)
+    assert numpy.array_equal(hamurabi_log.GameLog(direct).records(), log.records())
+    assert os.path.getsize(direct) == os.path.getsize(filename)
+
+
+def test_truncated(game_records, tmp_path):
+    filename = str(tmp_path / 'game_log.hamlog')
+    log = hamurabi_log.GameLog(filename)
+    log.append(*game_records[:10])
+    size = os.path.getsize(filename)
+    # a crash in the middle of the last record
+    with open(filename, 'r+b') as f:
+        f.truncate(size - hamurabi_log.DTYPE.itemsize // 2)
+    check_records(log.records(), game_records[:9])
+
+    # reopened, the record cut short is overwritten
+    log.append(*game_records[10:12])
+    assert os.path.getsize(filename) == size + hamurabi_log.DTYPE.itemsize
+    check_records(log.records(), game_records[:9] + game_records[10:12])
+
+
+def test_empty(game_records, tmp_path):
+    log = hamurabi_log.GameLog(str(tmp_path / 'game_log.hamlog'))
+    assert len(log) == 0
+    log.append()
+    assert len(log) == 0
+    log.append(game_records[0])
+    check_records(log.records(), game_records[:1])
+
+
+def test_other_file(game_records, tmp_path):
+    filename = str(tmp_path / 'game_log.hamlog')
+    hamurabi_log.GameLog(filename, hamurabi_log.TRACE_DTYPE).append({'year': 1})
+    with pytest.raises(ValueError):
+        hamurabi_log.GameLog(filename).append(game_records[0])
+    csv_filename = str(tmp_path / 'game_log.csv')
+    with open(csv_filename, 'w') as f:
+        f.write('datetime,final_score\n')
+    with pytest.raises(ValueError):
+        hamurabi_log.GameLog(csv_filename).records()
+
+
+def test_trace_replay(player, monkeypatch, capsys, tmp_path):
+    decide_turn = player.decide_turn
+
+    def starve_cheap_year_3(population, bushels, acres, acres_cost, turn):
+        # a decision replay_trace makes again, losing some games
+        buy_acres, sell_acres, feed_people, plant_acres = decide_turn(population, bushels, acres, acres_cost, turn)
+        return buy_acres, sell_acres, 0 if (turn, acres_cost) == (3, 18) else feed_people, plant_acres
+
+    monkeypatch.setattr(player, 'decide_turn', starve_cheap_year_3)
+    filename = str(tmp_path / 'game_trace.hamlog')
+    rng = random.Random(1)
+    with hamurabi_log.TraceWriter(filename) as tracer:
+        game_records = []
+        for _ in range(30):
+            game_records.append(player.play_local_game(rng, trace=tracer))
+            # each game is told apart by the time it began
+            time.sleep(.002)
+
+    records = hamurabi_log.GameLog(filename, hamurabi_log.TRACE_DTYPE).records()
+    starts = numpy.unique(records['game'])
+    assert len(starts) == len(game_records)
+    lost = 0
+    for start, game_record in zip(starts, game_records):
+        events = records[records['game'] == start]
+        reports = events[events['event'] == hamurabi_log.REPORT]
+        previous = decision = None
+        for event in events:
+            if event['event'] == hamurabi_log.REPORT:
+                assert player.check_report(previous, decision, event) == []
+                previous, decision = event, None
+            elif event['event'] == hamurabi_log.DECISION:
+                decision = event
+        assert int(events[-1]['year']) == game_record['last_turn']
+        if events[-1]['event'] == hamurabi_log.STARVED_OUT:
+            lost += 1
+            assert game_record['final_score'] == 0
+            assert len(reports) == game_record['last_turn'] - 1
+        else:
+            assert len(reports) == 11
+            assert (int(reports[-1]['population']), int(reports[-1]['acres']), int(reports[-1]['bushels'])) == (
+                game_record['population'], game_record['acres'], game_record['bushels'])
+    assert 0 < lost < len(game_records)
+
+    player.replay_trace(filename)
+    out = capsys.readouterr().out
+    assert out.count('game of') == len(game_records)
+    assert out.count('impeached') == lost
+    assert 'expected' not in out and 'decide_turn now' not in out
@@ -0,0 +1,124 @@
+"""
+Tests of hamurabi_solver.py: its grid, the interpolation between the points
+of it, the menu of decisions, and the policy table solved on a coarse grid.
+"""
+import dataclasses
+import itertools
+import random
+
+import numpy
+import pytest
+
+import hamurabi
+import hamurabi_solver
+
+GRID = hamurabi_solver.Grid()
+# few enough points to solve from the seventh year in about a second
+COARSE = hamurabi_solver.Grid(population=100, bushels=5000, acres=1000, pct_starve=50)
+
+
+def random_states(seed, count=2000):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield dataclasses.replace(
+            hamurabi.initial_state(rng), year=rng.randint(1, 10), population=rng.randint(1, 300),
+            bushels=rng.randint(0, 20000), acres=rng.randint(0, 5000), pct_starve=rng.uniform(0, 45))
+
+
+@pytest.fixture(scope='module')
+def solved():
+    initial = dataclasses.replace(hamurabi.initial_state(random.Random(0)), year=7)
+    return initial, hamurabi_solver.solve(COARSE, processes=2, initial=initial)
+
+
+def test_pack_unpack():
+    rng = numpy.random.default_rng(0)
+    steps = numpy.array([rng.integers(0, 1000, 500) for _ in range(4)])
+    spacing = numpy.array(dataclasses.astuple(GRID))[:, None]
+    assert numpy.array_equal(GRID.unpack(GRID.pack(*steps * spacing)), steps)
+    # between the points, the nearest of them
+    assert numpy.array_equal(GRID.unpack(GRID.pack(*(steps + rng.uniform(-.4, .4, steps.shape)) * spacing)), steps)
+
+
+def test_cell():
+    rng = numpy.random.default_rng(1)
+    measures = [rng.uniform(0, 20000, 500) for _ in range(4)]
+    packed, fractions = GRID.cell(*measures)
+    lowest = GRID.unpack(packed)
+    for measure, step, low, fraction in zip(measures, dataclasses.astuple(GRID), lowest, fractions):
+        assert numpy.all((0 <= fraction) & (fraction < 1))
+        assert numpy.allclose((low + fraction) * step, measure)
+    # at a point of the grid, that point, the lowest corner of its cell
+    points = [numpy.floor(measure / step) * step for measure, step in zip(measures, dataclasses.astuple(GRID))]
+    packed, fractions = GRID.cell(*points)
+    assert numpy.array_equal(packed, GRID.pack(*points))
+    assert not numpy.any(fractions)
+
+
+def test_interpolate():
+    rng = numpy.random.default_rng(2)
+    # one row of cells for each state, of three decisions, as in _decide
+    values = rng.uniform(0, 3, (100, 3, 16))
+    fractions = [rng.uniform(0, 1, (100, 3)) for _ in range(4)]
+    interpolated = hamurabi_solver.interpolate(values, fractions)
+    assert interpolated.shape == (100, 3)
+    # a weighted mean of the corners, its weights summing to one
+    assert numpy.allclose(hamurabi_solver.interpolate(numpy.ones_like(values), fractions), 1)
+    assert numpy.all((values.min(axis=-1) <= interpolated + 1e-12) & (interpolated <= values.max(axis=-1) + 1e-12))
+    # exact at each of the CORNERS, in their order
+    for index, corner in enumerate(itertools.product((0, 1), repeat=4)):
+        at_corner = [numpy.full((100, 3), float(upper)) for upper in corner]
+        assert numpy.allclose(hamurabi_solver.interpolate(values, at_corner), values[..., index])
+
+
+def test_corners():
+    # the corner of each of the CORNERS, one step up across the measures of its bits
+    for offset, corner in zip(hamurabi_solver.CORNERS, itertools.product((0, 1), repeat=4)):
+        assert GRID.unpack(numpy.int64(5 << 48 | 5 << 32 | 5 << 16 | 5) + offset) == tuple(
+            5 + upper for upper in corner)
+
+
+def test_menu_legal():
+    for state in random_states(seed=3):
+        decisions = hamurabi_solver.decision_menu(state)
+        assert len(decisions) == len(hamurabi_solver.TRADES) * len(hamurabi_solver.STARVED)
+        for decision in decisions:
+            hamurabi.check_decision(state, decision)
+
+
+def test_solve(solved):
+    initial, policy = solved
+    assert {key[0] for key in policy} == {7, 8, 9}
+    assert set(policy.values()) <= set(range(len(hamurabi_solver.TRADES) * len(hamurabi_solver.STARVED)))
+    # every corner of the cell of the initial state is solved, for every land value
+    assert all((7, *point) in policy for point in itertools.product(
+        range(1, 3), range(0, 2), range(1, 3), hamurabi_solver.LAND_VALUES, range(0, 2)))
+
+
+def test_policy_table(solved, tmp_path):
+    initial, policy = solved
+    filename = tmp_path / 'hamurabi.policy'
+    hamurabi_solver.save_policy(filename, COARSE, policy)
+    table = hamurabi_solver.PolicyTable(filename)
+    assert table.grid == COARSE
+    assert table.policy == policy
+
+    # the games played from the seventh year are decided by the table, but
+    # for states beyond the points solved
+    rng = random.Random(4)
+    decided = 0
+    for _ in range(20):
+        state = initial
+        while not state.finished:
+            decision = table.decision(state)
+            decided += decision is not None
+            state, _ = hamurabi.step(state, decision or hamurabi_solver.decision_menu(state)[0], rng)
+    assert decided
+    assert table.decision(dataclasses.replace(initial, year=1)) is None
+
+
+def test_policy_table_magic(tmp_path):
+    filename = tmp_path / 'game_log.csv'
+    filename.write_bytes(b'datetime,population\r\n')
+    with pytest.raises(ValueError):
+        hamurabi_solver.PolicyTable(filename)
@@ -0,0 +1,147 @@
+"""
+Equivalence of the strategy of play-hamurabi-vs-apple-1.py with the loops it replaced.
+
+The loops are kept here, as they were, as reference implementations, and
+both are called with the same random arguments, including those failing
+their assertions.
+"""
+import importlib.util
+import os
+import random
+
+import numpy
+import pytest
+
+AUTOPLAYER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'play-hamurabi-vs-apple-1.py')
+CASES = 5000
+
+
+@pytest.fixture(scope='module')
+def player():
+    # not importable by name, for the dashes of its file name
+    spec = importlib.util.spec_from_file_location('autoplayer', AUTOPLAYER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def outcome(fn, *args):
+    """Return the result of *fn*, or the type of the exception it raises."""
+    try:
+        return fn(*args)
+    except AssertionError:
+        return AssertionError
+
+
+def food_distribution_arguments(seed):
+    rng = random.Random(seed)
+    for _ in range(CASES):
+        # starving all but 3% is only a choice for a handful of people
+        population = rng.choice([rng.randint(1, 10), rng.randint(1, 300)])
+        # bushels short of feeding anybody, up to enough to feed and plant for everyone
+        yield (rng.randint(-100, population * 25 + 1000), population, rng.randint(0, 3000), rng.randint(1, 10))
+
+
+def land_trade_arguments(seed):
+    rng = random.Random(seed)
+    for _ in range(CASES):
+        # bushels up to many times any purchase, to reach MAX_BUY_ACRES
+        yield (rng.randint(1, 300), rng.choice([rng.randint(0, 5000), rng.randint(0, 60000)]),
+               rng.randint(0, 2000), rng.randint(17, 27), rng.randint(1, 10))
+
+
+def reference_food_distribution(player, final_starting_bushels, population, final_acres, turn):
+    starve_people = (population * .03).__ceil__()
+    for _ in range(starve_people, population - starve_people):
+        grain_needed = player.calculate_grain_starved(population, starve_people, final_acres, turn)
+        feed_people = (population - starve_people) * 20
+        surplus = final_starting_bushels - grain_needed
+        if 10 * starve_people >= 4 * population:
+            starve_people -= 1
+            break
+        if surplus > 0:
+            break
+        if final_starting_bushels - (feed_people // 2) < 0:
+            break
+        starve_people += 1
+    feed_people = (population - starve_people) * 20
+    plant_acres = 0 if turn == 10 else min(population * 10, final_acres, ((final_starting_bushels - feed_people) * 2) - 1)
+    return plant_acres, feed_people
+
+
+def reference_land_sales(player, population, given_bushels, acres, acres_cost, turn):
+    sell_acres = 0
+    for sell_acres in range(0, acres + 1):
+        grain_needed = player.calculate_grain_target(population, acres - sell_acres, turn)
+        surplus = given_bushels + (sell_acres * acres_cost) - grain_needed
+        if surplus > 0:
+            break
+    assert sell_acres < acres + 1, sell_acres
+    return max(0, sell_acres)
+
+
+def reference_land_purchases(player, population, given_bushels, acres, acres_cost, turn):
+    MAX_BUY_ACRES = 999
+    for buy_acres in range(0, MAX_BUY_ACRES + 2):
+        grain_needed = player.calculate_grain_target(population, acres + buy_acres, turn)
+        surplus = given_bushels - grain_needed - (buy_acres * acres_cost)
+        if surplus < 0:
+            buy_acres -= 1
+            break
+    assert buy_acres <= MAX_BUY_ACRES, buy_acres
+    return max(0, buy_acres)
+
+
+def test_determine_food_distribution(player):
+    distributions = [player.determine_food_distribution(*args) for args in food_distribution_arguments(seed=3)]
+    references = [reference_food_distribution(player, *args) for args in food_distribution_arguments(seed=3)]
+    assert distributions == references
+
+
+def test_determine_food_distribution_batch(player):
+    arguments = list(food_distribution_arguments(seed=4))
+    plant_acres, feed_people = player.determine_food_distribution_batch(*numpy.array(arguments).T)
+    distributions = [player.determine_food_distribution(*args) for args in arguments]
+    assert list(zip(plant_acres.tolist(), feed_people.tolist())) == distributions
+    starved = [population - feed // 20 for (_, population, _, _), (_, feed) in zip(arguments, distributions)]
+    # the arguments reach populations of a handful, and the limit of 10*D>4*P,
+    # where starving one more person loses the game
+    assert any(population < 10 for _, population, _, _ in arguments)
+    assert any(population >= 10 and 10 * (each + 1) > 4 * population
+               for (_, population, _, _), each in zip(arguments, starved))
+
+
+def test_calc_land_sales(player):
+    sales = [outcome(player.calc_land_sales, *args) for args in land_trade_arguments(seed=1)]
+    references = [outcome(reference_land_sales, player, *args) for args in land_trade_arguments(seed=1)]
+    assert sales == references
+    # the arguments reach sales of none, some and all of the land
+    assert 0 in references
+    assert any(0 < reference for reference in references)
+    assert any(args[2] and reference == args[2]
+               for args, reference in zip(land_trade_arguments(seed=1), references))
+
+
+def test_calc_land_purchases(player):
+    purchases = [outcome(player.calc_land_purchases, *args) for args in land_trade_arguments(seed=2)]
+    references = [outcome(reference_land_purchases, player, *args) for args in land_trade_arguments(seed=2)]
+    assert purchases == references
+    # the arguments reach the assertion of MAX_BUY_ACRES, as well as purchases short of it
+    assert AssertionError in references
+    assert any(isinstance(reference, int) and 0 < reference < 999 for reference in references)
+
+
+def test_play_local_game_starved_out(player, monkeypatch):
+    # feeding nobody in year 3, the loss is recorded in year 4, as play_game finds it
+    decide_turn = player.decide_turn
+
+    def starve_in_year_3(population, bushels, acres, acres_cost, turn):
+        buy_acres, sell_acres, feed_people, plant_acres = decide_turn(population, bushels, acres, acres_cost, turn)
+        return buy_acres, sell_acres, 0 if turn == 3 else feed_people, plant_acres
+
+    monkeypatch.setattr(player, 'decide_turn', starve_in_year_3)
+    record = player.play_local_game(random.Random(0))
+    assert record['last_turn'] == 4
+    assert record['final_score'] == 0
+    assert 'pct_starved' not in record
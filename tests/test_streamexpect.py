@@ -0,0 +1,444 @@
+"""
+Tests of streamexpect.py: the beginnings of matches found by its searchers,
+the divergence of input from them, and the expecters of sockets and ptys.
+
+The beginnings are checked against brute force, every completion of a few
+items of the rest of a buffer tried for a match.
+"""
+import asyncio
+import functools
+import io
+import itertools
+import os
+import random
+import re
+import socket
+import threading
+import time
+import tty
+
+import pytest
+
+import streamexpect
+
+ALPHABET = b'abc'
+# every completion of up to 5 items, enough for a match of each pattern below
+COMPLETIONS = [bytes(items) for length in range(6) for items in itertools.product(ALPHABET, repeat=length)]
+
+PATTERNS = [
+    # literals
+    b'abc', b'abcab', b'(?i)AbC',
+    # classes
+    b'a[bc]c', b'[^a]b', b'a.c', b'[^b]\\wa',
+    # alternation
+    b'ab|bc', b'a(b|ca)c',
+    # repeats
+    b'ab{2,3}c', b'a+b', b'(ab)*c', b'a*?b', b'a?bc', b'ca{0}b',
+    # groups
+    b'(?P<x>ab)(c)', b'(?:a(?:b))c',
+]
+if hasattr(re, 'NOFLAG'):
+    # atomic groups and possessive repeats, of Python 3.11
+    PATTERNS += [b'(?>ab)c', b'a++b', b'(?:ab)?+c']
+
+# never found to diverge, for they may depend on items beyond the match
+UNHANDLED = [b'a(?=b)', b'a(?!b)c', b'(?<=c)ab', b'(?<!c)ab', b'(a)b\\1', b'(a)?(?(1)b|c)', b'ab$', b'\\bab']
+
+
+class ChunkAdapter(streamexpect.StreamAdapter):
+    """Receives *chunks* one at a time, then times out."""
+
+    def __init__(self, chunks):
+        super(ChunkAdapter, self).__init__(None)
+        self.chunks = list(chunks)
+
+    def poll(self, timeout):
+        if not self.chunks:
+            raise streamexpect.ExpectTimeout()
+        return self.chunks.pop(0)
+
+
+def viable(regex, rest):
+    """Whether *rest* is the beginning of a match of *regex*."""
+    return any(regex.match(rest + completion) for completion in COMPLETIONS)
+
+
+def unmatched_buffers(regex, seed, count=150):
+    """Yield random buffers holding no match of *regex*, and a position in each."""
+    rng = random.Random(seed)
+    while count:
+        buf = bytes(rng.choice(ALPHABET) for _ in range(rng.randint(0, 8)))
+        if regex.search(buf) is None:
+            count -= 1
+            yield buf, rng.randint(0, len(buf))
+
+
+@pytest.mark.parametrize('pattern', PATTERNS)
+def test_partial_from(pattern):
+    regex = re.compile(pattern)
+    searcher = streamexpect.RegexSearcher(pattern)
+    for buf, pos in unmatched_buffers(regex, seed=pattern):
+        expected = next(idx for idx in range(pos, len(buf) + 1) if viable(regex, buf[idx:]))
+        assert searcher.partial_from(buf, pos) == expected - pos, (buf, pos)
+        assert searcher.partial_from(bytearray(buf), pos) == expected - pos, (buf, pos)
+
+
+@pytest.mark.parametrize('pattern', PATTERNS)
+def test_diverged(pattern):
+    regex = re.compile(pattern)
+    searcher = streamexpect.RegexSearcher(pattern)
+    for length in range(1, 5):
+        for buf, pos in unmatched_buffers(regex, seed=pattern + bytes([length])):
+            end = pos + searcher.partial_from(buf, pos)
+            expected = next((idx for idx in range(pos, min(end, len(buf) - length + 1))
+                             if viable(regex, buf[idx:idx + length])), -1)
+            assert searcher.diverged(buf, pos, end, length) == expected, (buf, pos, length)
+
+
+def test_literal_searcher():
+    searcher = streamexpect.BytesSearcher(b'abcab')
+    regex = re.compile(re.escape(b'abcab'))
+    for buf, pos in unmatched_buffers(regex, seed=0):
+        expected = next(idx for idx in range(pos, len(buf) + 1) if viable(regex, buf[idx:]))
+        assert searcher.partial_from(buf, pos) == expected - pos, (buf, pos)
+        for length in range(1, 5):
+            assert searcher.diverged(buf, pos, expected, length) == next(
+                (idx for idx in range(pos, min(expected, len(buf) - length + 1))
+                 if viable(regex, buf[idx:idx + length])), -1), (buf, pos, length)
+
+
+def test_text_pattern():
+    searcher = streamexpect.RegexSearcher('YEAR ([0-9]+),')
+    assert searcher.partial_from('IN YEAR 1', 0) == 3
+    assert searcher.partial_from('IN YEAR 1 ', 0) == 10
+    assert searcher.diverged('IN YEAR 1 ', 0, 10, 6) == 3
+    assert searcher.diverged('IN YEAR 1 ', 0, 10, 7) == -1
+
+
+@pytest.mark.parametrize('pattern', UNHANDLED)
+def test_unhandled(pattern):
+    assert streamexpect._partial_regex(pattern, 0) == (None, None)
+    searcher = streamexpect.RegexSearcher(pattern)
+    assert searcher.partial_from(b'cccab', 0) == 0
+    assert searcher.diverged(b'abcab', 0, 5, 1) == -1
+
+
+def test_collection():
+    searcher = streamexpect.SearcherCollection(
+        streamexpect.BytesSearcher(b'abc'), streamexpect.RegexSearcher(b'ca+b'))
+    # the earliest of either
+    assert searcher.partial_from(b'bbcaa', 0) == 2
+    assert searcher.partial_from(b'bbcaa', 4) == 0
+    assert searcher.partial_from(b'abbcac', 0) == 5
+    assert searcher.diverged(b'abbcac', 0, 5, 2) == 0
+    assert searcher.diverged(b'abbcac', 1, 5, 2) == 3
+    assert searcher.diverged(b'abbcac', 1, 5, 3) == -1
+
+
+@pytest.mark.parametrize('searcher', [streamexpect.BytesSearcher(b'HAMURABI:  '),
+                                      streamexpect.RegexSearcher(b'HAMURABI: +[A-Z]')])
+def test_expect_diverged(searcher):
+    stream = streamexpect.BytesExpecter(ChunkAdapter([b'\rHAMU', b'RABI', b': 1', b'23']))
+    with pytest.raises(streamexpect.ExpectDiverged) as raised:
+        stream.expect(searcher, diverge=4)
+    history, index, _ = raised.value.args
+    assert history.startswith(b'\rHAMURABI:') and index == 1
+
+    # short of a partial match of *diverge* bytes, the timeout
+    stream = streamexpect.BytesExpecter(ChunkAdapter([b'\rHAM', b'\rHAM']))
+    with pytest.raises(streamexpect.ExpectTimeout) as raised:
+        stream.expect(searcher, diverge=4)
+    assert type(raised.value) is streamexpect.ExpectTimeout
+
+
+def test_expect_unhandled_timeout():
+    stream = streamexpect.BytesExpecter(ChunkAdapter([b'HAMURABI:', b'  HAMURABI: X']))
+    with pytest.raises(streamexpect.ExpectTimeout) as raised:
+        stream.expect(streamexpect.RegexSearcher(b'HAMURABI: +(?=[0-9])'), diverge=2)
+    assert type(raised.value) is streamexpect.ExpectTimeout
+
+
+async def async_endpoints(kind, **kwargs):
+    """Return an expecter of :func:`streamexpect.async_wrap` reading a
+    socketpair or pty, and functions writing to and closing its other end."""
+    if kind == 'socketpair':
+        source, drain = socket.socketpair()
+        expecter = streamexpect.async_wrap(await asyncio.open_connection(sock=drain), **kwargs)
+        return expecter, source.sendall, source.close
+    master, slave = os.openpty()
+    # no echo, nor any translation of line endings
+    tty.setraw(slave)
+    expecter = streamexpect.async_wrap(os.fdopen(master, 'rb', buffering=0), **kwargs)
+    return expecter, functools.partial(os.write, slave), functools.partial(os.close, slave)
+
+
+async def write_parts(write, *parts):
+    for part in parts:
+        write(part)
+        await asyncio.sleep(.05)
+
+
+@pytest.mark.parametrize('kind', ['socketpair', 'pty'])
+def test_async_split_match(kind):
+    async def main():
+        received = []
+        expecter, write, close = await async_endpoints(kind, fn_echo=received.append)
+        async with expecter:
+            writer = asyncio.ensure_future(write_parts(write, b'IN YE', b'AR 3, 1', b'2 PEOPLE STARVED,\r'))
+            match = await expecter.expect_regex(rb'YEAR (?P<YEAR>[0-9]+), ([0-9]+) PEOPLE', timeout=5)
+            await writer
+            close()
+        return match, received
+
+    match, received = asyncio.run(main())
+    assert len(received) >= 3
+    assert match.match == b'YEAR 3, 12 PEOPLE'
+    assert (match.start, match.end) == (3, 20)
+    assert match.groups == (b'3', b'12')
+    assert match.groupdict == {'YEAR': b'3'}
+
+
+@pytest.mark.parametrize('kind', ['socketpair', 'pty'])
+def test_async_converters(kind):
+    async def main():
+        expecter, write, close = await async_endpoints(kind)
+        async with expecter:
+            searcher = streamexpect.RegexSearcher(rb'YEAR (?P<YEAR>[0-9]+), ([0-9]+) PEOPLE',
+                                                  converters={'YEAR': int, 2: int})
+            writer = asyncio.ensure_future(write_parts(write, b'IN YEAR 1', b'0, 7 PEOPLE', b' STARVED'))
+            first = await expecter.expect(searcher, timeout=5)
+            # the rest, from the end of the first match
+            rest = await expecter.expect_bytes(b'STARVED', timeout=5)
+            await writer
+            close()
+        return first, rest
+
+    first, rest = asyncio.run(main())
+    assert first.groups == (10, 7)
+    assert first.groupdict == {'YEAR': 10}
+    assert (rest.start, rest.end) == (1, 8)
+
+
+@pytest.mark.parametrize('kind', ['socketpair', 'pty'])
+def test_async_timeout(kind):
+    async def main():
+        expecter, write, close = await async_endpoints(kind)
+        async with expecter:
+            write(b'HAMURABI:  ')
+            started = time.monotonic()
+            with pytest.raises(streamexpect.ExpectTimeout) as raised:
+                await expecter.expect_bytes(b'SO LONG FOR NOW', timeout=.3)
+            elapsed = time.monotonic() - started
+            close()
+        return raised.value, elapsed
+
+    error, elapsed = asyncio.run(main())
+    assert error.args == (b'HAMURABI:  ',)
+    assert .3 <= elapsed < 3
+
+
+@pytest.mark.parametrize('kind', ['socketpair', 'pty'])
+def test_async_eof(kind):
+    async def main():
+        expecter, write, close = await async_endpoints(kind)
+        async with expecter:
+            write(b'HAMURABI')
+            await asyncio.sleep(.05)
+            close()
+            started = time.monotonic()
+            # nothing more arrives, the timeout is waited out
+            with pytest.raises(streamexpect.ExpectTimeout) as raised:
+                await expecter.expect_bytes(b'HAMURABI:', timeout=.3)
+            elapsed = time.monotonic() - started
+        return raised.value, elapsed
+
+    error, elapsed = asyncio.run(main())
+    assert type(error) is streamexpect.ExpectTimeout
+    assert error.args == (b'HAMURABI',)
+    assert .3 <= elapsed < 3
+
+
+@pytest.mark.parametrize('kind', ['socketpair', 'pty'])
+def test_async_text(kind):
+    async def main():
+        expecter, write, close = await async_endpoints(kind, unicode=True)
+        async with expecter:
+            # a character split across reads waits for the rest of its bytes
+            writer = asyncio.ensure_future(write_parts(write, b"EN L'ANN\xc3", b'\x89E 7,'))
+            match = await expecter.expect_regex('ANN\u00c9E ([0-9]+),', timeout=5)
+            await writer
+            close()
+        return match
+
+    match = asyncio.run(main())
+    assert match.match == 'ANN\u00c9E 7,'
+    assert match.groups == ('7',)
+
+
+def endpoints(kind):
+    """Return the reading end of a socketpair, pty or pipe, and functions
+    writing to and closing its other end."""
+    if kind == 'socketpair':
+        source, drain = socket.socketpair()
+        return drain, source.sendall, source.close
+    if kind == 'pty':
+        master, slave = os.openpty()
+        tty.setraw(slave)
+    else:
+        master, slave = os.pipe()
+    # non-blocking, for a PollingStreamAdapter
+    os.set_blocking(master, False)
+    return os.fdopen(master, 'rb', buffering=0), functools.partial(os.write, slave), functools.partial(os.close, slave)
+
+
+@pytest.mark.parametrize('kind', ['socketpair', 'pty', 'pipe'])
+def test_wrap_selects(kind):
+    stream, _, close = endpoints(kind)
+    with streamexpect.wrap(stream) as expecter:
+        assert type(expecter.stream_adapter) is streamexpect.SelectStreamAdapter
+    close()
+    with streamexpect.wrap(io.BytesIO(b'HAMURABI')) as expecter:
+        assert type(expecter.stream_adapter) is streamexpect.PollingStreamAdapter
+
+
+@pytest.mark.parametrize('kind', ['pty', 'pipe'])
+@pytest.mark.parametrize('adapter', [streamexpect.SelectStreamAdapter, streamexpect.PollingStreamAdapter])
+def test_poll(adapter, kind):
+    stream, write, close = endpoints(kind)
+    proxy = adapter(stream, max_read=4)
+    # what is available, up to max_read
+    write(b'HAMURABI')
+    assert proxy.poll(1) == b'HAMU'
+    assert proxy.poll(1) == b'RABI'
+    write(b':')
+    assert proxy.poll(1) == b':'
+    started = time.monotonic()
+    with pytest.raises(streamexpect.ExpectTimeout):
+        proxy.poll(.2)
+    assert .2 <= time.monotonic() - started < 2
+
+    # any part written while waiting
+    timer = threading.Timer(.1, write, [b'  '])
+    timer.start()
+    started = time.monotonic()
+    assert proxy.poll(2) == b'  '
+    assert time.monotonic() - started < 1
+    timer.join()
+    close()
+    stream.close()
+
+
+@pytest.mark.parametrize('kind', ['socketpair', 'pty', 'pipe'])
+def test_select_eof(kind):
+    stream, write, close = endpoints(kind)
+    with streamexpect.wrap(stream) as expecter:
+        write(b'HAMURABI')
+        close()
+        started = time.monotonic()
+        # what was written before, then nothing more before the timeout
+        with pytest.raises(streamexpect.ExpectTimeout) as raised:
+            expecter.expect_bytes(b'HAMURABI:', timeout=.2)
+        assert .2 <= time.monotonic() - started < 2
+    assert raised.value.args == (b'HAMURABI',)
+
+
+@pytest.mark.parametrize('kind', ['socketpair', 'pty', 'pipe'])
+def test_expect_split_match(kind):
+    stream, write, close = endpoints(kind)
+    received = []
+    with streamexpect.wrap(stream, fn_echo=received.append) as expecter:
+        timers = [threading.Timer(delay, write, [part]) for delay, part in
+                  ((.05, b'IN YE'), (.1, b'AR 3, 1'), (.15, b'2 PEOPLE STARVED,\r'))]
+        for timer in timers:
+            timer.start()
+        match = expecter.expect_regex(rb'YEAR ([0-9]+), ([0-9]+) PEOPLE', timeout=5)
+        for timer in timers:
+            timer.join()
+        close()
+    assert len(received) >= 3
+    assert match.groups == (b'3', b'12')
+
+
+class WholeSearcher(streamexpect.Searcher):
+    """Searches the whole window of the history again for each item received,
+    by *search* of *searcher* alone."""
+
+    def __init__(self, searcher):
+        self.searcher = searcher
+
+    @property
+    def match_type(self):
+        return self.searcher.match_type
+
+    def search(self, buf):
+        return self.searcher.search(buf)
+
+
+FUZZ_SEARCHERS = [
+    lambda: streamexpect.BytesSearcher(b'ab'),
+    lambda: streamexpect.BytesSearcher(b'a\rab'),
+    lambda: streamexpect.RegexSearcher(b'a+b'),
+    lambda: streamexpect.RegexSearcher(b'(ab|ba)a'),
+    lambda: streamexpect.RegexSearcher(b'a[ab]{2}\r'),
+    lambda: streamexpect.RegexSearcher(b'(?P<first>b)[^\r]*?a\r'),
+    lambda: streamexpect.RegexSearcher(b'(?<=a)bb'),
+    lambda: streamexpect.RegexSearcher(b'ab$'),
+    lambda: streamexpect.SearcherCollection(
+        streamexpect.BytesSearcher(b'bba'), streamexpect.RegexSearcher(b'\r(a|b){3}')),
+]
+
+
+def expect_all(searcher, chunks, window):
+    """Return each match found by expecting *searcher* until the timeout, and
+    the history then."""
+    expecter = streamexpect.BytesExpecter(ChunkAdapter(chunks), window=window)
+    matches = []
+    while True:
+        try:
+            match = expecter.expect(searcher)
+        except streamexpect.ExpectTimeout as error:
+            return matches, error.args
+        groups = getattr(match, 'groups', None)
+        matches.append((match.start, match.end, bytes(match.match),
+                        groups and tuple(group and bytes(group) for group in groups)))
+
+
+@pytest.mark.parametrize('make_searcher', FUZZ_SEARCHERS)
+def test_incremental_search(make_searcher):
+    rng = random.Random(repr(make_searcher()))
+    for _ in range(3000):
+        stream = bytes(rng.choice(b'ab\r') for _ in range(rng.randint(0, 120)))
+        cuts = sorted(rng.sample(range(1, len(stream)), min(len(stream) - 1, rng.randint(0, 30)))) if stream else []
+        chunks = [stream[start:end] for start, end in zip([0, *cuts], [*cuts, len(stream)]) if end > start]
+        window = rng.choice([1, 2, 5, 16, 64, 1024])
+        searcher = make_searcher()
+        assert expect_all(searcher, chunks, window) == expect_all(WholeSearcher(searcher), chunks, window), (
+            chunks, window)
+
+
+@pytest.mark.parametrize('unicode', [False, True])
+def test_regex_match_trimmed(unicode):
+    def encode(value):
+        return value if unicode else value.encode()
+
+    chunks = [encode('IN YEAR 3, 12 PEOPLE STARVED,\r'), encode('.' * 100),
+              *[encode('IN YEAR 4, 0 PEOPLE STARVED,\r')] * 5]
+    expecter = (streamexpect.TextExpecter if unicode else streamexpect.BytesExpecter)(ChunkAdapter(chunks), window=32)
+    searcher = streamexpect.RegexSearcher(encode('YEAR (?P<YEAR>[0-9]+), ([0-9]+) PEOPLE(?: (SOLD))?'),
+                                          converters={'YEAR': int})
+    first = expecter.expect(searcher)
+    # the groups of the first match are only copied out of the history long
+    # after it was appended to in place, and trimmed
+    for _ in range(5):
+        expecter.expect(searcher)
+    assert len(expecter._history) <= 2 * 32
+
+    assert (first.start, first.end) == (3, 20)
+    assert first.match == encode('YEAR 3, 12 PEOPLE')
+    assert first.groups == (3, encode('12'), None)
+    assert first.groupdict == {'YEAR': 3}
+    assert first.view(2) == encode('12')
+    assert first.view('YEAR') == encode('3')
+    assert first.view(3) is None
+    if not unicode:
+        assert type(first.view()) is memoryview and first.view() == b'YEAR 3, 12 PEOPLE'
@@ -0,0 +1,152 @@
+"""
+WozMon scripts -- read and write memory store commands of the Apple-1 monitor.
+
+A store command is an address, a colon, and the bytes to store there, such
+as ``0300: A9 00``.  A line beginning with the colon stores from the byte
+after the last one stored.  WozMon reads hex numbers of any number of digits,
+keeping the lowest byte, and lines of at most 127 characters.
+
+:func:`encode` writes a memory image in as few characters as possible, and
+skips the bytes the target already holds, given a *baseline* image of its
+memory, such as the output of the examine commands of
+:func:`examine_commands`::
+
+    python wozmon.py apple1-HAMMURABI.TXT apple1-HAMMURABI.min.txt [baseline.txt]
+"""
+import re
+import sys
+
+# WozMon's input buffer is $0200-$027F, the 128th key of a line cancels it.
+LINE_LENGTH = 127
+
+STORE = re.compile(r'([0-9A-F]+)?:([0-9A-F\s]*)')
+RUN = re.compile(r'([0-9A-F]+)R')
+
+
+def parse_store(line):
+    """Return the address and the bytes stored by *line*.
+
+    The address is None for a line continuing the previous store, and the
+    result is None when *line* is not a store command.
+    """
+    match = STORE.fullmatch(line.strip())
+    if match is None:
+        return None
+    address, values = match.groups()
+    return (None if address is None else int(address, 16) & 0xffff,
+            [int(value, 16) & 0xff for value in values.split()])
+
+
+def read_script(lines):
+    """Read the store commands of a WozMon script, or of examine output.
+
+    Returns the memory image, a dict of byte values by address, and the
+    lines following the store commands, such as a run command.
+    """
+    image = {}
+    address = 0
+    lines = list(lines)
+    for index, line in enumerate(lines):
+        store = parse_store(line)
+        if store is None:
+            return image, lines[index:]
+        start, values = store
+        if start is not None:
+            address = start
+        image.update(enumerate(values, address))
+        address += len(values)
+    return image, []
+
+
+def runs(image, baseline=None):
+    """Return the runs of contiguous addresses of *image* to store.
+
+    Bytes of *baseline* equal to *image* are skipped, unless storing them
+    again is shorter than beginning a new line after them.
+    """
+    baseline = baseline or {}
+    known = {**baseline, **image}
+    result = []
+    for address in sorted(image):
+        if baseline.get(address) == image[address]:
+            continue
+        if result:
+            start, values = result[-1]
+            gap = range(start + len(values), address)
+            if all(skipped in known for skipped in gap):
+                fill = [known[skipped] for skipped in gap]
+                # the fill and its spaces, against a return and the address
+                if sum(len(f' {value:X}') for value in fill) <= len(f'{address:X}:'):
+                    values.extend(fill + [image[address]])
+                    continue
+        result.append((address, [image[address]]))
+    return result
+
+
+def store_lines(address, values, width=LINE_LENGTH):
+    """Return the store commands of *values* from *address*, each of at most
+    *width* characters, continued by lines beginning with the colon."""
+    lines = []
+    prefix = f'{address:X}:'
+    line = ''
+    for value in values:
+        item = f'{value:X}'
+        if line and len(prefix) + len(line) + 1 + len(item) > width:
+            lines.append(prefix + line)
+            prefix, line = ':', ''
+        line = f'{line} {item}' if line else item
+    lines.append(prefix + line)
+    return lines
+
+
+def encode(image, baseline=None, width=LINE_LENGTH):
+    """Return the shortest WozMon store commands of *image*.
+
+    Leading zeros are dropped, and each run of contiguous addresses is
+    written as one store command continued by as few lines as fit in
+    *width* characters.  Bytes equal in *baseline* are skipped.
+    """
+    return [line for address, values in runs(image, baseline)
+            for line in store_lines(address, values, width)]
+
+
+def examine_commands(ranges, width=LINE_LENGTH):
+    """Return WozMon examine commands of *ranges*, ranges of addresses.
+
+    Each command is of at most *width* characters, and is paired with the
+    number of characters WozMon prints in reply, from the echo of the
+    carriage return ending it to the carriage return beginning the next line.
+    """
+    commands = []
+    line, length = '', 2
+    for addresses in ranges:
+        item = f'{addresses.start:X}'
+        if len(addresses) > 1:
+            item = f'{item}.{addresses.stop - 1:X}'
+        if line and len(line) + 1 + len(item) > width:
+            commands.append((line, length))
+            line, length = '', 2
+        line = f'{line} {item}' if line else item
+        # an address and a colon begin the first byte and every eighth one
+        length += 3 * len(addresses) + 6 * (1 + sum(
+            1 for address in addresses[1:] if address % 8 == 0))
+    if line:
+        commands.append((line, length))
+    return commands
+
+
+def main(source, destination, baseline=None):
+    with open(source) as f:
+        image, commands = read_script(f.read().splitlines())
+    if baseline is not None:
+        with open(baseline) as f:
+            baseline, _ = read_script(f.read().splitlines())
+    lines = encode(image, baseline) + commands
+    with open(destination, 'w') as f:
+        f.write('\r\n'.join(lines) + '\r\n')
+    print(f'{len(image):,} bytes of {source} written to {destination}, '
+          f'{sum(len(line) + 1 for line in lines):,} characters in {len(lines)} lines')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:4])